@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from PIL import Image
+
+# Allow running as "python Benchmark/RunBenchmarks.py" from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.Capture import save_screenshot
+from Library.FrameCadence import FrameCadenceAnalyzer
+from Library.FunctionLibrary import scan_for_video_files
+from Library.ImageCompare import grade, grade_batch
+from Library.MediaIndex import MediaIndex
+
+# Resolutions the synthetic golden/screenshot pairs are generated at
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+# A regression is a median time more than this fraction above the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Baseline compared against by default, written with --update-baseline
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Results of the latest run, kept beside the baseline and ignored by git
+DEFAULT_OUTPUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results.json")
+
+# Exit status when there is no baseline, so a missing one is not mistaken for a passed check.
+# Timings only compare on the machine that recorded them, so no baseline is committed.
+NO_BASELINE_STATUS = 2
+
+def make_image_pairs(folder, resolution, count):
+    """
+    Writes synthetic golden/screenshot JPEG pairs that look like video frames.
+
+    Each golden image is a smooth gradient with a few shapes, and its screenshot is the same
+    picture with mild noise, as a fresh capture of the same frame would be.
+
+    Args:
+        folder (str): The folder the images are written to.
+        resolution (tuple): The (width, height) of the images.
+        count (int): The number of pairs.
+
+    Returns:
+        list: (golden_file, comparison_file, percentage_threshold, config) measurements.
+    """
+    width, height = resolution
+    rng = np.random.default_rng(width * height + count)
+    gradient = np.add.outer(np.linspace(0, 160, height), np.linspace(0, 80, width))
+    measurements = []
+    for index in range(count):
+        golden = np.dstack([gradient + 10 * channel for channel in range(3)]).astype(np.uint8)
+        for _ in range(5):
+            x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+            cv2.circle(golden, (x, y), int(rng.integers(10, height // 4)), [int(v) for v in rng.integers(0, 256, 3)], -1)
+        noise = rng.integers(-6, 7, size=golden.shape)
+        screenshot = np.clip(golden.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+        config = f"{width}x{height}_{index}"
+        cv2.imwrite(os.path.join(folder, f"{config}_golden.jpg"), golden)
+        cv2.imwrite(os.path.join(folder, f"{config}_screenshot.jpg"), screenshot)
+        measurements.append((f"{config}_golden.jpg", f"{config}_screenshot.jpg", 5, config))
+    return measurements
+
+def make_media_tree(folder, directories, files_per_directory):
+    """
+    Creates a synthetic media tree of empty files, a third of them videos.
+
+    Args:
+        folder (str): The root of the tree.
+        directories (int): The number of directories, nested up to three levels deep.
+        files_per_directory (int): The number of files in every directory.
+
+    Returns:
+        int: The number of video files created.
+    """
+    extensions = [".mp4", ".txt", ".mkv", ".jpg", ".mpg", ".log"]
+    videos = 0
+    for directory_index in range(directories):
+        parts = [f"level{depth}_{directory_index % (depth + 3)}" for depth in range(directory_index % 3)]
+        directory = os.path.join(folder, *parts, f"dir{directory_index}")
+        os.makedirs(directory, exist_ok=True)
+        for file_index in range(files_per_directory):
+            extension = extensions[file_index % len(extensions)]
+            open(os.path.join(directory, f"clip{file_index}{extension}"), "w").close()
+            videos += extension in (".mp4", ".mkv", ".mpg")
+    return videos
+
+def time_function(function, repeat):
+    """
+    Runs a function repeat times after one warm-up run.
+
+    Returns:
+        list: The wall-clock seconds of every timed run.
+    """
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def benchmark_result(timings, items):
+    """
+    Summarizes the timings of one benchmark.
+    """
+    median = statistics.median(timings)
+    return {
+        "runs": len(timings),
+        "items": items,
+        "median_s": median,
+        "min_s": min(timings),
+        "items_per_s": items / median if median > 0 else None,
+    }
+
+def run_benchmarks(work_folder, resolutions=RESOLUTIONS, pairs=8, directories=200, files_per_directory=30, repeat=5):
+    """
+    Generates the synthetic data in a work folder and times every hot path.
+
+    Benchmarks:
+        grade.<W>x<H>: ImageCompare.grade of one pair after another.
+        grade_batch.<W>x<H>: ImageCompare.grade_batch of all the pairs at once.
+        jpeg_encode.<W>x<H>: Capture.save_screenshot, the JPEG encode of every file-based capture.
+        cadence.<W>x<H>: FrameCadenceAnalyzer.push of 240 frames, one second of 240 FPS content.
+        scan.full: FunctionLibrary.scan_for_video_files of the media tree.
+        scan.media_index: A MediaIndex rescan of the unchanged media tree.
+
+    Returns:
+        dict: benchmark name -> result as returned by benchmark_result.
+    """
+    results = {}
+    for resolution in resolutions:
+        label = f"{resolution[0]}x{resolution[1]}"
+        folder = os.path.join(work_folder, label)
+        os.makedirs(folder, exist_ok=True)
+        measurements = make_image_pairs(folder, resolution, pairs)
+
+        def grade_each():
+            with contextlib.redirect_stdout(io.StringIO()):  # grade() prints every verdict
+                for golden_file, comparison_file, threshold, _ in measurements:
+                    grade(os.path.join(folder, golden_file), os.path.join(folder, comparison_file), threshold)
+        results[f"grade.{label}"] = benchmark_result(time_function(grade_each, repeat), len(measurements))
+
+        def grade_all():
+            grade_batch(measurements, folder, folder)
+        results[f"grade_batch.{label}"] = benchmark_result(time_function(grade_all, repeat), len(measurements))
+
+        screenshot = Image.open(os.path.join(folder, measurements[0][1])).convert("RGBA")
+        screenshot.load()
+        def encode():
+            save_screenshot(screenshot, io.BytesIO())
+        results[f"jpeg_encode.{label}"] = benchmark_result(time_function(encode, repeat), 1)
+
+        frames = [cv2.imread(os.path.join(folder, measurement[0])) for measurement in measurements]
+        def analyze_cadence():
+            analyzer = FrameCadenceAnalyzer(fps=240)
+            for index in range(240):
+                analyzer.push(frames[index % len(frames)], index / 240)
+        results[f"cadence.{label}"] = benchmark_result(time_function(analyze_cadence, repeat), 240)
+
+    tree = os.path.join(work_folder, "tree")
+    videos = make_media_tree(tree, directories, files_per_directory)
+    results["scan.full"] = benchmark_result(time_function(lambda: scan_for_video_files(tree), repeat), videos)
+
+    index_file = os.path.join(work_folder, "media_index.json")
+    def rescan():
+        media_index = MediaIndex(index_file)
+        for _ in media_index.scan(tree):
+            pass
+        media_index.save()
+    results["scan.media_index"] = benchmark_result(time_function(rescan, repeat), videos)
+    return results
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds the benchmarks whose median time regressed past the baseline.
+
+    Benchmarks missing from either side are ignored.
+
+    Args:
+        results (dict): benchmark name -> result, as returned by run_benchmarks.
+        baseline (dict): The same structure from an earlier run.
+        tolerance (float): The allowed slowdown, 0.25 allows medians up to 25% slower.
+
+    Returns:
+        list: (name, baseline_median_s, median_s) for every regressed benchmark.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["median_s"] > reference["median_s"] * (1 + tolerance):
+            regressions.append((name, reference["median_s"], result["median_s"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the grading, scanning and capture encode paths on synthetic data.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE, help="JSON file the results are written to.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE, help="Baseline JSON file to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before failing.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark.")
+    parser.add_argument("--quick", action="store_true", help="Smaller data set for a fast smoke run.")
+    args = parser.parse_args(argv)
+
+    options = {"repeat": args.repeat}
+    if args.quick:
+        options.update(resolutions=RESOLUTIONS[:1], pairs=2, directories=20, files_per_directory=10)
+    with tempfile.TemporaryDirectory() as work_folder:
+        results = run_benchmarks(work_folder, **options)
+
+    report = {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:<24} median {result['median_s'] * 1000:9.2f} ms  {result['items_per_s'] or 0:10.1f} items/s")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"NO BASELINE at {args.baseline}, nothing was checked for regressions. "
+              f"Run with --update-baseline on this machine to create one.")
+        return NO_BASELINE_STATUS
+    with open(args.baseline) as file:
+        baseline = json.load(file)["benchmarks"]
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for name, baseline_median, median in regressions:
+        print(f"REGRESSION {name}: {median * 1000:.2f} ms vs baseline {baseline_median * 1000:.2f} ms")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# This is a dummy __init__.py file for the Benchmark package.
+# This file allows the directory to be treated as a package in Python.
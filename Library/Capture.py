@@ -1,6 +1,21 @@
-import pygetwindow as gw
-import pyautogui
+import time
+import numpy as np
 from PIL import Image
+from Library.Instrumentation import span
+
+try:
+    import pygetwindow as gw
+    import pyautogui
+except Exception:
+    # Window capture needs a desktop session, headless hosts can still decode frames with FrameSource
+    gw = None
+    pyautogui = None
+
+# Returned by the capture functions when there is no desktop session to capture from
+CAPTURE_UNAVAILABLE = "Error: Window capture is not available on this host."
+
+# Size frames are reduced to before checking whether the picture has settled
+STABILITY_FRAME_SIZE = (160, 120)
 
 def capture_window_still(window_title, output_file):
     """
@@ -15,18 +30,22 @@ def capture_window_still(window_title, output_file):
     Returns:
         str: Success message or error message if the window is not found.
     """
+    if gw is None:
+        return CAPTURE_UNAVAILABLE
     try:
         # Debug: List all available windows
         all_windows = gw.getAllTitles()
         #print(f"Available windows: {all_windows}")
 
         # Find the window by title
-        window = next((w for w in gw.getWindowsWithTitle(window_title) if w.title == window_title), None)
+        with span("capture.find_window"):
+            window = find_window(window_title)
         if not window:
             return f"Error: Window with title '{window_title}' not found."
 
         # Activate the window to ensure it is in focus
-        window.activate()
+        with span("capture.activate"):
+            window.activate()
 
         # Get the window's bounding box
         bbox = (window.left, window.top, window.right, window.bottom)
@@ -37,15 +56,187 @@ def capture_window_still(window_title, output_file):
             return f"Error: Invalid bounding box dimensions for window '{window_title}': {bbox}"
 
         # Capture the screenshot using pyautogui
-        screenshot = pyautogui.screenshot(region=bbox)
+        with span("capture.screenshot"):
+            screenshot = pyautogui.screenshot(region=bbox)
 
-        # Save the screenshot as a .jpg file
+        save_screenshot(screenshot, output_file)
+        return f"Screenshot saved successfully to {output_file}."
+    except Exception as e:
+        return f"Error capturing window: {e}"
+
+def save_screenshot(screenshot, output_file):
+    """
+    Saves a captured screenshot as a JPEG, the encode every file-based capture goes through.
+
+    Args:
+        screenshot (PIL.Image.Image): The screenshot, e.g. from pyautogui.screenshot.
+        output_file (str or file): The path or file object to write the JPEG to.
+    """
+    with span("capture.save_jpeg"):
         screenshot = screenshot.convert("RGB")  # Ensure the image is in RGB mode for JPEG
         screenshot.save(output_file, "JPEG")
+
+def find_window(window_title):
+    """
+    Finds the window whose title matches exactly.
+
+    Args:
+        window_title (str): The title of the window.
+
+    Returns:
+        The window, or None if it is not open.
+    """
+    return next((w for w in gw.getWindowsWithTitle(window_title) if w.title == window_title), None)
+
+def wait_for_window(window_title, timeout=10, poll_interval=0.1):
+    """
+    Polls until a window with the given title appears.
+
+    Args:
+        window_title (str): The title of the window.
+        timeout (float): The maximum number of seconds to wait.
+        poll_interval (float): The number of seconds between polls.
+
+    Returns:
+        The window, or None if it did not appear in time.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        window = find_window(window_title)
+        if window is not None or time.monotonic() >= deadline:
+            return window
+        time.sleep(poll_interval)
+
+def frame_difference(first_frame, second_frame):
+    """
+    Calculates the percentage difference between two screenshots at a reduced size.
+
+    Args:
+        first_frame (PIL.Image.Image): The earlier screenshot.
+        second_frame (PIL.Image.Image): The later screenshot.
+
+    Returns:
+        float: The percentage difference (0-100).
+    """
+    first = np.asarray(first_frame.convert("L").resize(STABILITY_FRAME_SIZE), dtype=np.int16)
+    second = np.asarray(second_frame.convert("L").resize(STABILITY_FRAME_SIZE), dtype=np.int16)
+    return float(np.abs(first - second).mean() / 255 * 100)
+
+def _wait_for_stable_frame(window_title, timeout, target_time, stable_threshold, stable_frames, poll_interval):
+    """
+    Waits for a window to show a settled picture, see capture_when_ready.
+
+    Returns:
+        tuple: (frame, error) where frame is the last PIL screenshot, or None with an error message.
+    """
+    deadline = time.monotonic() + timeout
+    with span("capture.wait_for_window"):
+        window = wait_for_window(window_title, timeout, poll_interval)
+    if not window:
+        return None, f"Error: Window with title '{window_title}' not found."
+    appeared = time.monotonic()
+
+    # Activate the window to ensure it is in focus
+    with span("capture.activate"):
+        window.activate()
+
+    previous_frame = None
+    stable_count = 0
+    while True:
+        # Re-read the bounding box, the window may still be moving to full screen
+        bbox = (window.left, window.top, window.right, window.bottom)
+        if bbox[2] - bbox[0] > 0 and bbox[3] - bbox[1] > 0:
+            with span("capture.screenshot"):
+                frame = pyautogui.screenshot(region=bbox)
+            if previous_frame is not None and frame.size == previous_frame.size:
+                with span("capture.stability_check"):
+                    difference = frame_difference(previous_frame, frame)
+                if difference < stable_threshold:
+                    stable_count += 1
+                else:
+                    stable_count = 0
+            previous_frame = frame
+
+            target_reached = target_time is None or time.monotonic() - appeared >= target_time
+            if stable_count >= stable_frames and target_reached:
+                return previous_frame, None
+        if time.monotonic() >= deadline:
+            return None, f"Error: Window '{window_title}' did not settle within {timeout} seconds."
+        time.sleep(poll_interval)
+
+def capture_when_ready(window_title, output_file, timeout=15, target_time=None, stable_threshold=3.0, stable_frames=2,
+                       poll_interval=0.1, on_captured=None):
+    """
+    Captures a window as soon as it is ready instead of after a fixed delay.
+
+    Polls for the window to appear, then grabs frames until stable_frames consecutive frames
+    differ by less than stable_threshold percent. When target_time is given the capture also
+    waits until that many seconds have passed since the window appeared, so golden and test
+    runs capture the same point of the video. The last frame is saved as a .jpg file and
+    on_captured is called, for example to stop the player.
+
+    Args:
+        window_title (str): The title of the window to capture.
+        output_file (str): The path to save the captured image (e.g., "output.jpg").
+        timeout (float): The maximum number of seconds to wait for a capture.
+        target_time (float): Optional seconds after the window appeared before capturing.
+        stable_threshold (float): The percentage difference below which two frames count as stable.
+        stable_frames (int): The number of consecutive stable frame pairs needed.
+        poll_interval (float): The number of seconds between polls and frame grabs.
+        on_captured (callable): Optional function called once the screenshot has been saved.
+
+    Returns:
+        str: Success message or error message if the window is not found or never settled.
+    """
+    if gw is None:
+        return CAPTURE_UNAVAILABLE
+    try:
+        frame, error = _wait_for_stable_frame(window_title, timeout, target_time, stable_threshold, stable_frames, poll_interval)
+        if error:
+            return error
+
+        save_screenshot(frame, output_file)
+        if on_captured is not None:
+            on_captured()
         return f"Screenshot saved successfully to {output_file}."
     except Exception as e:
         return f"Error capturing window: {e}"
 
+def capture_frame_when_ready(window_title, timeout=15, target_time=None, stable_threshold=3.0, stable_frames=2,
+                             poll_interval=0.1, on_captured=None):
+    """
+    Captures a window like capture_when_ready, but returns the picture instead of saving a JPEG.
+
+    The frame can be graded straight away with ImageCompare.grade_frame, which skips the
+    lossy JPEG encode and the decode that follows it.
+
+    Args:
+        window_title (str): The title of the window to capture.
+        timeout (float): The maximum number of seconds to wait for a capture.
+        target_time (float): Optional seconds after the window appeared before capturing.
+        stable_threshold (float): The percentage difference below which two frames count as stable.
+        stable_frames (int): The number of consecutive stable frame pairs needed.
+        poll_interval (float): The number of seconds between polls and frame grabs.
+        on_captured (callable): Optional function called once the frame has been captured.
+
+    Returns:
+        tuple: (frame, message) where frame is a height x width x 3 BGR numpy.ndarray, the
+               channel order cv2.imread returns, or None with an error message.
+    """
+    if gw is None:
+        return None, CAPTURE_UNAVAILABLE
+    try:
+        frame, error = _wait_for_stable_frame(window_title, timeout, target_time, stable_threshold, stable_frames, poll_interval)
+        if error:
+            return None, error
+        with span("capture.to_array"):
+            frame = np.asarray(frame.convert("RGB"))[:, :, ::-1]
+        if on_captured is not None:
+            on_captured()
+        return frame, f"Frame captured from window '{window_title}'."
+    except Exception as e:
+        return None, f"Error capturing window: {e}"
+
 # if __name__ == "__main__":
 #     # Test with Notepad
 #     window_title = "*1 - Notepad"  # Example window title, change this to the actual window you want to capture
@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+import cv2
+from Library.GoldenModel import grade_frame_with_model, model_path
+from Library.ImageCompare import DEFAULT_SIZE, DEFAULT_THRESHOLD, build_measurements, grade_frame
+from Library.Instrumentation import span
+
+# What CapturePipeline writes to the media folder: nothing, the failed captures or every capture
+ARCHIVE_MODES = ("none", "failures", "all")
+
+class ArchiveWriter:
+    def __init__(self, max_pending=16):
+        """
+        Initializes a background thread that writes images to disk.
+
+        Args:
+            max_pending (int): The number of images that may wait to be written. submit()
+                               blocks beyond it, so a slow disk cannot use up the memory.
+        """
+        self.queue = queue.Queue(max_pending)
+        self.written = []
+        self.errors = []
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, output_file, image):
+        """
+        Queues an image to be written with cv2.imwrite; the format follows the file extension.
+        """
+        self.queue.put((output_file, image))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            output_file, image = item
+            try:
+                with span("archive.write"):
+                    written = cv2.imwrite(output_file, image)
+                if written:
+                    self.written.append(output_file)
+                else:
+                    self.errors.append(f"Error: Could not write the capture to {output_file}.")
+            except Exception as e:
+                self.errors.append(f"Error writing the capture to {output_file}: {e}")
+
+    def close(self):
+        """
+        Writes every queued image and stops the thread.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+class CapturePipeline:
+    def __init__(self, golden_folder, media_folder, golden_cache_folder=None, archive="failures",
+                 percentage_threshold=DEFAULT_THRESHOLD, size=DEFAULT_SIZE, early_exit=False, golden_archive_file=None,
+                 golden_model_folder=None, metric=None):
+        """
+        Initializes a pipeline that grades captures in memory, as they arrive.
+
+        Captures are graded against the golden images without a JPEG round trip. Only the
+        captures selected by archive are written to the media folder, under the screenshot
+        names ImageCompare expects, by a background ArchiveWriter.
+
+        Args:
+            golden_folder (str): The folder holding the golden images.
+            media_folder (str): The folder captures are archived to.
+            golden_cache_folder (str): Optional GoldenCache folder for the preprocessed golden images.
+            archive (str): "none", "failures" or "all".
+            percentage_threshold (float): The threshold applied to every capture.
+            size (tuple): The (width, height) every image is resized to.
+            early_exit (bool): Whether to grade coarse to fine, see ImageCompare.coarse_to_fine_differences.
+            golden_archive_file (str): Optional packed golden archive, see ImageCompare.grade_batch.
+            golden_model_folder (str): Optional folder of statistical golden models. Captures of
+                                       videos with a model are scored against it, as by
+                                       GoldenModel.grade_with_models.
+            metric (str or list): Optional metric choice, see ImageCompare.metric_stages. Like
+                                  grade_with_models, a metric choice takes precedence over a model.
+        """
+        if archive not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown archive mode: {archive}")
+        self.golden_folder = golden_folder
+        self.media_folder = media_folder
+        self.archive = archive
+        self.percentage_threshold = percentage_threshold
+        self.size = size
+        self.early_exit = early_exit
+        self.golden_model_folder = golden_model_folder
+        self.metric = metric
+        self.golden_cache = None
+        if golden_cache_folder:
+            from Library.GoldenCache import GoldenCache
+            self.golden_cache = GoldenCache(golden_cache_folder, size)
+        self.golden_archive = None
+        if golden_archive_file:
+            from Library.GoldenArchive import GoldenArchive
+            self.golden_archive = GoldenArchive(golden_archive_file)
+        self.writer = ArchiveWriter() if archive != "none" else None
+        self.results = []
+
+    def grade_capture(self, video_file, frame):
+        """
+        Grades the capture of one video and queues it for archiving if needed.
+
+        Args:
+            video_file (str): The video the frame was captured from.
+            frame (numpy.ndarray): The captured BGR image, or None if the capture failed.
+
+        Returns:
+            dict: A result as returned by ImageCompare.grade_batch, plus archived set to
+                  True when the capture is being written to the media folder.
+        """
+        golden_file, comparison_file, percentage_threshold, config = build_measurements([video_file], self.percentage_threshold)[0]
+        model_file = self._model_file(config)
+        if model_file:
+            result = grade_frame_with_model(frame, model_file, self.golden_folder, self.media_folder, golden_file,
+                                            comparison_file, percentage_threshold, config)
+        else:
+            result = grade_frame(frame, self.golden_folder, self.media_folder, golden_file, comparison_file,
+                                 percentage_threshold, config, self.size, self.golden_cache, self.early_exit,
+                                 self.golden_archive, self.metric)
+        if self.writer is not None and frame is not None and (self.archive == "all" or not result["passed"]):
+            self.writer.submit(result["comparison"], frame)
+            result["archived"] = True
+        self.results.append(result)
+        return result
+
+    def _model_file(self, config):
+        """
+        Returns the golden model file a capture of config is scored against, or None to grade it against its golden image.
+        """
+        if not self.golden_model_folder or self.metric is not None:
+            return None
+        model_file = model_path(self.golden_model_folder, config)
+        return model_file if os.path.exists(model_file) else None
+
+    def close(self):
+        """
+        Waits for the archive writes to finish.
+
+        Returns:
+            list: The results of every graded capture, in the order they were graded.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,237 @@
+import cv2
+import numpy as np
+
+# Frames held in the buffer before they are analyzed, one second of 240 FPS content
+DEFAULT_BUFFER_FRAMES = 240
+
+# Size the frames are reduced to before they are compared, as for the capture stability check
+CADENCE_FRAME_SIZE = (160, 120)
+
+# Consecutive frames differing by less than this percentage show the same picture
+DEFAULT_DUPLICATE_THRESHOLD = 0.1
+
+# A timestamp gap of more than this many frame intervals means frames were dropped
+DROP_GAP_FACTOR = 1.5
+
+# A difference this many times the typical motion of the buffer means frames were skipped
+DEFAULT_SPIKE_FACTOR = 1.8
+
+class FrameCadenceAnalyzer:
+    def __init__(self, fps=None, buffer_frames=DEFAULT_BUFFER_FRAMES, size=CADENCE_FRAME_SIZE,
+                 duplicate_threshold=DEFAULT_DUPLICATE_THRESHOLD, spike_factor=DEFAULT_SPIKE_FACTOR):
+        """
+        Initializes a detector of duplicated, dropped and stuttering frames in a stream of frames.
+
+        Frames are reduced to grayscale thumbnails and copied into a preallocated buffer, so
+        push costs one resize per frame. Once the buffer is full the differences of all its
+        consecutive frames are computed in one numpy operation and classified:
+
+        duplicate: The frame differs from the previous one by less than duplicate_threshold
+                   while the content is moving, i.e. the same picture was shown again.
+        dropped: The timestamp gap to the previous frame is more than DROP_GAP_FACTOR frame
+                 intervals, or the difference is spike_factor times the typical motion of the
+                 buffer, i.e. pictures were skipped. A scene cut looks the same to the second test.
+        stutter: A picture was held for more frames than the stream's usual cadence, e.g. for
+                 3 frames of a 60 FPS stream that otherwise shows every picture twice.
+
+        Args:
+            fps (float): The frame rate of the stream, estimated from the timestamps if None.
+            buffer_frames (int): The number of frames analyzed at once.
+            size (tuple): The (width, height) the frames are reduced to.
+            duplicate_threshold (float): The percentage difference below which frames are duplicates.
+            spike_factor (float): The motion multiple above which frames count as dropped, None
+                                  only uses the timestamps.
+        """
+        self.fps = fps
+        self.size = size
+        self.duplicate_threshold = duplicate_threshold
+        self.spike_factor = spike_factor
+        # Slot 0 keeps the last frame of the previous buffer, so its difference to the next one is not lost
+        self.frames = np.empty((buffer_frames + 1, size[1], size[0]), dtype=np.uint8)
+        self.timestamps = np.full(buffer_frames + 1, np.nan)
+        self.count = 0
+        self.frame_count = 0
+        self.has_previous = False
+        # Frame index of the last new picture and how often each hold length was seen
+        self.last_picture = None
+        self.hold_counts = {}
+        self.totals = {"duplicate": 0, "dropped": 0, "stutter": 0}
+        self.diff_sum = 0.0
+        self.diff_count = 0
+
+    def push(self, frame, timestamp=None):
+        """
+        Adds the next frame of the stream.
+
+        Args:
+            frame (numpy.ndarray or PIL.Image.Image): A BGR or grayscale frame, or a screenshot.
+            timestamp (float): The presentation or capture time in seconds, if known.
+
+        Returns:
+            list: The events found if the buffer was full and got analyzed, otherwise empty.
+        """
+        if not isinstance(frame, np.ndarray):
+            frame = np.asarray(frame.convert("L"))
+        self.count += 1
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self.frames[self.count])
+        else:
+            self.frames[self.count] = small
+        self.timestamps[self.count] = np.nan if timestamp is None else timestamp
+        if self.count == len(self.frames) - 1:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Analyzes the frames in the buffer, e.g. at the end of the stream.
+
+        Returns:
+            list: Event dicts with the keys type ("duplicate", "dropped" or "stutter"), frame
+                  (the index of the frame in the stream; for a stutter the frame showing the
+                  next picture), timestamp, diff (the percentage difference to the previous
+                  frame) and frames (the number of dropped frames, the number of frames a
+                  stuttering picture was held, or 1 for a duplicate).
+        """
+        if self.count == 0:
+            return []
+        start = 0 if self.has_previous else 1
+        first_index = self.frame_count - (1 - start)
+        block = self.frames[start:self.count + 1]
+        timestamps = self.timestamps[start:self.count + 1]
+        self.frame_count += self.count
+
+        # Difference of every frame to the previous one, as a percentage of full scale
+        diffs = np.abs(block[1:].astype(np.int16) - block[:-1]).mean(axis=(1, 2)) * (100 / 255)
+        events = []
+        if len(diffs):
+            events = self._classify(diffs, timestamps, first_index + 1)
+
+        self.frames[0] = self.frames[self.count]
+        self.timestamps[0] = self.timestamps[self.count]
+        self.has_previous = True
+        self.count = 0
+        return events
+
+    def _classify(self, diffs, timestamps, first_index):
+        """
+        Finds the events in the differences of a buffer, first_index being the stream index of the frame of diffs[0].
+        """
+        self.diff_sum += float(diffs.sum())
+        self.diff_count += len(diffs)
+        indexes = np.arange(first_index, first_index + len(diffs))
+        moving = diffs >= self.duplicate_threshold
+        found = {}
+
+        dropped = np.zeros(len(diffs), dtype=np.int64)
+        gaps = np.diff(timestamps)
+        known = ~np.isnan(gaps)
+        if self.fps is None and known.sum() >= 2:
+            interval = float(np.median(gaps[known]))
+            self.fps = 1 / interval if interval > 0 else None
+        if self.fps:
+            late = known & (gaps > DROP_GAP_FACTOR / self.fps)
+            dropped[late] = np.rint(gaps[late] * self.fps).astype(np.int64) - 1
+        if self.spike_factor and moving.sum() >= 3:
+            motion = float(np.median(diffs[moving]))
+            spikes = (dropped == 0) & (diffs > self.spike_factor * motion)
+            dropped[spikes] = np.maximum(np.rint(diffs[spikes] / motion).astype(np.int64) - 1, 1)
+        for position in np.flatnonzero(dropped):
+            found[(position, "dropped")] = int(dropped[position])
+
+        # Still content repeats every frame, duplicates only count while something moves
+        if moving.any():
+            for position in np.flatnonzero(~moving):
+                found[(position, "duplicate")] = 1
+
+            # How long every picture was held, from one new picture to the next
+            pictures = indexes[moving]
+            starts = pictures if self.last_picture is None else np.concatenate(([self.last_picture], pictures))
+            holds = np.diff(starts)
+            for hold in holds:
+                self.hold_counts[int(hold)] = self.hold_counts.get(int(hold), 0) + 1
+            cadence = self.cadence()
+            # Reported at the frame that finally showed the next picture
+            for end, hold in zip(starts[1:], holds):
+                if hold > cadence:
+                    found[(end - first_index, "stutter")] = int(hold)
+            self.last_picture = int(pictures[-1])
+        else:
+            self.last_picture = None
+
+        events = []
+        for (position, event_type), frames in sorted(found.items()):
+            timestamp = timestamps[position + 1]
+            events.append({"type": event_type, "frame": int(indexes[position]),
+                           "timestamp": None if np.isnan(timestamp) else float(timestamp),
+                           "diff": float(diffs[position]), "frames": frames})
+            self.totals[event_type] += 1
+        return events
+
+    def cadence(self):
+        """
+        Returns the number of frames the stream usually shows every picture for, e.g. 2 for 30 FPS content in a 60 FPS stream.
+        """
+        if not self.hold_counts:
+            return 1
+        return max(self.hold_counts, key=self.hold_counts.get)
+
+    def summary(self):
+        """
+        Summarizes the frames analyzed so far.
+
+        Returns:
+            dict: frames, duplicates, dropped and stutters (event counts), cadence, fps (of the
+                  stream), effective_fps (new pictures per second) and mean_diff.
+        """
+        cadence = self.cadence()
+        return {
+            "frames": self.frame_count,
+            "duplicates": self.totals["duplicate"],
+            "dropped": self.totals["dropped"],
+            "stutters": self.totals["stutter"],
+            "cadence": cadence,
+            "fps": self.fps,
+            "effective_fps": self.fps / cadence if self.fps else None,
+            "mean_diff": self.diff_sum / self.diff_count if self.diff_count else None,
+        }
+
+def analyze_frames(frames, fps=None, **options):
+    """
+    Runs the cadence analysis over any source of frames, e.g. captures or a decoded file.
+
+    Args:
+        frames (iterable): Frames, or (timestamp, frame) tuples as FrameSource.iter_frames yields.
+        fps (float): The frame rate, estimated from the timestamps if None.
+        **options: Further FrameCadenceAnalyzer options, e.g. buffer_frames.
+
+    Returns:
+        tuple: (events, summary) as returned by FrameCadenceAnalyzer.flush and summary.
+    """
+    analyzer = FrameCadenceAnalyzer(fps=fps, **options)
+    events = []
+    for item in frames:
+        if isinstance(item, tuple):
+            events.extend(analyzer.push(item[1], item[0]))
+        else:
+            events.extend(analyzer.push(item))
+    events.extend(analyzer.flush())
+    return events, analyzer.summary()
+
+def analyze_video(video_path, step=1, **options):
+    """
+    Decodes a media file and checks it for duplicated, dropped and stuttering frames.
+
+    Args:
+        video_path (str): The path of the media file.
+        step (int): Analyze every step-th frame only.
+        **options: Further FrameCadenceAnalyzer options.
+
+    Returns:
+        tuple: (events, summary) as returned by analyze_frames.
+    """
+    from Library.FrameSource import iter_frames
+    from Library.MediaProbe import probe_media
+    fps = options.pop("fps", None) or probe_media(video_path)["fps"]
+    return analyze_frames(iter_frames(video_path, step=step), fps=fps / step if fps else None, **options)
@@ -0,0 +1,189 @@
+import os
+import cv2
+from concurrent.futures import ProcessPoolExecutor
+
+# Seconds into the video the frame is taken from, matching the old 5 second capture delay
+DEFAULT_CAPTURE_TIME = 5
+
+# Targets less than this many frames ahead are decoded forward instead of seeking
+MAX_FORWARD_FRAMES = 60
+
+def _frame_index(capture, timestamp):
+    """
+    Converts a timestamp in seconds to a frame index using the stream's frame rate.
+    """
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    if fps and fps > 0:
+        return int(round(timestamp * fps))
+    return None
+
+def iter_frames_at(video_path, timestamps, grayscale=False):
+    """
+    Decodes the frames at the given timestamps straight from a media file, without a player or display.
+
+    The file is opened once. Timestamps are visited in increasing order; nearby targets are
+    reached by decoding forward and distant ones by seeking.
+
+    Args:
+        video_path (str): The path of the .mkv, .mp4 or .mpg file.
+        timestamps (iterable): The timestamps to decode, in seconds.
+        grayscale (bool): Whether to convert the frames to grayscale, like VLC's --grayscale.
+
+    Yields:
+        tuple: (timestamp, frame) where frame is a numpy.ndarray, or None if it could not be decoded.
+    """
+    capture = cv2.VideoCapture(video_path)
+    try:
+        if not capture.isOpened():
+            for timestamp in sorted(timestamps):
+                yield timestamp, None
+            return
+
+        next_index = 0
+        for timestamp in sorted(timestamps):
+            target_index = _frame_index(capture, timestamp)
+            if target_index is None:
+                # No usable frame rate, let the backend seek by time
+                capture.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+            elif not 0 <= target_index - next_index <= MAX_FORWARD_FRAMES:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, target_index)
+                next_index = target_index
+            else:
+                # Close enough to decode forward, which is cheaper than a keyframe seek
+                while next_index < target_index and capture.grab():
+                    next_index += 1
+
+            success, frame = capture.read()
+            if not success:
+                yield timestamp, None
+                continue
+            next_index = (target_index if target_index is not None else next_index) + 1
+            if grayscale:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            yield timestamp, frame
+    finally:
+        capture.release()
+
+def probe_video(video_path):
+    """
+    Reads the stream details of a media file that are stored with its golden frame.
+
+    Args:
+        video_path (str): The path of the media file.
+
+    Returns:
+        dict: container (the file extension), codec (FourCC), fps, resolution [width, height]
+              and frame_count. Values the backend cannot report are None.
+    """
+    details = {"container": os.path.splitext(video_path)[1].lstrip(".").lower() or None,
+               "codec": None, "fps": None, "resolution": None, "frame_count": None}
+    capture = cv2.VideoCapture(video_path)
+    try:
+        if not capture.isOpened():
+            return details
+        fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+        if fourcc:
+            details["codec"] = "".join(chr((fourcc >> (8 * index)) & 0xFF) for index in range(4)).strip("\x00 ") or None
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        details["fps"] = fps if fps and fps > 0 else None
+        width, height = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        details["resolution"] = [width, height] if width and height else None
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        details["frame_count"] = frame_count if frame_count > 0 else None
+        return details
+    finally:
+        capture.release()
+
+def read_frame_at(video_path, timestamp, grayscale=False):
+    """
+    Decodes a single frame from a media file.
+
+    Args:
+        video_path (str): The path of the media file.
+        timestamp (float): The timestamp to decode, in seconds.
+        grayscale (bool): Whether to convert the frame to grayscale.
+
+    Returns:
+        numpy.ndarray: The decoded frame.
+        None: If the file could not be opened or the timestamp is past the end.
+    """
+    for _, frame in iter_frames_at(video_path, [timestamp], grayscale):
+        return frame
+    return None
+
+def iter_frames(video_path, grayscale=False, step=1):
+    """
+    Decodes a media file sequentially from the start.
+
+    Args:
+        video_path (str): The path of the media file.
+        grayscale (bool): Whether to convert the frames to grayscale.
+        step (int): Yield every step-th frame; the others are skipped without being converted.
+
+    Yields:
+        tuple: (timestamp, frame) for every decoded frame, timestamp in seconds.
+    """
+    capture = cv2.VideoCapture(video_path)
+    try:
+        index = 0
+        while capture.grab():
+            if index % step == 0:
+                success, frame = capture.retrieve()
+                if not success:
+                    break
+                if grayscale:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                yield capture.get(cv2.CAP_PROP_POS_MSEC) / 1000, frame
+            index += 1
+    finally:
+        capture.release()
+
+def save_frame(video_path, timestamp, output_file, grayscale=True):
+    """
+    Decodes one frame from a media file and saves it as an image, in place of a VLC screen capture.
+
+    Args:
+        video_path (str): The path of the media file.
+        timestamp (float): The timestamp to decode, in seconds.
+        output_file (str): The path to save the image to (e.g., "output.jpg").
+        grayscale (bool): Whether to save the frame in grayscale, like VLC's --grayscale.
+
+    Returns:
+        str: Success message or error message if the frame could not be decoded or saved.
+    """
+    try:
+        if not os.path.exists(video_path):
+            return f"Error: The file '{video_path}' does not exist."
+        frame = read_frame_at(video_path, timestamp, grayscale)
+        if frame is None:
+            return f"Error: Could not decode a frame at {timestamp}s from '{video_path}'."
+        if not cv2.imwrite(output_file, frame):
+            return f"Error: Could not write the frame to {output_file}."
+        return f"Frame saved successfully to {output_file}."
+    except Exception as e:
+        return f"Error decoding frame: {e}"
+
+def _save_frame_job(job):
+    """
+    Runs one save_frame job inside a worker process.
+    """
+    return save_frame(*job)
+
+def save_frames_parallel(jobs, workers=None):
+    """
+    Decodes and saves frames from many media files across a pool of worker processes.
+
+    Jobs are handed to the workers as they are read, so jobs can be a generator that is still
+    scanning for files.
+
+    Args:
+        jobs (iterable): (video_path, timestamp, output_file) or (video_path, timestamp, output_file, grayscale) tuples.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        list: The save_frame message of every job, in job order.
+    """
+    if workers == 1:
+        return [_save_frame_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_save_frame_job, jobs))
@@ -1,27 +1,136 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import time
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(module)s:%(lineno)d] - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        """
+        Formats a record as one JSON object per line, for log processing tools.
+        """
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "created": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class DebugSamplingFilter(logging.Filter):
+    def __init__(self, every):
+        """
+        Keeps one in every `every` DEBUG records of each logging call site.
+
+        The first record of a call site is always kept, so one-off debug messages are never
+        lost; only debug calls inside loops are thinned out. Other levels always pass.
+
+        Args:
+            every (int): Keep one in this many DEBUG records per call site.
+        """
+        super().__init__()
+        self.every = every
+        self.counts = {}
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or self.every <= 1:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        return count % self.every == 0
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        """
+        Enqueues the record unformatted, so the listener thread runs the formatter.
+
+        QueueHandler.prepare formats every record on the calling thread. Only %-style
+        arguments are merged into the message here, as they may change once the call returns.
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
 
 class CustomLogger:
-    def __init__(self, log_file_name):
+    def __init__(self, log_file_name, queued=False, per_run=False, rotation=None, max_bytes=10 * 1024 * 1024,
+                 backup_count=5, when="midnight", json_lines=False, debug_sample_every=1, logger_name=None):
         """
         Initializes the logger with the specified log file name.
 
+        Every log file gets its own named logger, so several CustomLoggers with different
+        files can be used side by side.
+
         Args:
             log_file_name (str): The name of the log file where logs will be written.
+            queued (bool): Whether to hand records to a background writer thread through a
+                           queue, so logging calls never wait on disk I/O. Call stop() to
+                           flush the queue; it is also flushed when the interpreter exits.
+            per_run (bool): Whether to add a timestamp and the process id to the file name,
+                            so every run writes its own log file.
+            rotation (str): None, "size" to rotate at max_bytes or "time" to rotate at when.
+            max_bytes (int): The size at which a "size" rotated log file is rolled over.
+            backup_count (int): The number of rotated log files kept.
+            when (str): The rollover interval of "time" rotation, see TimedRotatingFileHandler.
+            json_lines (bool): Whether to write one JSON object per line instead of text.
+            debug_sample_every (int): Keep one in this many DEBUG records per call site.
+            logger_name (str): The name of the logger, defaults to the log file's base name.
         """
+        if per_run:
+            base, extension = os.path.splitext(log_file_name)
+            log_file_name = f"{base}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}{extension}"
+        self.log_file = log_file_name
+
         # Ensure the directory for the log file exists
         log_dir = os.path.dirname(log_file_name)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
+        if rotation == "size":
+            handler = logging.handlers.RotatingFileHandler(log_file_name, maxBytes=max_bytes, backupCount=backup_count)
+        elif rotation == "time":
+            handler = logging.handlers.TimedRotatingFileHandler(log_file_name, when=when, backupCount=backup_count)
+        elif rotation is None:
+            handler = logging.FileHandler(log_file_name)
+        else:
+            raise ValueError(f"Unknown log rotation: {rotation}")
+        handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+        self.file_handler = handler
+
         # Configure the logger
-        logging.basicConfig(
-            filename=log_file_name,
-            level=logging.DEBUG,
-            format='%(asctime)s - %(name)s - %(levelname)s - [%(module)s:%(lineno)d] - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = logging.getLogger(logger_name or os.path.splitext(os.path.basename(log_file_name))[0])
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        for old_handler in list(self.logger.handlers):
+            self.logger.removeHandler(old_handler)
+            old_handler.close()
+
+        self.listener = None
+        if queued:
+            # The calling thread only enqueues; the listener thread does the formatting and writing
+            log_queue = queue.SimpleQueue()
+            self.handler = DeferredQueueHandler(log_queue)
+            self.listener = logging.handlers.QueueListener(log_queue, handler)
+            self.listener.start()
+            atexit.register(self.stop)
+        else:
+            self.handler = handler
+        if debug_sample_every > 1:
+            # Filter before the queue so dropped records cost no queueing either
+            self.handler.addFilter(DebugSamplingFilter(debug_sample_every))
+        self.logger.addHandler(self.handler)
 
     def get_logger(self):
         """
@@ -30,4 +139,15 @@ class CustomLogger:
         Returns:
             logging.Logger: The configured logger instance.
         """
-        return self.logger
\ No newline at end of file
+        return self.logger
+
+    def stop(self):
+        """
+        Writes any queued records, then detaches and closes the log file.
+        """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            atexit.unregister(self.stop)
+        self.logger.removeHandler(self.handler)
+        self.file_handler.close()
@@ -129,6 +129,38 @@ def generate_system_report(file_path):
     except Exception as e:
         return f"An unexpected error occurred: {e}"
 
+# Supported video file extensions
+VIDEO_EXTENSIONS = {".mkv", ".mp4", ".mpg"}
+
+def iter_video_files(folder_path):
+    """
+    Scans the specified folder for .mkv, .mp4, and .mpg files and yields them as they are found.
+
+    Uses os.scandir, so the caller can start on the first file before the scan is finished.
+    Folders that cannot be read are skipped.
+
+    Args:
+        folder_path (str): The path to the folder to scan.
+
+    Yields:
+        str: The path of every .mkv, .mp4, and .mpg file in the folder and its subdirectories.
+    """
+    pending = [folder_path]
+    while pending:
+        directory = pending.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                        yield entry.path
+        except OSError:
+            continue
+        # Visit the subdirectories in listing order, like os.walk
+        pending.extend(reversed(subdirectories))
+
 def scan_for_video_files(folder_path):
     """
     Scans the specified folder for .mkv, .mp4, and .mpg files and returns them as an array.
@@ -139,18 +171,8 @@ def scan_for_video_files(folder_path):
     Returns:
         list: A list of file paths for all .mkv, .mp4, and .mpg files found in the folder.
     """
-    # Supported video file extensions
-    video_extensions = {".mkv", ".mp4", ".mpg"}
-    video_files = []
-
     try:
-        # Walk through the folder and its subdirectories
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                # Check if the file has a supported video extension
-                if os.path.splitext(file)[1].lower() in video_extensions:
-                    video_files.append(os.path.join(root, file))
-        return video_files
+        return list(iter_video_files(folder_path))
     except Exception as e:
         print(f"An error occurred while scanning for video files: {e}")
         return []
@@ -0,0 +1,160 @@
+import json
+import os
+import struct
+import numpy as np
+
+# First bytes of every golden archive
+MAGIC = b"OTFGOLD1"
+
+# Magic, then the offset and length of the JSON index as little-endian uint64
+HEADER = struct.Struct("<8sQQ")
+
+# Frames start on multiples of this many bytes, so memory-mapped views are aligned
+ALIGNMENT = 4096
+
+# Name of the archive Training.py writes into the golden folder
+DEFAULT_ARCHIVE_NAME = "golden_archive.otfa"
+
+def _aligned(offset):
+    """
+    Rounds an offset up to the next multiple of ALIGNMENT.
+    """
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+class GoldenArchive:
+    def __init__(self, archive_file):
+        """
+        Opens a packed golden archive for reading.
+
+        The archive is one file: a header, the raw uint8 golden frames at aligned offsets and
+        a JSON index mapping every config to its frame's offset, shape and metadata. The
+        file is memory-mapped once, so frame() returns views without reading whole frames.
+
+        Args:
+            archive_file (str): The path of the archive.
+
+        Raises:
+            ValueError: If the file is not a golden archive.
+        """
+        self.archive_file = archive_file
+        with open(archive_file, "rb") as file:
+            magic, index_offset, index_length = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a golden archive: {archive_file}")
+            file.seek(index_offset)
+            self.index = json.loads(file.read(index_length).decode("utf-8"))
+        self._data = np.memmap(archive_file, dtype=np.uint8, mode="r") if self.index["frames"] else None
+
+    def configs(self):
+        """
+        Returns the configs in the archive, in the order they were added.
+        """
+        return list(self.index["frames"])
+
+    def metadata(self, config):
+        """
+        Returns the metadata stored with a config's frame, e.g. codec, container, fps,
+        timestamp and resolution.
+        """
+        entry = self.index["frames"][config]
+        return {key: value for key, value in entry.items() if key not in ("offset", "shape")}
+
+    def frame(self, config):
+        """
+        Returns the golden frame of a config as a read-only memory-mapped array.
+
+        Raises:
+            KeyError: If the config is not in the archive.
+        """
+        entry = self.index["frames"][config]
+        size = int(np.prod(entry["shape"]))
+        return self._data[entry["offset"]:entry["offset"] + size].reshape(entry["shape"])
+
+    def close(self):
+        """
+        Releases the memory map, so the archive file can be replaced.
+        """
+        self._data = None
+
+    def __contains__(self, config):
+        return config in self.index["frames"]
+
+    def __len__(self):
+        return len(self.index["frames"])
+
+class GoldenArchiveWriter:
+    def __init__(self, archive_file, keep_existing=True):
+        """
+        Writes a packed golden archive, see GoldenArchive.
+
+        The archive is written to a temporary file and moves into place on close(), so
+        readers never see a partial archive.
+
+        Args:
+            archive_file (str): The path of the archive.
+            keep_existing (bool): Whether configs of an existing archive that are not added
+                                  again are copied into the new one.
+        """
+        archive_dir = os.path.dirname(archive_file)
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        self.archive_file = archive_file
+        self.keep_existing = keep_existing
+        self.temp_file = f"{archive_file}.{os.getpid()}.tmp"
+        self.file = open(self.temp_file, "wb")
+        self.file.write(HEADER.pack(MAGIC, 0, 0))
+        self.frames = {}
+
+    def add(self, config, frame, **metadata):
+        """
+        Adds the golden frame of a config, replacing one added before.
+
+        Args:
+            config (str): The config name, e.g. "MKV_H.264_60FPS".
+            frame (numpy.ndarray): The lossless frame, grayscale or BGR.
+            metadata: JSON serializable details such as codec, container, fps, timestamp and resolution.
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        offset = _aligned(self.file.tell())
+        self.file.seek(offset)
+        self.file.write(frame.tobytes())
+        entry = dict(metadata)
+        entry.setdefault("resolution", [frame.shape[1], frame.shape[0]])
+        entry.update(offset=offset, shape=list(frame.shape))
+        self.frames[config] = entry
+
+    def close(self):
+        """
+        Writes the index and moves the archive into place.
+        """
+        if self.keep_existing and os.path.exists(self.archive_file):
+            try:
+                existing = GoldenArchive(self.archive_file)
+            except (OSError, ValueError):
+                existing = None  # Damaged archive, only the new frames are kept
+            if existing is not None:
+                for config in existing.configs():
+                    if config not in self.frames:
+                        self.add(config, existing.frame(config), **existing.metadata(config))
+                existing.close()
+
+        index = json.dumps({"version": 1, "frames": self.frames}).encode("utf-8")
+        self.file.seek(0, os.SEEK_END)
+        index_offset = self.file.tell()
+        self.file.write(index)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, index_offset, len(index)))
+        self.file.close()
+        os.replace(self.temp_file, self.archive_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave any existing archive untouched
+            self.file.close()
+            os.remove(self.temp_file)
+        return False
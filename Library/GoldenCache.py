@@ -0,0 +1,96 @@
+import hashlib
+import os
+import numpy as np
+from Library.ImageCompare import DEFAULT_SIZE, load_grayscale
+
+class GoldenCache:
+    def __init__(self, cache_folder, size=DEFAULT_SIZE):
+        """
+        Initializes a cache of preprocessed golden images stored as memory-mapped .npy files.
+
+        Each golden image is stored already decoded, resized and converted to grayscale.
+        Entries are keyed by the image path plus its size and modification time, so an
+        entry is rebuilt automatically when the golden image changes.
+
+        Args:
+            cache_folder (str): The folder where the cache entries are stored.
+            size (tuple): The (width, height) the golden images are resized to.
+        """
+        self.cache_folder = cache_folder
+        self.size = tuple(size)
+        os.makedirs(cache_folder, exist_ok=True)
+
+    def _entry_prefix(self, image_path):
+        """
+        Returns the part of an entry name that identifies the image path and resize size.
+        """
+        key = f"{os.path.normcase(os.path.abspath(image_path))}|{self.size[0]}x{self.size[1]}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, image_path, stat):
+        """
+        Returns the path of the cache entry for a specific version of an image.
+        """
+        return os.path.join(self.cache_folder, f"{self._entry_prefix(image_path)}_{stat.st_size}_{stat.st_mtime_ns}.npy")
+
+    def _remove_stale_entries(self, image_path, keep):
+        """
+        Removes entries left behind by older versions of an image.
+        """
+        prefix = self._entry_prefix(image_path) + "_"
+        for name in os.listdir(self.cache_folder):
+            path = os.path.join(self.cache_folder, name)
+            if name.startswith(prefix) and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Still mapped by another process, it is retried on the next rebuild
+
+    def get(self, image_path):
+        """
+        Returns the preprocessed golden image, building the cache entry if needed.
+
+        Args:
+            image_path (str): The path of the golden image.
+
+        Returns:
+            numpy.memmap: A read-only height x width uint8 grayscale image.
+            None: If the golden image could not be loaded.
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+
+        entry_path = self._entry_path(image_path, stat)
+        if os.path.exists(entry_path):
+            try:
+                return np.load(entry_path, mmap_mode="r")
+            except (OSError, ValueError):
+                pass  # Damaged entry, rebuild it below
+
+        image = load_grayscale(image_path, self.size)
+        if image is None:
+            return None
+
+        # Write to a temporary file first so other processes never map a partial entry
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.save(file, image)
+        try:
+            os.replace(temp_path, entry_path)
+        except OSError:
+            os.remove(temp_path)  # Another process already published the entry
+        self._remove_stale_entries(image_path, keep=entry_path)
+        return np.load(entry_path, mmap_mode="r")
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        for name in os.listdir(self.cache_folder):
+            if name.endswith((".npy", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.cache_folder, name))
+                except OSError:
+                    pass
@@ -0,0 +1,241 @@
+import os
+import numpy as np
+from Library.FrameSource import DEFAULT_CAPTURE_TIME, iter_frames_at
+from Library.ImageCompare import DEFAULT_SIZE, grade_batch, load_grayscale, new_result, preprocess_image
+from Library.Instrumentation import span
+
+# A pixel is an outlier when it is more than this many standard deviations from the model mean
+DEFAULT_Z_THRESHOLD = 3.0
+
+# Smallest standard deviation used, in gray levels, so pixels that never changed during
+# training still tolerate capture and compression noise
+DEFAULT_MIN_STD = 4.0
+
+# Frames sampled per video, and the seconds around the capture time they are spread over
+DEFAULT_SAMPLE_COUNT = 30
+DEFAULT_SAMPLE_WINDOW = 2.0
+
+# Folder under the golden folder the models are stored in, one <config>.npz per video
+DEFAULT_MODEL_FOLDER = "Models"
+
+class GoldenModel:
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Initializes an empty per-pixel statistical model of a video's golden frames.
+
+        Frames are added one at a time with Welford's streaming update, so the memory used
+        is two float64 planes whatever the number of frames.
+
+        Args:
+            size (tuple): The (width, height) frames are resized to, as for grading.
+        """
+        width, height = size
+        self.size = tuple(size)
+        self.count = 0
+        self.mean = np.zeros((height, width), dtype=np.float64)
+        self.m2 = np.zeros((height, width), dtype=np.float64)
+
+    def update(self, frame):
+        """
+        Adds a frame to the model.
+
+        Args:
+            frame (numpy.ndarray): A BGR or grayscale frame of any size.
+        """
+        gray = preprocess_image(frame, self.size)
+        self.count += 1
+        delta = gray - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (gray - self.mean)
+
+    def merge(self, other):
+        """
+        Adds the frames of another model of the same size, e.g. one built in another process.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * (other.count / count)
+        self.m2 += other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+
+    @property
+    def std(self):
+        """
+        The per-pixel sample standard deviation, zero until two frames were added.
+        """
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+    def score(self, frame, z_threshold=DEFAULT_Z_THRESHOLD, min_std=DEFAULT_MIN_STD):
+        """
+        Scores a frame by how many of its pixels fall outside the model.
+
+        Args:
+            frame (numpy.ndarray): A BGR or grayscale frame of any size.
+            z_threshold (float): The normalized deviation above which a pixel is an outlier.
+            min_std (float): The smallest standard deviation used, in gray levels.
+
+        Returns:
+            float: The percentage of outlier pixels (0-100).
+        """
+        return self.score_gray(preprocess_image(frame, self.size), z_threshold, min_std)
+
+    def score_gray(self, gray, z_threshold=DEFAULT_Z_THRESHOLD, min_std=DEFAULT_MIN_STD):
+        """
+        Scores a frame that is already resized to the model size and grayscale, see score.
+
+        Args:
+            gray (numpy.ndarray): A height x width grayscale frame, e.g. from ImageCompare.load_grayscale.
+            z_threshold (float): The normalized deviation above which a pixel is an outlier.
+            min_std (float): The smallest standard deviation used, in gray levels.
+
+        Returns:
+            float: The percentage of outlier pixels (0-100).
+        """
+        z_scores = np.abs(gray - self.mean) / np.maximum(self.std, min_std)
+        return float(np.count_nonzero(z_scores > z_threshold) / z_scores.size * 100)
+
+    def save(self, model_file):
+        """
+        Saves the model as a .npz file.
+        """
+        model_dir = os.path.dirname(model_file)
+        if model_dir:
+            os.makedirs(model_dir, exist_ok=True)
+        np.savez(model_file, count=self.count, mean=self.mean.astype(np.float32), m2=self.m2.astype(np.float32))
+
+    @classmethod
+    def load(cls, model_file):
+        """
+        Loads a model saved with save().
+        """
+        with np.load(model_file) as data:
+            height, width = data["mean"].shape
+            model = cls((width, height))
+            model.count = int(data["count"])
+            model.mean = data["mean"].astype(np.float64)
+            model.m2 = data["m2"].astype(np.float64)
+        return model
+
+def build_golden_model(video_path, samples=DEFAULT_SAMPLE_COUNT, center_time=DEFAULT_CAPTURE_TIME,
+                       window=DEFAULT_SAMPLE_WINDOW, size=DEFAULT_SIZE):
+    """
+    Builds the model of a video from frames decoded around its capture time.
+
+    The frames are spread evenly over window seconds centred on center_time, which covers
+    the timing jitter of a window capture.
+
+    Args:
+        video_path (str): The path of the media file.
+        samples (int): The number of frames to decode.
+        center_time (float): The capture time in seconds.
+        window (float): The number of seconds the samples are spread over.
+        size (tuple): The (width, height) frames are resized to.
+
+    Returns:
+        GoldenModel: The model, with count 0 if no frame could be decoded.
+    """
+    start = max(0.0, center_time - window / 2)
+    timestamps = np.linspace(start, start + window, samples) if samples > 1 else [center_time]
+    model = GoldenModel(size)
+    for _, frame in iter_frames_at(video_path, [float(timestamp) for timestamp in timestamps], grayscale=True):
+        if frame is not None:
+            with span("model.update"):
+                model.update(frame)
+    return model
+
+def model_path(model_folder, config):
+    """
+    Returns the path of the model file of a config.
+    """
+    return os.path.join(model_folder, f"{config}.npz")
+
+def grade_frame_with_model(frame, model_file, golden_folder, media_folder, golden_file, comparison_file,
+                           percentage_threshold, config, z_threshold=DEFAULT_Z_THRESHOLD, min_std=DEFAULT_MIN_STD):
+    """
+    Grades an in-memory capture against the statistical golden model of its video.
+
+    Args:
+        frame (numpy.ndarray): The captured BGR or grayscale image, or None if the capture failed.
+        model_file (str): The .npz model of the video, see model_path.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder the screenshot would be archived to.
+        golden_file (str): The name of the golden image.
+        comparison_file (str): The name the screenshot is reported and archived under.
+        percentage_threshold (float): The percentage of outlier pixels at which the capture fails.
+        config (str): The configuration name.
+        z_threshold (float): The normalized deviation above which a pixel is an outlier.
+        min_std (float): The smallest standard deviation used, in gray levels.
+
+    Returns:
+        dict: A result as returned by grade_with_models for a model-graded pair.
+    """
+    result = new_result(golden_folder, media_folder, golden_file, comparison_file, percentage_threshold, config)
+    result["golden"] = model_file
+    result["graded_by"] = "model"
+    if frame is None:
+        result["error"] = "No frame was captured."
+        return result
+    model = GoldenModel.load(model_file)
+    with span("image.preprocess"):
+        comparison = preprocess_image(frame, model.size)
+    with span("grade.model"):
+        result["score"] = model.score_gray(comparison, z_threshold, min_std)
+    result["passed"] = result["score"] < result["threshold"]
+    return result
+
+def grade_with_models(measurements, model_folder, golden_folder, media_folder, z_threshold=DEFAULT_Z_THRESHOLD,
+                      min_std=DEFAULT_MIN_STD, size=DEFAULT_SIZE, **grade_options):
+    """
+    Grades a measurements table against statistical golden models where they exist.
+
+    The score of a model-graded pair is the percentage of screenshot pixels more than
+    z_threshold standard deviations from the model mean, compared to the measurement's
+    threshold. Pairs without a model are graded by grade_batch against their golden image,
+    and so are pairs whose measurement chose a metric (see ImageCompare.metric_stages): the
+    share of outlier pixels is not a score of any metric, so the choice is honored instead.
+
+    Args:
+        measurements (list): (golden_file, comparison_file, percentage_threshold, config) tuples,
+                             with an optional metric choice as a fifth item.
+        model_folder (str): The folder holding the <config>.npz models.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder holding the comparison images.
+        z_threshold (float): The normalized deviation above which a pixel is an outlier.
+        min_std (float): The smallest standard deviation used, in gray levels.
+        size (tuple): The (width, height) images are resized to.
+        grade_options: Further grade_batch options such as golden_cache.
+
+    Returns:
+        list: One dict per measurement, in order, as returned by grade_batch. Model-graded
+              results also have graded_by set to "model".
+    """
+    results = [None] * len(measurements)
+    unmodelled = []
+    for index, measurement in enumerate(measurements):
+        config = measurement[3]
+        model_file = model_path(model_folder, config)
+        if len(measurement) > 4 or not os.path.exists(model_file):
+            unmodelled.append((index, measurement))
+            continue
+        result = new_result(golden_folder, media_folder, *measurement)
+        result["golden"] = model_file
+        result["graded_by"] = "model"
+        model = GoldenModel.load(model_file)
+        # Loaded straight at the model size, so the score does not resize and convert it again
+        comparison = load_grayscale(result["comparison"], model.size)
+        if comparison is None:
+            result["error"] = f"Could not load the comparison image: {result['comparison']}"
+        else:
+            with span("grade.model"):
+                result["score"] = model.score_gray(comparison, z_threshold, min_std)
+            result["passed"] = result["score"] < result["threshold"]
+        results[index] = result
+
+    graded = grade_batch([measurement for _, measurement in unmodelled], golden_folder, media_folder, size=size, **grade_options)
+    for (index, _), result in zip(unmodelled, graded):
+        results[index] = result
+    return results
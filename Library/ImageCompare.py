@@ -1,77 +1,936 @@
 import cv2
+import math
 import numpy as np
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def grade(reference_image_path, comparison_image_path, percentage_threshold):
+if __name__ == "__main__":
+    # Allow running as "python Library/ImageCompare.py", where the Library package is not on the path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.Instrumentation import span
+
+# Every image is resized to this (width, height) before it is compared.
+DEFAULT_SIZE = (800, 600)
+
+# Number of measurements that are stacked and diffed together by grade_batch.
+DEFAULT_CHUNK_SIZE = 64
+
+# Number of measurements sent to a worker process at a time by iter_grade_parallel.
+DEFAULT_WORKER_CHUNK_SIZE = 4
+
+# Percentage difference at which a screenshot fails against its golden image.
+DEFAULT_THRESHOLD = 5
+
+# Version of the grading algorithm. Bump it whenever a change alters the scores, so that
+# stored results (see ResultCache) are discarded instead of reused.
+ALGORITHM_VERSION = "absdiff-gray-1"
+
+# Number of 2x2 pyramid levels the early-exit mode looks at before the full resolution.
+DEFAULT_PYRAMID_LEVELS = 3
+
+# Number of random full-resolution pixels the early-exit mode samples to decide clear passes.
+DEFAULT_SAMPLE_COUNT = 16384
+
+# Probability that a decision taken from the pixel sample matches the full-resolution result.
+DEFAULT_CONFIDENCE = 0.999
+
+# Decided level of a pair the early-exit mode settled from the pixel sample, as 0 is the full resolution.
+SAMPLED_LEVEL = -1
+
+# Number of gray level bins of the histogram metric.
+HISTOGRAM_BINS = 64
+
+# PSNR reported for identical images, whose mean squared error is 0.
+MAX_PSNR = 100.0
+
+# Gaussian window of the SSIM metric, and the number of pairs blurred together as channels of one image.
+SSIM_WINDOW = (11, 11)
+SSIM_SIGMA = 1.5
+SSIM_GROUP_SIZE = 8
+
+# Array of golden image files, percentage thresholds, and configurations
+MEASUREMENTS = [
+    ("MKV_H.264_29.97FPS_golden.jpg", "MKV_H.264_29.97FPS.mkv_screenshot.jpg", 5, "MKV_H.264_29.97FPS"),
+    ("MKV_H.264_60FPS_golden.jpg", "MKV_H.264_60FPS.mkv_screenshot.jpg", 5, "MKV_H.264_60FPS"),
+    ("MKV_HEVc_29.97FPs_golden.jpg", "MKV_HEVc_29.97FPs.mkv_screenshot.jpg", 5, "MKV_HEVc_29.97FPs"),
+    ("MKV_HEVC_60FPS_golden.jpg", "MKV_HEVC_60FPS.mkv_screenshot.jpg", 5, "MKV_HEVC_60FPS"),
+    ("MP4_H.26429.97FPS_golden.jpg", "MP4_H.26429.97FPS.mp4_screenshot.jpg", 5, "MP4_H.26429.97FPS"),
+    ("MP4_H.264_120FPS_golden.jpg", "MP4_H.264_120FPS.mp4_screenshot.jpg", 5, "MP4_H.264_120FPS"),
+    ("MP4_H.264_240FPS_golden.jpg", "MP4_H.264_240FPS.mp4_screenshot.jpg", 5, "MP4_H.264_240FPS"),
+    ("MP4_H.264_60FPS_golden.jpg", "MP4_H.264_60FPS.mp4_screenshot.jpg", 5, "MP4_H.264_60FPS"),
+    ("MP4_HEVC29.97FPS_golden.jpg", "MP4_HEVC29.97FPS.mp4_screenshot.jpg", 5, "MP4_HEVC29.97FPS"),
+    ("MP4_HEVC_204FPS_golden.jpg", "MP4_HEVC_204FPS.mp4_screenshot.jpg", 5, "MP4_HEVC_204FPS"),
+    ("MP4_HEVC_60FPS_golden.jpg", "MP4_HEVC_60FPS.mp4_screenshot.jpg", 5, "MP4_HEVC_60FPS"),
+    ("MPEG-2_MPEG-2_60FPS_golden.jpg", "MPEG-2_MPEG-2_60FPS.mpg_screenshot.jpg", 5, "MPEG-2_MPEG-2_60FPS"),
+    ("MPEG-2_MPEG_29.97FPS_golden.jpg", "MPEG-2_MPEG_29.97FPS.mpg_screenshot.jpg", 5, "MPEG-2_MPEG_29.97FPS")
+]
+
+def preprocess_image(image, size=DEFAULT_SIZE):
+    """
+    Resizes an image to a fixed size and converts it to grayscale.
+
+    Args:
+        image (numpy.ndarray): A BGR or grayscale image as returned by cv2.imread.
+        size (tuple): The (width, height) to resize the image to.
+
+    Returns:
+        numpy.ndarray: A height x width uint8 grayscale image.
+    """
+    resized = cv2.resize(image, size)
+    if resized.ndim == 2:
+        return resized
+    return cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+
+def load_grayscale(image_path, size=DEFAULT_SIZE):
+    """
+    Loads an image from disk, resizes it and converts it to grayscale.
+
+    Args:
+        image_path (str): The path of the image to load.
+        size (tuple): The (width, height) to resize the image to.
+
+    Returns:
+        numpy.ndarray: A height x width uint8 grayscale image.
+        None: If the image could not be loaded.
+    """
+    with span("image.decode"):
+        image = cv2.imread(image_path)
+    if image is None:
+        return None
+    with span("image.preprocess"):
+        return preprocess_image(image, size)
+
+def percentage_differences(reference_stack, comparison_stack):
+    """
+    Calculates the percentage difference of every image pair in two stacks in one pass.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+
+    Returns:
+        numpy.ndarray: N percentage differences (0-100).
+    """
+    count = reference_stack.shape[0]
+    pixels = int(np.prod(reference_stack.shape[1:]))
+    # max - min is the absolute difference without leaving uint8
+    difference = np.maximum(reference_stack, comparison_stack) - np.minimum(reference_stack, comparison_stack)
+    difference_sum = difference.reshape(count, pixels).sum(axis=1, dtype=np.uint64)
+    max_difference = max(pixels * 255, 1)
+    return difference_sum / max_difference * 100
+
+def histogram_distances(reference_stack, comparison_stack, bins=HISTOGRAM_BINS):
+    """
+    Calculates the histogram distance of every image pair in two stacks.
+
+    The distance is the share of pixels that would have to change gray level bin to turn
+    one histogram into the other. It ignores where the pixels are, so it is cheap and
+    tolerant of small shifts, but blind to rearranged content.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        bins (int): The number of gray level bins.
+
+    Returns:
+        numpy.ndarray: N percentage distances (0-100).
+    """
+    pixels = max(int(np.prod(reference_stack.shape[1:])), 1)
+    histograms = [np.stack([cv2.calcHist([image], [0], None, [bins], [0, 256]).ravel() for image in stack])
+                  if len(stack) else np.zeros((0, bins)) for stack in (reference_stack, comparison_stack)]
+    return np.abs(histograms[0] - histograms[1]).sum(axis=1) / (2 * pixels) * 100
+
+def psnr_values(reference_stack, comparison_stack):
+    """
+    Calculates the peak signal-to-noise ratio of every image pair in two stacks in one pass.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+
+    Returns:
+        numpy.ndarray: N ratios in dB, MAX_PSNR for identical images.
+    """
+    count = reference_stack.shape[0]
+    pixels = max(int(np.prod(reference_stack.shape[1:])), 1)
+    difference = np.maximum(reference_stack, comparison_stack) - np.minimum(reference_stack, comparison_stack)
+    squared_sum = np.square(difference, dtype=np.uint16).reshape(count, -1).sum(axis=1, dtype=np.uint64)
+    mean_squared = squared_sum / pixels
+    with np.errstate(divide="ignore"):
+        return np.minimum(10 * np.log10(255 ** 2 / mean_squared), MAX_PSNR)
+
+def ssim_values(reference_stack, comparison_stack, group_size=SSIM_GROUP_SIZE):
+    """
+    Calculates the mean structural similarity of every image pair in two stacks.
+
+    The pairs are blurred in groups, each group stacked as the channels of one image, so a
+    single cv2.GaussianBlur call filters every pair of the group. The math runs in float32,
+    which is twice as fast as float64 and good to about 1e-3.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        group_size (int): The number of pairs blurred together.
+
+    Returns:
+        numpy.ndarray: N similarities, 1 for identical images.
+    """
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    blur = lambda image: cv2.GaussianBlur(image, SSIM_WINDOW, SSIM_SIGMA)
+    similarities = np.empty(reference_stack.shape[0], dtype=np.float64)
+    for start in range(0, len(similarities), group_size):
+        group = slice(start, start + group_size)
+        # H x W x group images, the channels being the pairs of the group
+        x = np.ascontiguousarray(reference_stack[group].transpose(1, 2, 0), dtype=np.float32)
+        y = np.ascontiguousarray(comparison_stack[group].transpose(1, 2, 0), dtype=np.float32)
+        mean_x, mean_y = blur(x), blur(y)
+        variance_x = blur(x * x) - mean_x * mean_x
+        variance_y = blur(y * y) - mean_y * mean_y
+        covariance = blur(x * y) - mean_x * mean_y
+        ssim_map = ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) / \
+                   ((mean_x * mean_x + mean_y * mean_y + c1) * (variance_x + variance_y + c2))
+        count = x.shape[2]
+        similarities[group] = ssim_map.reshape(-1, count).mean(axis=0)
+    return similarities
+
+# Comparison metrics by name. cost is the time relative to the mean absolute difference and
+# higher_is_better tells whether a pair passes above (True) or below (False) its threshold.
+METRICS = {}
+
+def register_metric(name, function, cost, higher_is_better=False, score_format="{:.2f}%"):
+    """
+    Adds a comparison metric that measurements can choose.
+
+    Args:
+        name (str): The name measurements refer to.
+        function (callable): function(reference_stack, comparison_stack) returns one score per pair
+                             of two N x H x W uint8 grayscale stacks.
+        cost (float): The time the metric takes relative to the mean absolute difference.
+        higher_is_better (bool): Whether a pair passes at or above its threshold instead of below it.
+        score_format (str): How reports print a score.
+    """
+    METRICS[name] = {"function": function, "cost": cost, "higher_is_better": higher_is_better,
+                     "score_format": score_format}
+
+register_metric("absdiff", percentage_differences, 1)
+register_metric("histogram", histogram_distances, 1)
+register_metric("psnr", psnr_values, 1.2, higher_is_better=True, score_format="{:.2f} dB")
+register_metric("ssim", ssim_values, 35, higher_is_better=True, score_format="{:.4f}")
+
+def metric_stages(metric):
+    """
+    Splits the metric choice of a measurement into its stages, in the order given.
+
+    A choice is either a metric name, or a chain whose last stage is a metric name and whose
+    earlier stages are (name, pass_limit, fail_limit) tuples. A pair that passes pass_limit
+    or fails fail_limit is decided by that stage; scores in between are inconclusive and go
+    on to the next stage, and the last one decides with the measurement's threshold. For
+    example [("histogram", 1, 20), "ssim"] only runs SSIM on pairs whose histograms differ by
+    1-20%. A chain must not put a stage before a cheaper one, which would spend the expensive
+    metric on pairs the cheap one could have decided; stages are never reordered.
+
+    Args:
+        metric (str or list): The metric choice.
+
+    Returns:
+        list: (name, pass_limit, fail_limit) tuples, the limits of the last stage being None.
+
+    Raises:
+        ValueError: If a metric is unknown, a stage lacks its limits or the chain is not ordered by cost.
+    """
+    stages = [metric] if isinstance(metric, str) else list(metric)
+    if not stages or not isinstance(stages[-1], str):
+        raise ValueError(f"The last stage of a metric chain must be a metric name: {metric}")
+    banded = []
+    for stage in stages[:-1]:
+        if isinstance(stage, str) or len(stage) != 3:
+            raise ValueError(f"Metric chain stages before the last need (name, pass_limit, fail_limit): {stage}")
+        banded.append(tuple(stage))
+    stages = banded + [(stages[-1], None, None)]
+    for name, _, _ in stages:
+        if name not in METRICS:
+            raise ValueError(f"Unknown comparison metric: {name}")
+    for (name, _, _), (next_name, _, _) in zip(stages, stages[1:]):
+        if METRICS[name]["cost"] > METRICS[next_name]["cost"]:
+            raise ValueError(f"Metric chain runs {name} before the cheaper {next_name}: {metric}")
+    return stages
+
+def _meets(name, scores, limits):
+    """
+    Returns where scores pass limits in the direction of a metric.
+    """
+    if METRICS[name]["higher_is_better"]:
+        return scores >= limits
+    return scores < limits
+
+def metric_grades(reference_stack, comparison_stack, thresholds, metric):
+    """
+    Grades every image pair in two stacks with a metric or a chain of metrics.
+
+    Every stage scores all pairs it gets in one call, and only the inconclusive pairs go on
+    to the next stage, so the expensive metrics of a chain run where they are needed.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        thresholds (float or list): The threshold of every pair, in units of the last stage.
+        metric (str or list): The metric choice, see metric_stages.
+
+    Returns:
+        tuple: (scores, passed, decided_by, costs) arrays of length N. decided_by holds the
+               name of the metric whose score decided each pair, and costs the summed
+               relative cost of the stages each pair went through.
+    """
+    count = reference_stack.shape[0]
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), (count,))
+    scores = np.zeros(count, dtype=np.float64)
+    passed = np.zeros(count, dtype=bool)
+    decided_by = np.empty(count, dtype=object)
+    costs = np.zeros(count, dtype=np.float64)
+    undecided = np.ones(count, dtype=bool)
+
+    for name, pass_limit, fail_limit in metric_stages(metric):
+        rows = np.flatnonzero(undecided)
+        if not rows.size:
+            break
+        with span(f"grade.{name}", pairs=len(rows)):
+            if rows.size == count:
+                stage_scores = METRICS[name]["function"](reference_stack, comparison_stack)
+            else:
+                stage_scores = METRICS[name]["function"](reference_stack[rows], comparison_stack[rows])
+        costs[rows] += METRICS[name]["cost"]
+        if pass_limit is None:
+            stage_passed = _meets(name, stage_scores, thresholds[rows])
+            settled = np.ones(len(rows), dtype=bool)
+        else:
+            stage_passed = _meets(name, stage_scores, pass_limit)
+            settled = stage_passed | ~_meets(name, stage_scores, fail_limit)
+        decided = rows[settled]
+        scores[decided] = stage_scores[settled]
+        passed[decided] = stage_passed[settled]
+        decided_by[decided] = name
+        undecided[decided] = False
+    return scores, passed, decided_by, costs
+
+def _difference_pyramid(reference_stack, comparison_stack, levels):
+    """
+    Returns the summed signed differences of every pair over the blocks of every pyramid level.
+
+    Level 1 sums 2x2 blocks of the full resolution and every further level halves the one
+    before the same way, vectorized over the whole stack, so each level costs a quarter of
+    the one before. The sums are integers and exact. The absolute sum of a block's
+    differences is never larger than the sum of its absolute differences, and pixels cut
+    off at odd edges only add to the full-resolution score, so the absolute sums of every
+    level, over 255 per pixel, are a lower bound of the percentage difference.
+
+    Returns:
+        list: levels arrays, entry L - 1 holding the N x H/2**L x W/2**L sums of level L.
+    """
+    height, width = reference_stack.shape[1] // 2 * 2, reference_stack.shape[2] // 2 * 2
+    # Row pairs of each stack are added before subtracting, the one pass over the full resolution
+    rows = (np.add(reference_stack[:, 0:height:2], reference_stack[:, 1:height:2], dtype=np.int16)
+            - np.add(comparison_stack[:, 0:height:2], comparison_stack[:, 1:height:2], dtype=np.int16))
+    pyramid = [rows[:, :, 0:width:2] + rows[:, :, 1:width:2]]
+    for level in range(2, levels + 1):
+        sums = pyramid[-1]
+        if 255 * 4 ** level > np.iinfo(sums.dtype).max:
+            sums = sums.astype(np.int32)  # int16 holds the sums of blocks up to 8x8
+        height, width = sums.shape[1] // 2 * 2, sums.shape[2] // 2 * 2
+        rows = sums[:, 0:height:2] + sums[:, 1:height:2]
+        pyramid.append(rows[:, :, 0:width:2] + rows[:, :, 1:width:2])
+    return pyramid
+
+def coarse_to_fine_differences(reference_stack, comparison_stack, thresholds, levels=DEFAULT_PYRAMID_LEVELS,
+                               samples=DEFAULT_SAMPLE_COUNT, confidence=DEFAULT_CONFIDENCE, seed=0):
+    """
+    Grades every image pair in two stacks, stopping at the coarsest resolution that settles it.
+
+    The score of a pyramid level is a lower bound of the full-resolution score, so a pair
+    whose coarse score already reaches its threshold fails for certain. The pyramid of all
+    pairs is built in one vectorized pass, see _difference_pyramid. Levels are walked
+    from the coarsest to the finest, only for the pairs still open. Right after the coarsest
+    level the open pairs are scored on a random sample of full-resolution pixels, and
+    Hoeffding's bound settles those clearly below or above their threshold with the given
+    confidence. Only the remaining borderline pairs get the exact full-resolution diff.
+
+    Args:
+        reference_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        comparison_stack (numpy.ndarray): N x H x W uint8 grayscale images.
+        thresholds (float or list): The percentage threshold of every pair.
+        levels (int): The number of pyramid levels, level L being 2**L times smaller.
+        samples (int): The number of sampled pixels, 0 skips the sampling step.
+        confidence (float): The probability that a sampled decision is right.
+        seed (int): Seed of the pixel sample, so reruns take the same decisions.
+
+    Returns:
+        tuple: (scores, decided_levels, exact) arrays of length N. decided_levels holds the
+               pyramid level that decided each pair, 0 being the full resolution and
+               SAMPLED_LEVEL the pixel sample. exact is False where the score is a lower
+               bound or a sampled estimate.
+    """
+    count = reference_stack.shape[0]
+    pixels = int(np.prod(reference_stack.shape[1:]))
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), (count,))
+    scores = np.zeros(count, dtype=np.float64)
+    decided_levels = np.zeros(count, dtype=np.int64)
+    exact = np.zeros(count, dtype=bool)
+    undecided = np.ones(count, dtype=bool)
+    pyramid = _difference_pyramid(reference_stack, comparison_stack, levels) if levels else []
+    max_difference = max(pixels * 255, 1)
+
+    for level in range(levels, 0, -1):
+        rows = np.flatnonzero(undecided)
+        if not rows.size:
+            break
+        block_sums = np.abs(pyramid[level - 1][rows]).reshape(rows.size, -1).sum(axis=1, dtype=np.int64)
+        lower_bounds = block_sums / max_difference * 100
+        certain_fail = lower_bounds >= thresholds[rows]
+        scores[rows[certain_fail]] = lower_bounds[certain_fail]
+        decided_levels[rows[certain_fail]] = level
+        undecided[rows[certain_fail]] = False
+
+        rows = np.flatnonzero(undecided)
+        if level == levels and samples and rows.size:
+            # Every sampled pixel difference lies in [0, 255], which is all Hoeffding's bound needs
+            positions = np.random.default_rng(seed).integers(0, pixels, samples)
+            reference_samples = reference_stack.reshape(count, pixels)[np.ix_(rows, positions)].astype(np.int16)
+            comparison_samples = comparison_stack.reshape(count, pixels)[np.ix_(rows, positions)].astype(np.int16)
+            estimates = np.abs(reference_samples - comparison_samples).mean(axis=1) / 255 * 100
+            margin = 100 * math.sqrt(math.log(2 / (1 - confidence)) / (2 * samples))
+            settled = (estimates + margin < thresholds[rows]) | (estimates - margin >= thresholds[rows])
+            scores[rows[settled]] = estimates[settled]
+            decided_levels[rows[settled]] = SAMPLED_LEVEL
+            undecided[rows[settled]] = False
+
+    rows = np.flatnonzero(undecided)
+    if rows.size:
+        scores[rows] = percentage_differences(reference_stack[rows], comparison_stack[rows])
+        exact[rows] = True
+    return scores, decided_levels, exact
+
+def new_result(golden_folder, media_folder, golden_file, comparison_file, percentage_threshold, config, metric=None):
+    """
+    Creates the result record of a measurement before it is graded.
+
+    Args:
+        metric (str or list): The optional metric choice of the measurement, see metric_stages.
+
+    Returns:
+        dict: The keys config, golden, comparison, threshold, score, passed and error, plus
+              metric_choice if the measurement chose a metric.
+    """
+    result = {
+        "config": config,
+        "golden": os.path.join(golden_folder, golden_file),
+        "comparison": os.path.join(media_folder, comparison_file),
+        "threshold": percentage_threshold,
+        "score": None,
+        "passed": False,
+        "error": None,
+    }
+    if metric is not None:
+        result["metric_choice"] = metric
+    return result
+
+def format_result(result):
+    """
+    Formats a grading result the same way grade() reports it.
+
+    Args:
+        result (dict): A result as returned by grade_batch.
+
+    Returns:
+        str: A single line describing the result.
+    """
+    golden = os.path.basename(result["golden"])
+    comparison = os.path.basename(result["comparison"])
+    if result["error"]:
+        return f"Error grading '{golden}' and '{comparison}': {result['error']}"
+    if result.get("metric") and result["metric"] != "absdiff":
+        # Scored by a metric chosen by the measurement, in that metric's units
+        score = METRICS[result["metric"]]["score_format"].format(result["score"])
+        if result["passed"]:
+            return f"Limit passed for '{golden}' and '{comparison}' with {result['metric']} {score}."
+        return f"Limit EXCEEDED '{golden}' and '{comparison}': {result['metric']} {score}"
+    note = ""
+    if result.get("graded_by") == "model":
+        # Scored against a statistical golden model, the score is the share of outlier pixels
+        note = " (outside the golden model)"
+    elif result.get("exact") is False:
+        # Decided early by the coarse-to-fine mode, the score is a bound or an estimate
+        if result["decided_level"] == SAMPLED_LEVEL:
+            note = " (estimated from a pixel sample)"
+        else:
+            note = f" (decided at pyramid level {result['decided_level']})"
+    if result["passed"]:
+        return f"Limit passed for '{golden}' and '{comparison}' with {result['score']:.2f}% difference{note}."
+    return f"Limit EXCEEDED '{golden}' and '{comparison}': {result['score']:.2f}%{note}"
+
+def grade(reference_image_path, comparison_image_path, percentage_threshold, early_exit=False):
     """
     Compares a golden image with a specific image and calculates the percentage difference.
     Prints results if the difference exceeds the threshold.
+
+    With early_exit the comparison stops at the coarsest level that settles it, see
+    coarse_to_fine_differences, and the returned difference may be a bound or an estimate.
     """
-    # Load the reference image
-    reference_image = cv2.imread(reference_image_path)
-    if reference_image is None:
+    # Load, resize and convert the reference image
+    reference_gray = load_grayscale(reference_image_path)
+    if reference_gray is None:
         print(f"Error: Could not load the reference image: {reference_image_path}")
         return
 
-    # Load the comparison image
-    comparison_image = cv2.imread(comparison_image_path)
-    if comparison_image is None:
+    # Load, resize and convert the comparison image
+    comparison_gray = load_grayscale(comparison_image_path)
+    if comparison_gray is None:
         print(f"Error: Could not load the comparison image: {comparison_image_path}")
         return
 
-    # Resize both images to a fixed size (e.g., 800x600)
-    desired_width = 800
-    desired_height = 600
-    reference_image_resized = cv2.resize(reference_image, (desired_width, desired_height))
-    comparison_image_resized = cv2.resize(comparison_image, (desired_width, desired_height))
-
-    # Convert both images to grayscale
-    reference_gray = cv2.cvtColor(reference_image_resized, cv2.COLOR_BGR2GRAY)
-    comparison_gray = cv2.cvtColor(comparison_image_resized, cv2.COLOR_BGR2GRAY)
-
-    # Compute the absolute difference
-    difference = cv2.absdiff(reference_gray, comparison_gray)
-
     # Calculate the percentage difference
-    total_pixels = reference_gray.size  # Total number of pixels
-    difference_sum = np.sum(difference)  # Sum of absolute differences
-    max_difference = total_pixels * 255  # Maximum possible difference (255 per pixel)
-    percentage_difference = (difference_sum / max_difference) * 100
+    with span("grade.diff", pairs=1):
+        if early_exit:
+            percentage_difference = coarse_to_fine_differences(reference_gray[np.newaxis], comparison_gray[np.newaxis],
+                                                               percentage_threshold)[0][0]
+        else:
+            percentage_difference = percentage_differences(reference_gray[np.newaxis], comparison_gray[np.newaxis])[0]
 
     # Check if the percentage difference exceeds the threshold
     if percentage_difference >= percentage_threshold:
         print(f"Limit EXCEEDED '{os.path.basename(reference_image_path)}' and '{os.path.basename(comparison_image_path)}': {percentage_difference:.2f}%")
     else:
         print(f"Limit passed for '{os.path.basename(reference_image_path)}' and '{os.path.basename(comparison_image_path)}' with {percentage_difference:.2f}% difference.")
+    return percentage_difference
+
+def _use_golden_archive(result, golden_archive):
+    """
+    Points a result at its frame in the golden archive, if the archive holds its config.
+
+    Returns:
+        bool: Whether the reference comes from the archive.
+    """
+    if golden_archive is None or result["config"] not in golden_archive:
+        return False
+    result["golden"] = f"{golden_archive.archive_file}#{result['config']}"
+    return True
+
+def _load_reference(result, size, golden_cache, from_archive, golden_archive):
+    """
+    Loads the preprocessed reference image of a result from the archive, the cache or the file.
+    """
+    if from_archive:
+        with span("grade.golden_archive"):
+            return preprocess_image(np.asarray(golden_archive.frame(result["config"])), size)
+    if golden_cache is not None:
+        with span("grade.golden_cache"):
+            return golden_cache.get(result["golden"])
+    return load_grayscale(result["golden"], size)
+
+def _grade_with_metric(results, reference_stack, comparison_stack):
+    """
+    Grades results whose measurements made the same metric choice, see metric_grades.
+    """
+    thresholds = [result["threshold"] for result in results]
+    scores, passed, decided_by, costs = metric_grades(reference_stack, comparison_stack, thresholds,
+                                                      results[0]["metric_choice"])
+    for index, result in enumerate(results):
+        result["score"] = float(scores[index])
+        result["passed"] = bool(passed[index])
+        result["metric"] = decided_by[index]
+        result["metric_cost"] = float(costs[index])
+
+def grade_batch(measurements, golden_folder, media_folder, size=DEFAULT_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+                golden_cache=None, result_cache=None, early_exit=False, golden_archive=None):
+    """
+    Grades a whole measurements table at once.
+
+    The preprocessed frames of each chunk are stacked into contiguous N x H x W arrays and
+    every percentage difference of the chunk is computed in a single vectorized pass.
+
+    Args:
+        measurements (list): (golden_file, comparison_file, percentage_threshold, config) tuples. An
+                             optional fifth item chooses a metric or a chain of metrics, see
+                             metric_stages; the threshold is then in the units of its last stage.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder holding the comparison images.
+        size (tuple): The (width, height) every image is resized to.
+        chunk_size (int): The maximum number of pairs held in memory at once.
+        golden_cache (GoldenCache): Optional cache of preprocessed golden images. It must be
+                                    built for the same size.
+        result_cache (ResultCache): Optional cache of scores. Pairs whose images are unchanged
+                                    since they were last graded are not decoded again.
+        early_exit (bool): Whether to grade coarse to fine, see coarse_to_fine_differences.
+                           Only exact scores are stored in result_cache.
+        golden_archive (GoldenArchive): Optional packed golden archive. Configs found in it
+                                        are graded against its frame instead of golden_file,
+                                        and are not stored in result_cache.
+
+    Returns:
+        list: One dict per measurement, in order, with the keys config, golden, comparison,
+              threshold, score, passed and error. score is None when error is set. Results
+              served from result_cache also have cached set to True, and early_exit adds
+              the keys decided_level and exact. Measurements that chose a metric add the keys
+              metric (the metric that decided) and metric_cost; they ignore early_exit and
+              are not stored in result_cache.
+    """
+    width, height = size
+    results = []
+
+    for chunk_start in range(0, len(measurements), chunk_size):
+        chunk = measurements[chunk_start:chunk_start + chunk_size]
+        chunk_results = []
+        pending = []
+
+        # Serve unchanged pairs from the result cache, the rest has to be diffed
+        for measurement in chunk:
+            result = new_result(golden_folder, media_folder, *measurement)
+            chunk_results.append(result)
+            from_archive = _use_golden_archive(result, golden_archive)
+            key = None
+            if result_cache is not None and not from_archive and "metric_choice" not in result:
+                with span("grade.result_cache_lookup"):
+                    key = result_cache.key(result["golden"], result["comparison"], result["threshold"], size)
+                    score = result_cache.get(key) if key is not None else None
+                if score is not None:
+                    result["score"] = score
+                    result["passed"] = bool(score < result["threshold"])
+                    result["cached"] = True
+                    continue
+            pending.append((result, key, from_archive))
+
+        reference_stack = np.zeros((len(pending), height, width), dtype=np.uint8)
+        comparison_stack = np.zeros((len(pending), height, width), dtype=np.uint8)
+
+        # Decode every pair of the chunk straight into its slot of the stacks
+        for index, (result, _, from_archive) in enumerate(pending):
+            reference_gray = _load_reference(result, size, golden_cache, from_archive, golden_archive)
+            comparison_gray = load_grayscale(result["comparison"], size)
+            if reference_gray is None:
+                result["error"] = f"Could not load the reference image: {result['golden']}"
+            elif comparison_gray is None:
+                result["error"] = f"Could not load the comparison image: {result['comparison']}"
+            else:
+                reference_stack[index] = reference_gray
+                comparison_stack[index] = comparison_gray
+
+        # Measurements that chose a metric are graded by it, those with the same choice together
+        chosen = {}
+        for index, (result, _, _) in enumerate(pending):
+            if "metric_choice" in result and result["error"] is None:
+                chosen.setdefault(repr(result["metric_choice"]), []).append(index)
+        if chosen:
+            for rows in chosen.values():
+                _grade_with_metric([pending[index][0] for index in rows], reference_stack[rows], comparison_stack[rows])
+            chosen_rows = {index for group in chosen.values() for index in group}
+            rows = [index for index in range(len(pending)) if index not in chosen_rows]
+            reference_stack, comparison_stack = reference_stack[rows], comparison_stack[rows]
+            pending = [pending[index] for index in rows]
+
+        # Grade the rest of the chunk in one vectorized pass
+        with span("grade.diff", pairs=len(pending)):
+            if early_exit:
+                thresholds = [result["threshold"] for result, _, _ in pending]
+                scores, decided_levels, exact = coarse_to_fine_differences(reference_stack, comparison_stack, thresholds)
+            else:
+                scores = percentage_differences(reference_stack, comparison_stack)
+        new_scores = []
+        for index, ((result, key, _), score) in enumerate(zip(pending, scores)):
+            if result["error"] is None:
+                result["score"] = float(score)
+                result["passed"] = bool(score < result["threshold"])
+                if early_exit:
+                    result["decided_level"] = int(decided_levels[index])
+                    result["exact"] = bool(exact[index])
+                if key is not None and result.get("exact", True):
+                    new_scores.append((key, result["score"]))
+        if result_cache is not None:
+            result_cache.put_many(new_scores)
+        results.extend(chunk_results)
+
+    return results
+
+def grade_frame(frame, golden_folder, media_folder, golden_file, comparison_file, percentage_threshold, config,
+                size=DEFAULT_SIZE, golden_cache=None, early_exit=False, golden_archive=None, metric=None):
+    """
+    Grades an in-memory capture against its golden image, without writing or reading a screenshot file.
+
+    Args:
+        frame (numpy.ndarray): The captured BGR or grayscale image, e.g. from Capture.capture_frame_when_ready.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder the screenshot would be archived to.
+        golden_file (str): The name of the golden image.
+        comparison_file (str): The name the screenshot is reported and archived under.
+        percentage_threshold (float): The percentage difference at which the capture fails.
+        config (str): The configuration name.
+        size (tuple): The (width, height) both images are resized to.
+        golden_cache (GoldenCache): Optional cache of preprocessed golden images of the same size.
+        early_exit (bool): Whether to grade coarse to fine, see coarse_to_fine_differences.
+        golden_archive (GoldenArchive): Optional packed golden archive, see grade_batch.
+        metric (str or list): Optional metric choice, see metric_stages.
+
+    Returns:
+        dict: A result as returned by grade_batch.
+    """
+    result = new_result(golden_folder, media_folder, golden_file, comparison_file, percentage_threshold, config, metric)
+    from_archive = _use_golden_archive(result, golden_archive)
+    reference_gray = _load_reference(result, size, golden_cache, from_archive, golden_archive)
+    if reference_gray is None:
+        result["error"] = f"Could not load the reference image: {result['golden']}"
+        return result
+    if frame is None:
+        result["error"] = "No frame was captured."
+        return result
+
+    with span("image.preprocess"):
+        comparison_gray = preprocess_image(frame, size)
+    if metric is not None:
+        _grade_with_metric([result], reference_gray[np.newaxis], comparison_gray[np.newaxis])
+        return result
+    with span("grade.diff", pairs=1):
+        if early_exit:
+            scores, decided_levels, exact = coarse_to_fine_differences(reference_gray[np.newaxis], comparison_gray[np.newaxis],
+                                                                       percentage_threshold)
+            result["decided_level"] = int(decided_levels[0])
+            result["exact"] = bool(exact[0])
+        else:
+            scores = percentage_differences(reference_gray[np.newaxis], comparison_gray[np.newaxis])
+    result["score"] = float(scores[0])
+    result["passed"] = bool(scores[0] < percentage_threshold)
+    return result
+
+def _grade_worker_chunk(chunk_start, chunk, golden_folder, media_folder, size, golden_cache_folder, result_cache_file=None,
+                        early_exit=False, golden_archive_file=None):
+    """
+    Grades one chunk of measurements inside a worker process.
+    """
+    golden_cache = None
+    if golden_cache_folder:
+        # Imported here because GoldenCache itself imports this module
+        from Library.GoldenCache import GoldenCache
+        golden_cache = GoldenCache(golden_cache_folder, size)
+    result_cache = None
+    if result_cache_file:
+        from Library.ResultCache import ResultCache
+        result_cache = ResultCache(result_cache_file)
+    golden_archive = None
+    if golden_archive_file:
+        from Library.GoldenArchive import GoldenArchive
+        golden_archive = GoldenArchive(golden_archive_file)
+    try:
+        return chunk_start, grade_batch(chunk, golden_folder, media_folder, size=size, golden_cache=golden_cache,
+                                        result_cache=result_cache, early_exit=early_exit, golden_archive=golden_archive)
+    finally:
+        if result_cache is not None:
+            result_cache.close()
+
+def iter_grade_parallel(measurements, golden_folder, media_folder, workers=None, size=DEFAULT_SIZE,
+                        chunk_size=DEFAULT_WORKER_CHUNK_SIZE, golden_cache_folder=None, result_cache_file=None,
+                        early_exit=False, golden_archive_file=None):
+    """
+    Grades a measurements table across a pool of worker processes.
+
+    Results are yielded as soon as their worker finishes, so they arrive in completion order.
+    Use the yielded index to put them back in measurement order.
+
+    Args:
+        measurements (list): (golden_file, comparison_file, percentage_threshold, config) tuples.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder holding the comparison images.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        size (tuple): The (width, height) every image is resized to.
+        chunk_size (int): The number of measurements handed to a worker at a time.
+        golden_cache_folder (str): Optional GoldenCache folder shared by all workers.
+        result_cache_file (str): Optional ResultCache file shared by all workers.
+        early_exit (bool): Whether to grade coarse to fine, see coarse_to_fine_differences.
+        golden_archive_file (str): Optional packed golden archive opened by every worker.
+
+    Yields:
+        tuple: (index, result) where result is a dict as returned by grade_batch.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for chunk_start in range(0, len(measurements), chunk_size):
+            chunk = measurements[chunk_start:chunk_start + chunk_size]
+            future = executor.submit(_grade_worker_chunk, chunk_start, chunk, golden_folder, media_folder, size,
+                                     golden_cache_folder, result_cache_file, early_exit, golden_archive_file)
+            futures[future] = (chunk_start, chunk)
+
+        for future in as_completed(futures):
+            chunk_start, chunk = futures[future]
+            try:
+                _, chunk_results = future.result()
+            except Exception as e:
+                # A crashed worker only fails the measurements it was grading
+                chunk_results = []
+                for measurement in chunk:
+                    result = new_result(golden_folder, media_folder, *measurement)
+                    result["error"] = f"Worker failed: {e}"
+                    chunk_results.append(result)
+            for offset, result in enumerate(chunk_results):
+                yield chunk_start + offset, result
+
+def write_report(results, report_file):
+    """
+    Writes grading results to a text report, one line per measurement in measurement order.
+
+    Args:
+        results (list): Results in measurement order, as returned by grade_batch or grade_parallel.
+        report_file (str): The path of the report to write.
+    """
+    report_dir = os.path.dirname(report_file)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    with open(report_file, "w") as file:
+        for result in results:
+            file.write(format_result(result) + "\n")
+
+def grade_parallel(measurements, golden_folder, media_folder, workers=None, size=DEFAULT_SIZE,
+                   chunk_size=DEFAULT_WORKER_CHUNK_SIZE, golden_cache_folder=None, report_file=None, result_cache_file=None,
+                   early_exit=False, golden_archive_file=None):
+    """
+    Grades a measurements table across a pool of worker processes and returns ordered results.
+
+    Args:
+        measurements (list): (golden_file, comparison_file, percentage_threshold, config) tuples.
+        golden_folder (str): The folder holding the golden images.
+        media_folder (str): The folder holding the comparison images.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+        size (tuple): The (width, height) every image is resized to.
+        chunk_size (int): The number of measurements handed to a worker at a time.
+        golden_cache_folder (str): Optional GoldenCache folder shared by all workers.
+        report_file (str): Optional path of a report written in measurement order.
+        result_cache_file (str): Optional ResultCache file shared by all workers.
+        early_exit (bool): Whether to grade coarse to fine, see coarse_to_fine_differences.
+        golden_archive_file (str): Optional packed golden archive opened by every worker.
+
+    Returns:
+        list: One dict per measurement, in measurement order, as returned by grade_batch.
+    """
+    results = [None] * len(measurements)
+    for index, result in iter_grade_parallel(measurements, golden_folder, media_folder, workers, size, chunk_size,
+                                             golden_cache_folder, result_cache_file, early_exit, golden_archive_file):
+        results[index] = result
+    if report_file:
+        write_report(results, report_file)
+    return results
+
+def build_measurements(video_files, percentage_threshold=DEFAULT_THRESHOLD, metric=None):
+    """
+    Builds a measurements table for video files using the names Training.py and VLCTester.py write.
+
+    Args:
+        video_files (list): Paths of the video files that were played.
+        percentage_threshold (float): The threshold applied to every measurement.
+        metric (str or list): Optional metric choice of every measurement, see metric_stages.
+
+    Returns:
+        list: (golden_file, comparison_file, percentage_threshold, config) tuples, with the
+              metric choice as a fifth item if one was given.
+    """
+    if metric is not None:
+        metric_stages(metric)  # Reject an unknown metric before anything is graded
+    measurements = []
+    for video_file in video_files:
+        file_name = os.path.basename(video_file)
+        video_name = os.path.splitext(file_name)[0]
+        measurement = (f"{video_name}_golden.jpg", f"{file_name}_screenshot.jpg", percentage_threshold, video_name)
+        measurements.append(measurement if metric is None else measurement + (metric,))
+    return measurements
+
+def grade_folders(media_folder, golden_folder, video_files=None, percentage_threshold=DEFAULT_THRESHOLD, workers=1,
+                  golden_cache_folder=None, report_file=None, result_cache_file=None, early_exit=False,
+                  golden_archive_file=None, golden_model_folder=None, metric=None):
+    """
+    Grades the screenshots of a media folder against their golden images in the calling process.
+
+    This is the importable entry point used by VLCTester.py instead of running this script.
+
+    Args:
+        media_folder (str): The folder holding the screenshots.
+        golden_folder (str): The folder holding the golden images.
+        video_files (list): The video files to grade, defaults to every video in media_folder.
+        percentage_threshold (float): The threshold applied to every measurement.
+        workers (int): The number of worker processes, 1 grades in the calling process.
+        golden_cache_folder (str): Optional GoldenCache folder for the preprocessed golden images.
+        report_file (str): Optional path of a report written in measurement order.
+        result_cache_file (str): Optional ResultCache file, so unchanged pairs are not graded again.
+        early_exit (bool): Whether to grade coarse to fine, see coarse_to_fine_differences.
+        golden_archive_file (str): Optional packed golden archive written by Training.py. Videos
+                                   whose config it holds are graded against its frames.
+        golden_model_folder (str): Optional folder of statistical golden models written by
+                                   Training.py. Videos with a model are scored by normalized
+                                   deviation, see GoldenModel.grade_with_models, in the calling
+                                   process whatever the number of workers.
+        metric (str or list): Optional metric or chain of metrics every video is graded with,
+                              see metric_stages. percentage_threshold is then in the units of
+                              its last stage, e.g. 0.9 for "ssim".
+
+    Returns:
+        list: One dict per video, in order, as returned by grade_batch.
+    """
+    if video_files is None:
+        from Library.FunctionLibrary import scan_for_video_files
+        video_files = scan_for_video_files(media_folder)
+    measurements = build_measurements(video_files, percentage_threshold, metric)
+
+    if workers > 1 and not golden_model_folder:
+        return grade_parallel(measurements, golden_folder, media_folder, workers=workers,
+                              golden_cache_folder=golden_cache_folder, report_file=report_file,
+                              result_cache_file=result_cache_file, early_exit=early_exit,
+                              golden_archive_file=golden_archive_file)
+
+    golden_cache = None
+    if golden_cache_folder:
+        # Imported here because GoldenCache itself imports this module
+        from Library.GoldenCache import GoldenCache
+        golden_cache = GoldenCache(golden_cache_folder)
+    result_cache = None
+    if result_cache_file:
+        from Library.ResultCache import ResultCache
+        result_cache = ResultCache(result_cache_file)
+    golden_archive = None
+    if golden_archive_file:
+        from Library.GoldenArchive import GoldenArchive
+        golden_archive = GoldenArchive(golden_archive_file)
+    try:
+        if golden_model_folder:
+            # Imported here because GoldenModel itself imports this module
+            from Library.GoldenModel import grade_with_models
+            results = grade_with_models(measurements, golden_model_folder, golden_folder, media_folder, golden_cache=golden_cache,
+                                        result_cache=result_cache, early_exit=early_exit, golden_archive=golden_archive)
+        else:
+            results = grade_batch(measurements, golden_folder, media_folder, golden_cache=golden_cache, result_cache=result_cache,
+                                  early_exit=early_exit, golden_archive=golden_archive)
+    finally:
+        if result_cache is not None:
+            result_cache.close()
+    if report_file:
+        write_report(results, report_file)
+    return results
 
 if __name__ == "__main__":
+    # Path to the Media folder, next to the Library folder
+    media_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Media")
+
     # Path to the Golden Images folder
-    golden_folder = r"C:\Code\Open_Test_Framework\Media\Golden_Images"
-
-    # Path to the Media folder
-    media_folder = r"C:\Code\Open_Test_Framework\Media"
-
-    testLimit = 5  # This is the threshold for percentage difference, can be adjusted as needed.
-    # Array of golden image files, percentage thresholds, and configurations
-    measurements = [
-        ("MKV_H.264_29.97FPS_golden.jpg", "MKV_H.264_29.97FPS.mkv_screenshot.jpg", 5, "MKV_H.264_29.97FPS"),
-        ("MKV_H.264_60FPS_golden.jpg", "MKV_H.264_60FPS.mkv_screenshot.jpg", 5, "MKV_H.264_60FPS"),
-        ("MKV_HEVc_29.97FPs_golden.jpg", "MKV_HEVc_29.97FPs.mkv_screenshot.jpg", 5, "MKV_HEVc_29.97FPs"),
-        ("MKV_HEVC_60FPS_golden.jpg", "MKV_HEVC_60FPS.mkv_screenshot.jpg", 5, "MKV_HEVC_60FPS"),
-        ("MP4_H.26429.97FPS_golden.jpg", "MP4_H.26429.97FPS.mp4_screenshot.jpg", 5, "MP4_H.26429.97FPS"),
-        ("MP4_H.264_120FPS_golden.jpg", "MP4_H.264_120FPS.mp4_screenshot.jpg", 5, "MP4_H.264_120FPS"),
-        ("MP4_H.264_240FPS_golden.jpg", "MP4_H.264_240FPS.mp4_screenshot.jpg", 5, "MP4_H.264_240FPS"),
-        ("MP4_H.264_60FPS_golden.jpg", "MP4_H.264_60FPS.mp4_screenshot.jpg", 5, "MP4_H.264_60FPS"),
-        ("MP4_HEVC29.97FPS_golden.jpg", "MP4_HEVC29.97FPS.mp4_screenshot.jpg", 5, "MP4_HEVC29.97FPS"),
-        ("MP4_HEVC_204FPS_golden.jpg", "MP4_HEVC_204FPS.mp4_screenshot.jpg", 5, "MP4_HEVC_204FPS"),
-        ("MP4_HEVC_60FPS_golden.jpg", "MP4_HEVC_60FPS.mp4_screenshot.jpg", 5, "MP4_HEVC_60FPS"),
-        ("MPEG-2_MPEG-2_60FPS_golden.jpg", "MPEG-2_MPEG-2_60FPS.mpg_screenshot.jpg", 5, "MPEG-2_MPEG-2_60FPS"),
-        ("MPEG-2_MPEG_29.97FPS_golden.jpg", "MPEG-2_MPEG_29.97FPS.mpg_screenshot.jpg", 5, "MPEG-2_MPEG_29.97FPS")
-    ]
-
-    # Iterate through the array and process each golden image
-    for golden_file, comparison_file, percentage_threshold, config in measurements:
-        golden_image_path = os.path.join(golden_folder, golden_file)
-        comparison_image_path = os.path.join(media_folder, comparison_file)
-        #print(f"Grading '{golden_image_path}' against '{comparison_image_path}' with threshold {percentage_threshold}% for config {config}")
-        grade(golden_image_path, comparison_image_path, percentage_threshold)
\ No newline at end of file
+    golden_folder = os.path.join(media_folder, "Golden_Images")
+    # Number of grading processes, set to 1 to grade in this process only
+    worker_count = os.cpu_count() or 1
+
+    # Report written in measurement order once every pair has been graded
+    report_file = os.path.join(media_folder, "ImageCompare_Report.txt")
+
+    if worker_count > 1:
+        # Print the results as the workers finish them, then write the ordered report
+        results = [None] * len(MEASUREMENTS)
+        for index, result in iter_grade_parallel(MEASUREMENTS, golden_folder, media_folder, workers=worker_count):
+            print(format_result(result))
+            results[index] = result
+    else:
+        # Grade every golden image in one batch and report the results
+        results = grade_batch(MEASUREMENTS, golden_folder, media_folder)
+        for result in results:
+            print(format_result(result))
+    write_report(results, report_file)
@@ -0,0 +1,173 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# Spans are only recorded while this is True, see enable()
+_enabled = False
+
+# Recorded spans as (name, start_ns, duration_ns, pid, thread_id, args) tuples
+_events = []
+
+# perf_counter_ns() at enable(), trace timestamps are relative to it
+_origin_ns = 0
+
+# Returned by span() while instrumentation is disabled, entering it does nothing
+_NULL_SPAN = contextlib.nullcontext()
+
+def enable():
+    """
+    Starts recording spans. Recorded spans are kept until reset().
+    """
+    global _enabled, _origin_ns
+    if not _events:
+        _origin_ns = time.perf_counter_ns()
+    _enabled = True
+
+def disable():
+    """
+    Stops recording spans.
+    """
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """
+    Returns whether spans are being recorded.
+    """
+    return _enabled
+
+def reset():
+    """
+    Discards every recorded span.
+    """
+    global _origin_ns
+    _events.clear()
+    _origin_ns = time.perf_counter_ns()
+
+class _Span:
+    __slots__ = ("name", "args", "start_ns")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end_ns = time.perf_counter_ns()
+        # list.append is atomic, so spans from several threads need no lock
+        _events.append((self.name, self.start_ns, end_ns - self.start_ns, os.getpid(), threading.get_ident(), self.args))
+        return False
+
+def span(name, **args):
+    """
+    Times a block of code under a stage name.
+
+    While instrumentation is disabled this returns a shared no-op context manager, so a
+    span on a hot path costs one function call and a flag check.
+
+    Args:
+        name (str): The stage name, e.g. "capture.screenshot".
+        args: Optional values shown with the span in the trace viewer, e.g. file=path.
+
+    Returns:
+        A context manager to use in a with statement.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def traced(name=None):
+    """
+    Decorator that times every call of a function as a span.
+
+    Args:
+        name (str): The stage name, defaults to the function's module and name.
+    """
+    def decorator(function):
+        span_name = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def export_chrome_trace(trace_file):
+    """
+    Writes the recorded spans as a Chrome trace-event JSON file.
+
+    Open it in chrome://tracing or https://ui.perfetto.dev to see every stage on a
+    timeline, one row per thread.
+
+    Args:
+        trace_file (str): The path of the JSON file to write.
+    """
+    trace_dir = os.path.dirname(trace_file)
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+    trace_events = []
+    for name, start_ns, duration_ns, pid, thread_id, args in list(_events):
+        trace_events.append({
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start_ns - _origin_ns) / 1000,
+            "dur": duration_ns / 1000,
+            "pid": pid,
+            "tid": thread_id,
+            "args": {key: str(value) for key, value in args.items()},
+        })
+    with open(trace_file, "w") as file:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+
+def summary():
+    """
+    Summarizes the recorded spans per stage.
+
+    Returns:
+        dict: stage name -> dict with count, total, p50, p95 and max, durations in milliseconds.
+    """
+    durations = {}
+    for name, _, duration_ns, _, _, _ in list(_events):
+        durations.setdefault(name, []).append(duration_ns / 1e6)
+    stages = {}
+    for name, values in durations.items():
+        values = np.asarray(values)
+        stages[name] = {
+            "count": len(values),
+            "total": float(values.sum()),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+        }
+    return stages
+
+def format_summary(stages=None):
+    """
+    Formats the per-stage summary as a text table, the slowest stages in total first.
+
+    Args:
+        stages (dict): A summary as returned by summary(), defaults to the recorded spans.
+
+    Returns:
+        str: The table.
+    """
+    if stages is None:
+        stages = summary()
+    width = max([len("Stage")] + [len(name) for name in stages])
+    lines = [f"{'Stage':<{width}}  {'Count':>7}  {'Total ms':>10}  {'p50 ms':>9}  {'p95 ms':>9}  {'Max ms':>9}"]
+    for name, stage in sorted(stages.items(), key=lambda item: item[1]["total"], reverse=True):
+        lines.append(f"{name:<{width}}  {stage['count']:>7}  {stage['total']:>10.1f}  {stage['p50']:>9.2f}  "
+                     f"{stage['p95']:>9.2f}  {stage['max']:>9.2f}")
+    return "\n".join(lines)
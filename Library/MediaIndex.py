@@ -0,0 +1,210 @@
+import json
+import os
+from Library.FunctionLibrary import VIDEO_EXTENSIONS, iter_video_files
+from Library.MediaProbe import probe_media
+
+class MediaIndex:
+    def __init__(self, index_file):
+        """
+        Initializes a persistent index of the video files below one or more media folders.
+
+        For every directory the index keeps its modification time, its subdirectories and the
+        size and modification time of its video files. A later scan reuses the stored listing
+        of any directory whose modification time has not changed instead of reading it again.
+
+        Args:
+            index_file (str): The JSON file the index is loaded from and saved to.
+        """
+        self.index_file = index_file
+        self.directories = {}
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, "r") as file:
+                    self.directories = json.load(file).get("directories", {})
+            except (OSError, ValueError):
+                self.directories = {}  # Unreadable index, the next scan rebuilds it
+
+    def save(self):
+        """
+        Writes the index to its file, replacing the old one atomically.
+        """
+        index_dir = os.path.dirname(self.index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        temp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump({"version": 1, "directories": self.directories}, file)
+        os.replace(temp_file, self.index_file)
+
+    def file_entry(self, file_path):
+        """
+        Returns the stored entry of a video file, or None if it is not indexed.
+
+        The entry is a dict with at least size and mtime_ns. Other modules may store extra
+        metadata in it; it is dropped when the file changes.
+        """
+        directory = self.directories.get(os.path.dirname(os.path.abspath(file_path)))
+        if directory is None:
+            return None
+        return directory["files"].get(os.path.basename(file_path))
+
+    def media_info(self, file_path):
+        """
+        Returns the container header details of a video file, see MediaProbe.probe_media.
+
+        The details are stored in the file's entry, so they are only read again once the
+        file's size or modification time changed. Files of directories that have not been
+        scanned are probed every time.
+
+        Args:
+            file_path (str): The path of the video file.
+
+        Returns:
+            dict: The probe result, or None if the file cannot be read.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        directory = self.directories.get(os.path.dirname(os.path.abspath(file_path)))
+        if directory is None:
+            return probe_media(file_path)
+        name = os.path.basename(file_path)
+        entry = directory["files"].get(name)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = directory["files"][name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if "media_info" not in entry:
+            entry["media_info"] = probe_media(file_path)
+        return entry["media_info"]
+
+    def _read_directory(self, directory):
+        """
+        Lists a directory, returning its video file stats and its subdirectory names.
+        """
+        files = {}
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                    stat = entry.stat()
+                    files[entry.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return files, subdirectories
+
+    def scan(self, folder_path, check_files=False):
+        """
+        Scans a media folder and yields every video file with what changed since the last scan.
+
+        Directories whose modification time is unchanged are not listed again. Adding,
+        removing or renaming a file changes its directory's modification time, but rewriting a
+        file in place does not, so pass check_files=True to also stat the files of unchanged
+        directories. Call save() afterwards to persist the updated index.
+
+        Args:
+            folder_path (str): The path to the folder to scan.
+            check_files (bool): Whether to stat files in unchanged directories as well.
+
+        Yields:
+            tuple: (status, path) where status is "added", "modified", "unchanged" or "removed".
+                   Removed files are only reported; they are no longer in the folder.
+        """
+        root = os.path.abspath(folder_path)
+        seen = set()
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(directory)
+            cached = self.directories.get(directory)
+
+            if cached is not None and cached["mtime_ns"] == mtime_ns:
+                # Same listing as last time, only the file contents may have changed
+                for name, entry in list(cached["files"].items()):
+                    path = os.path.join(directory, name)
+                    status = "unchanged"
+                    if check_files:
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            del cached["files"][name]
+                            yield "removed", path
+                            continue
+                        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+                            cached["files"][name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                            status = "modified"
+                    yield status, path
+                subdirectories = cached["subdirectories"]
+            else:
+                try:
+                    files, subdirectories = self._read_directory(directory)
+                except OSError:
+                    continue
+                old_files = cached["files"] if cached is not None else {}
+                for name, entry in files.items():
+                    old_entry = old_files.get(name)
+                    if old_entry is None:
+                        yield "added", os.path.join(directory, name)
+                    elif old_entry["size"] != entry["size"] or old_entry["mtime_ns"] != entry["mtime_ns"]:
+                        yield "modified", os.path.join(directory, name)
+                    else:
+                        files[name] = old_entry  # Keep any metadata stored with the entry
+                        yield "unchanged", os.path.join(directory, name)
+                for name in old_files:
+                    if name not in files:
+                        yield "removed", os.path.join(directory, name)
+                self.directories[directory] = {"mtime_ns": mtime_ns, "files": files, "subdirectories": subdirectories}
+
+            # Visit the subdirectories in listing order, like os.walk
+            pending.extend(os.path.join(directory, name) for name in reversed(subdirectories))
+
+        # Directories below the folder that have disappeared since the last scan
+        for directory in list(self.directories):
+            if directory not in seen and (directory == root or directory.startswith(os.path.join(root, ""))):
+                for name in self.directories.pop(directory)["files"]:
+                    yield "removed", os.path.join(directory, name)
+
+def stream_video_files(folder_path, index_file=None, on_change=None, check_files=False, media_info=None,
+                       media_filter=None):
+    """
+    Yields the video files of a folder as they are found, optionally through a persistent MediaIndex.
+
+    Args:
+        folder_path (str): The path to the folder to scan.
+        index_file (str): Optional MediaIndex file. Without it the folder is scanned in full.
+        on_change (callable): Optional on_change(status, path) called for every file, including
+                              removed ones, e.g. to log what changed since the last run.
+        check_files (bool): Whether to stat files in unchanged directories, see MediaIndex.scan.
+        media_info (dict): Optional dict the container header details of every yielded file are
+                           stored in, by path. With index_file they are cached in the index.
+        media_filter (callable): Optional media_filter(details) that returns False for files to
+                                 skip, e.g. lambda details: details["codec"] == "HEVC".
+
+    Yields:
+        str: The path of every video file that is present in the folder.
+    """
+    if index_file:
+        media_index = MediaIndex(index_file)
+        changes = media_index.scan(folder_path, check_files)
+    else:
+        media_index = None
+        changes = (("found", path) for path in iter_video_files(folder_path))
+
+    for status, path in changes:
+        if on_change is not None:
+            on_change(status, path)
+        if status == "removed":
+            continue
+        if media_info is not None or media_filter is not None:
+            details = media_index.media_info(path) if media_index is not None else probe_media(path)
+            if media_filter is not None and not media_filter(details or {}):
+                continue
+            if media_info is not None:
+                media_info[path] = details
+        yield path
+
+    if media_index is not None:
+        media_index.save()
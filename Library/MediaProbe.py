@@ -0,0 +1,378 @@
+import os
+import struct
+from Library.FrameSource import DEFAULT_CAPTURE_TIME
+
+# Seconds a video is played when its duration is unknown or longer
+DEFAULT_PLAY_TIME = 6
+
+# Largest MP4 'moov' box that is read, it holds the headers of every track
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+# Bytes searched at the start and end of an MPEG program stream for its headers and time stamps
+PS_SCAN_SIZE = 1024 * 1024
+
+# MP4 sample entry and Matroska codec ID prefixes, mapped to one codec name
+MP4_CODECS = {"avc1": "H.264", "avc3": "H.264", "hvc1": "HEVC", "hev1": "HEVC", "mp4v": "MPEG-4", "av01": "AV1",
+              "vp09": "VP9", "vp08": "VP8", "mjpa": "MJPEG", "jpeg": "MJPEG"}
+MKV_CODECS = {"V_MPEG4/ISO/AVC": "H.264", "V_MPEGH/ISO/HEVC": "HEVC", "V_MPEG4/ISO": "MPEG-4", "V_AV1": "AV1",
+              "V_VP9": "VP9", "V_VP8": "VP8", "V_MPEG2": "MPEG-2", "V_MPEG1": "MPEG-1", "V_MJPEG": "MJPEG",
+              "V_MS/VFW/FOURCC": "VFW"}
+
+# MPEG-1/2 video frame_rate_code values
+MPEG_FRAME_RATES = {1: 24000 / 1001, 2: 24.0, 3: 25.0, 4: 30000 / 1001, 5: 30.0, 6: 50.0, 7: 60000 / 1001, 8: 60.0}
+
+# Matroska element IDs used by the probe
+EBML_HEADER = 0x1A45DFA3
+EBML_DOC_TYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_DEFAULT_DURATION = 0x23E383
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_CLUSTER = 0x1F43B675
+
+def _new_info(container=None):
+    """
+    Returns the probe result with every field unknown.
+    """
+    return {"container": container, "codec": None, "resolution": None, "fps": None, "duration": None}
+
+def _iter_boxes(data, offset=0, end=None):
+    """
+    Yields (type, body_start, body_end) for the ISO-BMFF boxes in data[offset:end].
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type.decode("latin-1"), offset + header, min(offset + size, end)
+        offset += size
+
+def _find_box(data, path, offset=0, end=None):
+    """
+    Returns (body_start, body_end) of the first box along a path like ["mdia", "minf", "stbl"], or None.
+    """
+    for box_type, start, stop in _iter_boxes(data, offset, end):
+        if box_type == path[0]:
+            return (start, stop) if len(path) == 1 else _find_box(data, path[1:], start, stop)
+    return None
+
+def _read_moov(file):
+    """
+    Walks the top-level boxes without reading them and returns the body of the 'moov' box, or None.
+    """
+    file_size = os.fstat(file.fileno()).st_size
+    offset = 0
+    while offset + 8 <= file_size:
+        file.seek(offset)
+        header = file.read(16)
+        size, box_type = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return None
+        if box_type == b"moov":
+            if size > MAX_MOOV_SIZE:
+                return None
+            file.seek(offset + header_size)
+            return file.read(size - header_size)
+        offset += size
+    return None
+
+def probe_mp4(file):
+    """
+    Reads the headers of an MP4/MOV (ISO-BMFF) file from its 'moov' box.
+    """
+    info = _new_info("mp4")
+    moov = _read_moov(file)
+    if moov is None:
+        return info
+
+    mvhd = _find_box(moov, ["mvhd"])
+    if mvhd is not None:
+        start = mvhd[0]
+        if moov[start] == 1:
+            timescale, duration = struct.unpack_from(">IQ", moov, start + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", moov, start + 12)
+        if timescale:
+            info["duration"] = duration / timescale
+
+    for box_type, start, stop in _iter_boxes(moov):
+        if box_type != "trak":
+            continue
+        hdlr = _find_box(moov, ["mdia", "hdlr"], start, stop)
+        if hdlr is None or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+
+        # Visual sample entry: 6 reserved bytes, data reference index, 16 bytes, then width and height
+        stsd = _find_box(moov, ["mdia", "minf", "stbl", "stsd"], start, stop)
+        if stsd is not None:
+            entries = _iter_boxes(moov, stsd[0] + 8, stsd[1])
+            entry = next(entries, None)
+            if entry is not None:
+                entry_type, entry_start, _ = entry
+                info["codec"] = MP4_CODECS.get(entry_type, entry_type.strip())
+                width, height = struct.unpack_from(">HH", moov, entry_start + 24)
+                info["resolution"] = [width, height]
+
+        mdhd = _find_box(moov, ["mdia", "mdhd"], start, stop)
+        stts = _find_box(moov, ["mdia", "minf", "stbl", "stts"], start, stop)
+        if mdhd is not None and stts is not None:
+            if moov[mdhd[0]] == 1:
+                timescale, duration = struct.unpack_from(">IQ", moov, mdhd[0] + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", moov, mdhd[0] + 12)
+            entry_count = struct.unpack_from(">I", moov, stts[0] + 4)[0]
+            samples = sum(struct.unpack_from(">I", moov, stts[0] + 8 + 8 * index)[0] for index in range(entry_count))
+            if timescale and duration:
+                info["fps"] = samples * timescale / duration
+                if info["duration"] is None:
+                    info["duration"] = duration / timescale
+        break
+    return info
+
+def _read_vint(file, keep_marker):
+    """
+    Reads an EBML variable-length integer.
+
+    Returns:
+        tuple: (value, unknown) where unknown is True for an all-ones size, or (None, False) at the end of the file.
+    """
+    first = file.read(1)
+    if not first:
+        return None, False
+    first = first[0]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer.")
+    value = first if keep_marker else first & (0xFF >> length)
+    rest = file.read(length - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, unknown
+
+def _iter_elements(file, end):
+    """
+    Yields (element_id, body_start, body_end) for the EBML elements up to end, leaving the file
+    at the body of each element until the next one is requested.
+    """
+    while file.tell() < end:
+        element_id, _ = _read_vint(file, keep_marker=True)
+        size, unknown = _read_vint(file, keep_marker=False)
+        if element_id is None or size is None:
+            return
+        start = file.tell()
+        stop = end if unknown else min(start + size, end)
+        yield element_id, start, stop
+        file.seek(stop)
+
+def _read_uint(file, start, stop):
+    file.seek(start)
+    return int.from_bytes(file.read(stop - start), "big")
+
+def _read_float(file, start, stop):
+    file.seek(start)
+    data = file.read(stop - start)
+    return struct.unpack(">f" if len(data) == 4 else ">d", data)[0]
+
+def _read_string(file, start, stop):
+    file.seek(start)
+    return file.read(stop - start).rstrip(b"\0").decode("utf-8", errors="replace")
+
+def probe_matroska(file):
+    """
+    Reads the Info and Tracks elements of a Matroska or WebM file, stopping at the first cluster.
+    """
+    info = _new_info("matroska")
+    file_size = os.fstat(file.fileno()).st_size
+    file.seek(0)
+    for element_id, start, stop in _iter_elements(file, file_size):
+        if element_id == EBML_HEADER:
+            for child_id, child_start, child_stop in _iter_elements(file, stop):
+                if child_id == EBML_DOC_TYPE and _read_string(file, child_start, child_stop) == "webm":
+                    info["container"] = "webm"
+        elif element_id == MKV_SEGMENT:
+            timecode_scale, duration = 1000000, None
+            for child_id, child_start, child_stop in _iter_elements(file, stop):
+                if child_id == MKV_INFO:
+                    for field_id, field_start, field_stop in _iter_elements(file, child_stop):
+                        if field_id == MKV_TIMECODE_SCALE:
+                            timecode_scale = _read_uint(file, field_start, field_stop)
+                        elif field_id == MKV_DURATION:
+                            duration = _read_float(file, field_start, field_stop)
+                elif child_id == MKV_TRACKS:
+                    for entry_id, entry_start, entry_stop in _iter_elements(file, child_stop):
+                        if entry_id == MKV_TRACK_ENTRY and info["codec"] is None:
+                            _probe_matroska_track(file, entry_start, entry_stop, info)
+                elif child_id == MKV_CLUSTER:
+                    break  # The headers come before the media data
+            if duration is not None:
+                info["duration"] = duration * timecode_scale / 1e9
+            break
+    return info
+
+def _probe_matroska_track(file, start, stop, info):
+    """
+    Fills in info from a Matroska TrackEntry if it is a video track.
+    """
+    track = {}
+    file.seek(start)
+    for field_id, field_start, field_stop in _iter_elements(file, stop):
+        if field_id in (MKV_TRACK_TYPE, MKV_DEFAULT_DURATION):
+            track[field_id] = _read_uint(file, field_start, field_stop)
+        elif field_id == MKV_CODEC_ID:
+            track[field_id] = _read_string(file, field_start, field_stop)
+        elif field_id == MKV_VIDEO:
+            for video_id, video_start, video_stop in _iter_elements(file, field_stop):
+                if video_id in (MKV_PIXEL_WIDTH, MKV_PIXEL_HEIGHT):
+                    track[video_id] = _read_uint(file, video_start, video_stop)
+    if track.get(MKV_TRACK_TYPE) != 1:
+        return
+    codec_id = track.get(MKV_CODEC_ID, "")
+    info["codec"] = MKV_CODECS.get(codec_id, codec_id or None)
+    if MKV_PIXEL_WIDTH in track and MKV_PIXEL_HEIGHT in track:
+        info["resolution"] = [track[MKV_PIXEL_WIDTH], track[MKV_PIXEL_HEIGHT]]
+    if track.get(MKV_DEFAULT_DURATION):
+        info["fps"] = 1e9 / track[MKV_DEFAULT_DURATION]
+
+def _pts_seconds(data, offset):
+    """
+    Returns the presentation time stamp of the PES packet at offset in seconds, or None if it has none.
+    """
+    if offset + 14 > len(data):
+        return None
+    if data[offset + 6] >> 6 == 2:
+        # MPEG-2 PES header: flags, header length, then the PTS if the first flag is set
+        if not data[offset + 7] & 0x80:
+            return None
+        position = offset + 9
+    else:
+        # MPEG-1 packet: stuffing bytes and an optional STD buffer size before the time stamps
+        position = offset + 6
+        while position < len(data) and data[position] == 0xFF:
+            position += 1
+        if position < len(data) and data[position] >> 6 == 1:
+            position += 2
+        if position + 5 > len(data) or data[position] >> 4 not in (2, 3):
+            return None
+    b = data[position:position + 5]
+    if len(b) < 5:
+        return None
+    return (((b[0] >> 1) & 0x07) << 30 | b[1] << 22 | (b[2] >> 1) << 15 | b[3] << 7 | b[4] >> 1) / 90000
+
+def _video_pts(data):
+    """
+    Yields (offset, seconds) for the video PES packets in data that carry a time stamp.
+    """
+    offset = data.find(b"\x00\x00\x01")
+    while 0 <= offset and offset + 4 <= len(data):
+        if 0xE0 <= data[offset + 3] <= 0xEF:
+            pts = _pts_seconds(data, offset)
+            if pts is not None:
+                yield offset, pts
+        offset = data.find(b"\x00\x00\x01", offset + 3)
+
+def probe_mpeg_ps(file):
+    """
+    Reads the first video sequence header and the first and last video time stamps of an MPEG program stream.
+    """
+    info = _new_info("mpeg-ps")
+    file_size = os.fstat(file.fileno()).st_size
+    file.seek(0)
+    head = file.read(PS_SCAN_SIZE)
+
+    sequence = head.find(b"\x00\x00\x01\xb3")
+    if sequence >= 0 and sequence + 8 <= len(head):
+        b = head[sequence + 4:sequence + 8]
+        info["resolution"] = [b[0] << 4 | b[1] >> 4, (b[1] & 0x0F) << 8 | b[2]]
+        info["fps"] = MPEG_FRAME_RATES.get(b[3] & 0x0F)
+        # A sequence extension (extension ID 1) follows the header in MPEG-2 video only
+        extension = head.find(b"\x00\x00\x01\xb5", sequence)
+        is_mpeg2 = extension >= 0 and extension + 4 < len(head) and head[extension + 4] >> 4 == 1
+        info["codec"] = "MPEG-2" if is_mpeg2 else "MPEG-1"
+
+    # A time stamp belongs to the first picture starting in its packet, so the pictures after
+    # the last stamped packet are counted to reach the end of the stream
+    first_stamps = [pts for _, pts in _video_pts(head)]
+    if first_stamps:
+        file.seek(max(0, file_size - PS_SCAN_SIZE))
+        tail = file.read(PS_SCAN_SIZE)
+        last_stamps = list(_video_pts(tail))
+        if last_stamps:
+            offset, last_pts = last_stamps[-1]
+            pictures = tail.count(b"\x00\x00\x01\x00", offset)
+            duration = last_pts - min(first_stamps) + (pictures / info["fps"] if info["fps"] else 0)
+            if duration > 0:
+                info["duration"] = duration
+    return info
+
+def probe_media(file_path):
+    """
+    Reads the codec, resolution, frame rate and duration of a media file from its container headers.
+
+    Only the headers are read, nothing is decoded: the 'moov' box of MP4/MOV files, the
+    Info and Tracks elements of Matroska/WebM files and the pack and sequence headers of
+    MPEG program streams.
+
+    Args:
+        file_path (str): The path of the media file.
+
+    Returns:
+        dict: container, codec, resolution [width, height], fps and duration in seconds.
+              Values the headers do not hold are None, every value is None for other formats.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            signature = file.read(12)
+            file.seek(0)
+            if signature[4:8] in (b"ftyp", b"moov", b"free", b"mdat", b"wide", b"skip"):
+                return probe_mp4(file)
+            if signature[:4] == b"\x1a\x45\xdf\xa3":
+                return probe_matroska(file)
+            if signature[:4] == b"\x00\x00\x01\xba":
+                return probe_mpeg_ps(file)
+    except (OSError, ValueError, struct.error, IndexError):
+        pass  # Unreadable or damaged headers count as unknown
+    return _new_info()
+
+def playback_window(info, play_time=DEFAULT_PLAY_TIME, capture_time=DEFAULT_CAPTURE_TIME):
+    """
+    Returns when to capture a file and how long to play it.
+
+    Files at least play_time long use the defaults. Shorter files are played to their end
+    and captured at the same fraction of their duration.
+
+    Args:
+        info (dict): The probe result of the file, or None if it is unknown.
+        play_time (float): The default number of seconds to play.
+        capture_time (float): The default capture time in seconds.
+
+    Returns:
+        tuple: (capture_time, stop_time) in seconds.
+    """
+    duration = info.get("duration") if info else None
+    if not duration or duration >= play_time:
+        return capture_time, play_time
+    return duration * capture_time / play_time, duration
@@ -0,0 +1,362 @@
+import json
+import os
+import cv2
+import numpy as np
+from Library.ImageCompare import DEFAULT_SIZE, coarse_to_fine_differences, grade_batch, load_grayscale, new_result
+
+# Number of bits along each side of a hash, 8 gives 64-bit hashes
+HASH_SIZE = 8
+
+# Hamming distance at or above which a pair is suspected to fail. The hash ignores brightness and
+# contrast, so it never decides a pair alone: a darkened capture can hash like its golden image,
+# and a faint pattern whose gradients flip hashes far from it while barely differing in pixels.
+DEFAULT_FAIL_DISTANCE = 24
+
+def _bits_to_int(bits):
+    """
+    Packs a boolean array into an integer, first element as the most significant bit.
+    """
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def dhash(gray_image, hash_size=HASH_SIZE):
+    """
+    Calculates the difference hash of a grayscale image.
+
+    Args:
+        gray_image (numpy.ndarray): A height x width grayscale image.
+        hash_size (int): The number of bits along each side of the hash.
+
+    Returns:
+        int: The hash_size * hash_size bit hash.
+    """
+    resized = cv2.resize(gray_image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(resized[:, 1:] > resized[:, :-1])
+
+def phash(gray_image, hash_size=HASH_SIZE, highfreq_factor=4):
+    """
+    Calculates the DCT based perceptual hash of a grayscale image.
+
+    Args:
+        gray_image (numpy.ndarray): A height x width grayscale image.
+        hash_size (int): The number of bits along each side of the hash.
+        highfreq_factor (int): How many times larger than the hash the image is before the DCT.
+
+    Returns:
+        int: The hash_size * hash_size bit hash.
+    """
+    side = hash_size * highfreq_factor
+    resized = cv2.resize(gray_image, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_frequencies = cv2.dct(resized)[:hash_size, :hash_size]
+    # The DC term only holds the average brightness, leave it out of the median
+    median = np.median(low_frequencies.flatten()[1:])
+    return _bits_to_int(low_frequencies > median)
+
+HASH_METHODS = {"dhash": dhash, "phash": phash}
+
+def hamming_distance(first_hash, second_hash):
+    """
+    Returns the number of bits that differ between two hashes.
+    """
+    return bin(first_hash ^ second_hash).count("1")
+
+def hash_image(image_path, method="dhash"):
+    """
+    Calculates the perceptual hash of an image file.
+
+    The image is decoded at a quarter of its size, which is plenty for a 64-bit hash.
+
+    Args:
+        image_path (str): The path of the image.
+        method (str): "dhash" or "phash".
+
+    Returns:
+        int: The hash.
+        None: If the image could not be loaded.
+    """
+    gray_image = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray_image is None:
+        return None
+    return HASH_METHODS[method](gray_image)
+
+class BKTree:
+    def __init__(self):
+        """
+        Initializes an empty BK-tree over Hamming distance.
+
+        Each node is a list [hash, items, children] where children maps a distance to the
+        child node, so a search only visits subtrees that can hold a match.
+        """
+        self.root = None
+        self.size = 0
+
+    def add(self, hash_value, item):
+        """
+        Adds an item under a hash. Items with the same hash share a node.
+
+        Args:
+            hash_value (int): The hash of the item.
+            item: The value returned by searches, e.g. a file name.
+        """
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [item], {}]
+                return
+            node = child
+
+    def search(self, hash_value, max_distance):
+        """
+        Finds every item within max_distance of a hash.
+
+        Args:
+            hash_value (int): The hash to search for.
+            max_distance (int): The maximum Hamming distance of a match.
+
+        Returns:
+            list: (distance, item) tuples, closest first.
+        """
+        matches = []
+        pending = [self.root] if self.root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children in this distance band can hold a match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+        return sorted(matches, key=lambda match: match[0])
+
+    def nearest(self, hash_value, max_distance=HASH_SIZE * HASH_SIZE):
+        """
+        Finds the closest item to a hash.
+
+        Returns:
+            tuple: (distance, item), or None if nothing is within max_distance.
+        """
+        best = None
+        pending = [self.root] if self.root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, node[1][0])
+                max_distance = distance  # Shrink the search radius to the best match so far
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+        return best
+
+    def to_dict(self):
+        """
+        Returns the tree as JSON serializable nested lists.
+        """
+        def encode(node):
+            return [node[0], node[1], {str(distance): encode(child) for distance, child in node[2].items()}]
+        return {"size": self.size, "root": encode(self.root) if self.root is not None else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a tree saved with to_dict.
+        """
+        def decode(node):
+            return [node[0], node[1], {int(distance): decode(child) for distance, child in node[2].items()}]
+        tree = cls()
+        tree.size = data["size"]
+        tree.root = decode(data["root"]) if data["root"] is not None else None
+        return tree
+
+class GoldenHashIndex:
+    def __init__(self, golden_folder, index_file=None, method="dhash"):
+        """
+        Initializes a persisted perceptual-hash index of the golden images in a folder.
+
+        Call refresh() to hash new or changed golden images; unchanged ones keep the hash
+        stored in index_file.
+
+        Args:
+            golden_folder (str): The folder holding the golden images.
+            index_file (str): The JSON file the index is persisted to, defaults to
+                              golden_hash_index.json in the golden folder.
+            method (str): "dhash" or "phash".
+        """
+        self.golden_folder = golden_folder
+        self.index_file = index_file or os.path.join(golden_folder, "golden_hash_index.json")
+        self.method = method
+        self.files = {}
+        self.tree = BKTree()
+
+    def refresh(self):
+        """
+        Loads the persisted index, hashes new or changed golden images and saves it again.
+
+        Returns:
+            int: The number of golden images that had to be hashed.
+        """
+        stored = {}
+        stored_tree = None
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r") as file:
+                    data = json.load(file)
+                if data.get("method") == self.method:
+                    stored = data["files"]
+                    stored_tree = data.get("tree")
+            except (OSError, ValueError, KeyError):
+                pass  # Unreadable index, rebuild it from the images
+
+        files = {}
+        hashed = 0
+        for name in sorted(os.listdir(self.golden_folder)):
+            path = os.path.join(self.golden_folder, name)
+            if os.path.splitext(name)[1].lower() not in {".jpg", ".jpeg", ".png", ".bmp"} or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entry = stored.get(name)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                files[name] = entry
+                continue
+            hash_value = hash_image(path, self.method)
+            if hash_value is not None:
+                files[name] = [stat.st_size, stat.st_mtime_ns, hash_value]
+                hashed += 1
+
+        if stored_tree is not None and files == stored:
+            self.tree = BKTree.from_dict(stored_tree)
+        else:
+            self.tree = BKTree()
+            for name, (_, _, hash_value) in files.items():
+                self.tree.add(hash_value, name)
+        self.files = files
+
+        with open(self.index_file, "w") as file:
+            json.dump({"method": self.method, "files": files, "tree": self.tree.to_dict()}, file)
+        return hashed
+
+    def golden_hash(self, golden_file):
+        """
+        Returns the stored hash of a golden image, or None if it is not indexed.
+        """
+        entry = self.files.get(golden_file)
+        return entry[2] if entry else None
+
+    def find_closest_golden(self, image_path, max_distance=HASH_SIZE * HASH_SIZE):
+        """
+        Matches a capture to its closest golden image.
+
+        Args:
+            image_path (str): The path of the captured image.
+            max_distance (int): The maximum Hamming distance of a match.
+
+        Returns:
+            tuple: (golden_file, distance), or None if no golden image is close enough.
+        """
+        hash_value = hash_image(image_path, self.method)
+        if hash_value is None:
+            return None
+        match = self.tree.nearest(hash_value, max_distance)
+        if match is None:
+            return None
+        return match[1], match[0]
+
+def prefilter_decision(distance, fail_distance=DEFAULT_FAIL_DISTANCE):
+    """
+    Tells from its hash distance whether a pair looks like a different picture.
+
+    The hash only compares the direction of neighbouring gradients, so a "fail" still has to
+    be confirmed by the pixels, see grade_with_prefilter, and a small distance passes nothing.
+
+    Returns:
+        str: "fail" for a suspected failure, or None when the pair needs the full pixel diff.
+    """
+    if distance >= fail_distance:
+        return "fail"
+    return None
+
+def grade_with_prefilter(measurements, golden_index, media_folder, fail_distance=DEFAULT_FAIL_DISTANCE, **grade_options):
+    """
+    Grades a measurements table, failing obviously different pairs early from perceptual hashes.
+
+    A pair whose hash distance reaches fail_distance is checked on a coarse pyramid level
+    first, see ImageCompare.coarse_to_fine_differences without its pixel sample. The level's
+    score is a lower bound of the pixel diff, so a pair is only failed there when that bound
+    reaches its own threshold, and otherwise falls through to the exact diff. Every other
+    pair, and every pair whose measurement chose a metric, is graded by grade_batch.
+
+    Args:
+        measurements (list): (golden_file, comparison_file, percentage_threshold, config) tuples.
+        golden_index (GoldenHashIndex): A refreshed index of the golden folder.
+        media_folder (str): The folder holding the comparison images.
+        fail_distance (int): Hash distances at or above this are checked coarse to fine.
+        grade_options: Further grade_batch options such as golden_cache.
+
+    Returns:
+        list: One dict per measurement, in order, as returned by grade_batch plus the keys
+              hash_distance and decided_by ("hash" or "diff"). Pairs decided by hash were
+              failed on a pyramid level; their score is its lower bound and exact is False.
+    """
+    golden_folder = golden_index.golden_folder
+    size = grade_options.get("size", DEFAULT_SIZE)
+    results = [None] * len(measurements)
+    undecided = []
+    suspects = []
+
+    for index, measurement in enumerate(measurements):
+        golden_file, comparison_file = measurement[0], measurement[1]
+        if len(measurement) > 4:
+            # The threshold is in the units of the chosen metric, not a pixel difference
+            undecided.append((index, measurement, None))
+            continue
+        golden_hash = golden_index.golden_hash(golden_file)
+        comparison_hash = hash_image(os.path.join(media_folder, comparison_file), golden_index.method)
+        if golden_hash is None or comparison_hash is None:
+            undecided.append((index, measurement, None))  # Let grade_batch report the load error
+            continue
+
+        distance = hamming_distance(golden_hash, comparison_hash)
+        if prefilter_decision(distance, fail_distance) is None:
+            undecided.append((index, measurement, distance))
+            continue
+        reference_gray = load_grayscale(os.path.join(golden_folder, golden_file), size)
+        comparison_gray = load_grayscale(os.path.join(media_folder, comparison_file), size)
+        if reference_gray is None or comparison_gray is None:
+            undecided.append((index, measurement, distance))
+            continue
+        suspects.append((index, measurement, distance, reference_gray, comparison_gray))
+
+    if suspects:
+        # Without the sample every decision is either a certain failure or the exact diff
+        scores, decided_levels, exact = coarse_to_fine_differences(
+            np.stack([suspect[3] for suspect in suspects]), np.stack([suspect[4] for suspect in suspects]),
+            [suspect[1][2] for suspect in suspects], samples=0)
+        for position, (index, measurement, distance, _, _) in enumerate(suspects):
+            result = new_result(golden_folder, media_folder, *measurement)
+            result["score"] = float(scores[position])
+            result["passed"] = bool(scores[position] < result["threshold"])
+            result["decided_level"] = int(decided_levels[position])
+            result["exact"] = bool(exact[position])
+            result["hash_distance"] = distance
+            result["decided_by"] = "diff" if exact[position] else "hash"
+            results[index] = result
+
+    # Run the full diff for every pair the hash could not fail
+    graded = grade_batch([measurement for _, measurement, _ in undecided], golden_folder, media_folder, **grade_options)
+    for (index, _, distance), result in zip(undecided, graded):
+        result["hash_distance"] = distance
+        result["decided_by"] = "diff"
+        results[index] = result
+    return results
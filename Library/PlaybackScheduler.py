@@ -0,0 +1,141 @@
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Library.Player import VLC_PATH, build_vlc_command
+
+class PlaybackScheduler:
+    def __init__(self, max_instances, build_command, capture=None, play_time=6, capture_delay=5, displays=None, logger=None):
+        """
+        Initializes a scheduler that plays up to max_instances files at the same time.
+
+        Every running instance owns a slot number. The slot picks the instance's window
+        title, window position and optional virtual display, so captures go to the window
+        of the file that is being played.
+
+        Args:
+            max_instances (int): The maximum number of player instances running at once.
+            build_command (callable): build_command(file_path, slot) returns (command, window_title).
+            capture (callable): Optional capture(window_title, file_path) called capture_delay
+                                seconds after the player starts.
+            play_time (float): Seconds each file is played before its player is terminated.
+            capture_delay (float): Seconds between starting a player and capturing its window.
+            displays (list): Optional DISPLAY values, one is handed to each slot in turn.
+            logger (logging.Logger): Optional logger for scheduling events.
+        """
+        self.max_instances = max(1, int(max_instances))
+        self.build_command = build_command
+        self.capture = capture
+        self.play_time = play_time
+        self.capture_delay = capture_delay
+        self.displays = displays
+        self.logger = logger
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+        # Window activation and screen grabs share one screen, so captures run one at a time
+        self._capture_lock = threading.Lock()
+        self._slots = queue.Queue()
+
+    def _log(self, message):
+        """
+        Writes a message to the logger if one was given.
+        """
+        if self.logger is not None:
+            self.logger.debug(message)
+
+    def _play(self, file_path):
+        """
+        Plays one file in a free slot, captures its window and terminates the player.
+        """
+        slot = self._slots.get()
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+        result = {"file": file_path, "slot": slot, "window_title": None, "capture": None, "returncode": None, "error": None}
+        process = None
+        try:
+            command, window_title = self.build_command(file_path, slot)
+            result["window_title"] = window_title
+
+            env = None
+            if self.displays:
+                env = dict(os.environ, DISPLAY=self.displays[slot % len(self.displays)])
+
+            self._log(f"Slot {slot}: launching {' '.join(command)}")
+            started = time.monotonic()
+            process = subprocess.Popen(command, env=env)
+
+            # Capture once the player had time to render, unless it already exited
+            if self.capture is not None:
+                try:
+                    process.wait(timeout=self.capture_delay)
+                    result["error"] = f"Player exited before the capture with code {process.returncode}."
+                except subprocess.TimeoutExpired:
+                    with self._capture_lock:
+                        result["capture"] = self.capture(window_title, file_path)
+                    self._log(f"Slot {slot}: {result['capture']}")
+
+            # Let the player run for the rest of its play time
+            try:
+                process.wait(timeout=max(0, self.play_time - (time.monotonic() - started)))
+            except subprocess.TimeoutExpired:
+                pass
+        except Exception as e:
+            result["error"] = f"An unexpected error occurred: {e}"
+        finally:
+            if process is not None:
+                if process.poll() is None:
+                    process.terminate()
+                result["returncode"] = process.wait()  # Ensure the process is fully terminated
+            with self._lock:
+                self.active -= 1
+            self._slots.put(slot)
+            self._log(f"Slot {slot}: finished playing file: {file_path}")
+        return result
+
+    def run(self, file_paths):
+        """
+        Plays every file, never running more than max_instances players at once.
+
+        Args:
+            file_paths (iterable): The media files to play.
+
+        Returns:
+            list: One dict per file, in input order, with the keys file, slot, window_title,
+                  capture, returncode and error.
+        """
+        for slot in range(self.max_instances):
+            self._slots.put(slot)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_instances) as executor:
+                return list(executor.map(self._play, file_paths))
+        finally:
+            self._slots = queue.Queue()
+
+def vlc_command_builder(vlc_path=VLC_PATH, screen_size=(1920, 1080), columns=2, rows=2, **vlc_options):
+    """
+    Returns a build_command callable that gives every slot its own titled and tiled VLC window.
+
+    Args:
+        vlc_path (str): The path of the VLC executable.
+        screen_size (tuple): The (width, height) of the screen the windows are tiled on.
+        columns (int): The number of windows per row of the grid.
+        rows (int): The number of rows of the grid.
+        vlc_options: Further build_vlc_command options such as grayscale or stop_time.
+
+    Returns:
+        callable: build_command(file_path, slot) returning (command, window_title).
+    """
+    width = screen_size[0] // columns
+    height = screen_size[1] // rows
+
+    def build_command(file_path, slot):
+        window_title = f"OTF slot {slot} - {os.path.basename(file_path)}"
+        geometry = ((slot % columns) * width, (slot // columns % rows) * height, width, height)
+        command = build_vlc_command(file_path, vlc_path=vlc_path, video_title=window_title, window_geometry=geometry, **vlc_options)
+        return command, window_title
+    return build_command
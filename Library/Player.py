@@ -0,0 +1,78 @@
+import os
+
+# Path to VLC executable (update this path if VLC is installed elsewhere)
+VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
+
+# VLC appends this to the media title to build its main window title
+VLC_WINDOW_SUFFIX = " - VLC media player"
+
+def vlc_window_title(file_path):
+    """
+    Returns the title of the VLC window that plays a file with the default interface.
+
+    Args:
+        file_path (str): The path of the media file.
+
+    Returns:
+        str: The VLC window title.
+    """
+    return f"{os.path.basename(file_path)}{VLC_WINDOW_SUFFIX}"
+
+def build_vlc_command(file_path, vlc_path=VLC_PATH, no_video=False, grayscale=False, no_overlay=False, start_time=None,
+                      stop_time=None, server_port=None, iface=None, iface_addr=None, mtu=None, ipv6=False, ipv4=False,
+                      max_screen=None, video_title=None, window_geometry=None, rc_host=None):
+    """
+    Builds the VLC command line for playing a file with the specified options.
+
+    Args:
+        file_path (str): The path of the media file to play, None starts VLC with an empty playlist.
+        vlc_path (str): The path of the VLC executable.
+        video_title (str): Optional title of a standalone video window, used to tell instances apart.
+        window_geometry (tuple): Optional (x, y, width, height) of the standalone video window.
+        rc_host (str): Optional "host:port" the remote control interface listens on, see PlayerControl.
+
+    Returns:
+        list: The command and its arguments.
+    """
+    command = [vlc_path]
+    if file_path is not None:
+        command.append(file_path)
+
+    # Add optional parameters
+    if no_video:
+        command.append("--no-video")
+    if grayscale:
+        command.append("--grayscale")
+    if no_overlay:
+        command.append("--nooverlay")
+    if start_time is not None:
+        command.extend(["--start-time", str(start_time)])
+    if stop_time is not None:
+        command.extend(["--stop-time", str(stop_time)])
+    if server_port is not None:
+        command.extend(["--server-port", str(server_port)])
+    if iface is not None:
+        command.extend(["--iface", iface])
+    if iface_addr is not None:
+        command.extend(["--iface-addr", iface_addr])
+    if mtu is not None:
+        command.extend(["--mtu", str(mtu)])
+    if ipv6:
+        command.append("--ipv6")
+    if ipv4:
+        command.append("--ipv4")
+    if max_screen is not None:
+        command.append("--fullscreen")
+    if video_title is not None or window_geometry is not None:
+        # A standalone video window can be titled and placed independently of the interface
+        command.append("--no-embedded-video")
+    if video_title is not None:
+        command.extend(["--video-title", video_title])
+    if window_geometry is not None:
+        x, y, width, height = window_geometry
+        command.extend(["--video-x", str(x), "--video-y", str(y), "--width", str(width), "--height", str(height)])
+    if rc_host is not None:
+        # Keep the normal interface and add the remote control one, so files can be loaded by command
+        command.extend(["--extraintf", "rc", "--rc-host", rc_host])
+
+    return command
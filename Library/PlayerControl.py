@@ -0,0 +1,234 @@
+import socket
+import subprocess
+import time
+
+# Address VLC's remote control interface listens on, see build_vlc_command(rc_host=...)
+DEFAULT_RC_HOST = "127.0.0.1"
+DEFAULT_RC_PORT = 4212
+
+# VLC ends every reply of the remote control interface with this prompt
+RC_PROMPT = b"> "
+
+# Lines VLC sends on its own when the playback state changes, they are not part of a reply
+STATUS_PREFIX = "status change:"
+
+class RCClient:
+    def __init__(self, host=DEFAULT_RC_HOST, port=DEFAULT_RC_PORT, timeout=5):
+        """
+        Connects to the remote control (RC) interface of a running VLC instance.
+
+        Args:
+            host (str): The host the interface listens on.
+            port (int): The port the interface listens on.
+            timeout (float): Seconds to wait for a reply.
+
+        Raises:
+            OSError: If the connection fails or the greeting does not arrive in time.
+        """
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self._buffer = b""
+        self._read_reply()  # Skip the greeting
+
+    def _read_reply(self):
+        """
+        Reads up to the next prompt.
+
+        Returns:
+            list: The reply lines, without the status change lines.
+
+        Raises:
+            ConnectionError: If the player closed the connection.
+        """
+        while RC_PROMPT not in self._buffer:
+            data = self.socket.recv(4096)
+            if not data:
+                raise ConnectionError("The player closed the remote control connection.")
+            self._buffer += data
+        reply, self._buffer = self._buffer.split(RC_PROMPT, 1)
+        lines = reply.decode("utf-8", errors="replace").splitlines()
+        return [line.strip() for line in lines if line.strip() and not line.startswith(STATUS_PREFIX)]
+
+    def command(self, command):
+        """
+        Sends a command, e.g. "add C:\\Media\\clip.mp4" or "get_time", and returns its reply lines.
+        """
+        self.socket.sendall(command.encode("utf-8") + b"\n")
+        return self._read_reply()
+
+    def close(self):
+        """
+        Closes the connection, the player keeps running.
+        """
+        self.socket.close()
+
+class PersistentPlayer:
+    def __init__(self, command=None, host=DEFAULT_RC_HOST, port=DEFAULT_RC_PORT, connect_timeout=10, reply_timeout=5,
+                 logger=None):
+        """
+        Initializes one long-running player that loads every file over its remote control interface.
+
+        Starting VLC once saves the process startup, decoder initialization and window creation
+        of every file. The player is only started again when it exited or stopped answering.
+
+        Args:
+            command (list): The command that starts the player with its RC interface on host:port,
+                            e.g. build_vlc_command(None, rc_host="127.0.0.1:4212"). None attaches
+                            to a player that is already running.
+            host (str): The host the RC interface listens on.
+            port (int): The port the RC interface listens on.
+            connect_timeout (float): Seconds to wait for the interface after starting the player.
+            reply_timeout (float): Seconds to wait for the reply to a command.
+            logger (logging.Logger): Optional logger for player events.
+        """
+        self.launch_command = command
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.reply_timeout = reply_timeout
+        self.logger = logger
+        self.process = None
+        self.client = None
+        self.starts = 0
+
+    def _log(self, message):
+        """
+        Writes a message to the logger if one was given.
+        """
+        if self.logger is not None:
+            self.logger.debug(message)
+
+    def start(self):
+        """
+        Starts the player if needed and connects to its RC interface.
+
+        Raises:
+            RuntimeError: If the interface does not answer within connect_timeout.
+        """
+        self._disconnect()
+        if self.launch_command is not None and (self.process is None or self.process.poll() is not None):
+            self._log(f"Starting the player: {' '.join(self.launch_command)}")
+            self.process = subprocess.Popen(self.launch_command)
+        self.starts += 1
+
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                self.client = RCClient(self.host, self.port, self.reply_timeout)
+                return
+            except OSError as e:
+                if self.process is not None and self.process.poll() is not None:
+                    raise RuntimeError(f"The player exited with code {self.process.returncode} before its remote control interface answered.")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"The player's remote control interface did not answer on {self.host}:{self.port}: {e}")
+                time.sleep(0.1)
+
+    def _disconnect(self):
+        """
+        Closes the RC connection if there is one.
+        """
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def _stop_process(self):
+        """
+        Terminates the player process if this object started it.
+        """
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=self.reply_timeout)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.process = None
+
+    def command(self, command):
+        """
+        Sends a command, restarting the player once if it exited or stopped answering.
+
+        Returns:
+            list: The reply lines.
+        """
+        for attempt in range(2):
+            try:
+                if self.client is None or (self.process is not None and self.process.poll() is not None):
+                    self.start()
+                return self.client.command(command)
+            except (OSError, ConnectionError) as e:
+                # OSError covers socket timeouts, so a hung player is restarted as well
+                if attempt:
+                    raise
+                self._log(f"The player failed on '{command}' ({e}), restarting it")
+                self._disconnect()
+                self._stop_process()
+
+    def play(self, file_path, start_time=None, timeout=5):
+        """
+        Replaces the playlist with a file, waits for it to play and seeks to start_time.
+
+        Args:
+            file_path (str): The media file to play.
+            start_time (float): Optional seconds to seek to once playback started.
+            timeout (float): Seconds to wait for playback to start.
+
+        Returns:
+            bool: Whether the file is playing.
+        """
+        self.command("clear")
+        self.command(f"add {file_path}")
+        deadline = time.monotonic() + timeout
+        while not self.is_playing():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        if start_time:
+            self.seek(start_time)
+        return True
+
+    def seek(self, seconds):
+        """
+        Seeks the current file to a position in seconds.
+        """
+        self.command(f"seek {int(seconds)}")
+
+    def get_time(self):
+        """
+        Returns the playback position in seconds, or None if nothing is playing.
+        """
+        for line in self.command("get_time"):
+            if line.lstrip("-").isdigit():
+                return int(line)
+        return None
+
+    def is_playing(self):
+        """
+        Returns whether a file is playing.
+        """
+        return "1" in self.command("is_playing")
+
+    def stop(self):
+        """
+        Stops playback, the player keeps running for the next file.
+        """
+        self.command("stop")
+
+    def close(self):
+        """
+        Shuts the player down.
+        """
+        if self.client is not None:
+            try:
+                self.client.command("shutdown")
+            except (OSError, ConnectionError):
+                pass  # The player closes the connection as it shuts down
+        self._disconnect()
+        self._stop_process()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
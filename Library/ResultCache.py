@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import time
+from Library.ImageCompare import ALGORITHM_VERSION, DEFAULT_SIZE
+
+# Number of graded pairs kept before the least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 100000
+
+class ResultCache:
+    def __init__(self, cache_file, max_entries=DEFAULT_MAX_ENTRIES, algorithm_version=ALGORITHM_VERSION):
+        """
+        Initializes a persistent cache of grading scores keyed by image content.
+
+        A key is the SHA-256 of both images' contents plus the threshold and comparison
+        parameters, so renamed or touched files still hit and any changed pixel misses.
+        Opening a cache written by a different algorithm_version empties it.
+
+        Args:
+            cache_file (str): The SQLite file the scores are stored in.
+            max_entries (int): The number of scores kept; the least recently used are evicted.
+            algorithm_version (str): The version of the grading algorithm, see ImageCompare.ALGORITHM_VERSION.
+        """
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.algorithm_version = algorithm_version
+        self._digests = {}
+        # Hits waiting to be marked as recently used, written by the next put_many
+        self._touched = {}
+        self.connection = sqlite3.connect(cache_file, timeout=30)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                "(key TEXT PRIMARY KEY, score REAL NOT NULL, last_used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'algorithm_version'").fetchone()
+        if row is None or row[0] != algorithm_version:
+            # Scores of another algorithm version are meaningless, start over
+            self.connection.execute("DELETE FROM results")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('algorithm_version', ?)", (algorithm_version,))
+        self.connection.commit()
+
+    def file_digest(self, file_path):
+        """
+        Returns the SHA-256 of a file's contents, or None if it cannot be read.
+
+        Digests are remembered by path, size and modification time for the life of the
+        cache, so a golden image shared by many pairs is only hashed once.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            try:
+                with open(file_path, "rb") as file:
+                    for block in iter(lambda: file.read(1024 * 1024), b""):
+                        sha256.update(block)
+            except OSError:
+                return None
+            digest = self._digests[memo_key] = sha256.hexdigest()
+        return digest
+
+    def key(self, golden_path, comparison_path, percentage_threshold, size=DEFAULT_SIZE, color_mode="gray"):
+        """
+        Returns the cache key of a pair, or None if either image cannot be read.
+
+        Args:
+            golden_path (str): The path of the golden image.
+            comparison_path (str): The path of the comparison image.
+            percentage_threshold (float): The threshold the pair is graded against.
+            size (tuple): The (width, height) the images are resized to.
+            color_mode (str): The color space the images are compared in.
+        """
+        golden_digest = self.file_digest(golden_path)
+        comparison_digest = self.file_digest(comparison_path)
+        if golden_digest is None or comparison_digest is None:
+            return None
+        parts = [golden_digest, comparison_digest, repr(float(percentage_threshold)),
+                 f"{size[0]}x{size[1]}", color_mode, self.algorithm_version]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the stored score of a key, or None on a miss.
+
+        A hit marks the entry as recently used. The mark is kept in memory and written by the
+        next put_many, so a lookup never holds the write lock that other worker processes
+        sharing the cache file need while this one decodes and diffs a chunk.
+        """
+        row = self.connection.execute("SELECT score FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        return row[0]
+
+    def put_many(self, entries):
+        """
+        Stores (key, score) pairs in one transaction and evicts the least recently used
+        entries beyond max_entries.
+        """
+        now = time.time()
+        if self._touched:
+            self.connection.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                        [(last_used, key) for key, last_used in self._touched.items()])
+            self._touched.clear()
+        self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                    [(key, float(score), now) for key, score in entries])
+        excess = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.connection.execute("DELETE FROM results WHERE key IN "
+                                    "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,))
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes every stored score.
+        """
+        self.connection.execute("DELETE FROM results")
+        self.connection.commit()
+        self._digests.clear()
+        self._touched.clear()
+
+    def close(self):
+        """
+        Writes pending recently-used marks and closes the database.
+        """
+        self.put_many([])
+        self.connection.close()
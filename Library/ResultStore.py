@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import subprocess
+import time
+import uuid
+from Library.ImageCompare import ALGORITHM_VERSION, METRICS
+
+# Number of grades written per executemany call
+DEFAULT_BATCH_SIZE = 500
+
+# Days looked back by the trend and regression queries
+DEFAULT_HISTORY_DAYS = 90
+
+# What grades stored without graded_by were scored with: the default percentage difference
+DEFAULT_GRADED_BY = "absdiff"
+
+# Score change allowed by the regression query, in the units of what graded the config:
+# percentage points for the difference, histogram and model scores, dB for PSNR
+DEFAULT_TOLERANCE = 1.0
+DEFAULT_TOLERANCES = {"psnr": 1.0, "ssim": 0.02}
+
+# Seconds the single wmic query of the BIOS serial number may take
+BIOS_SERIAL_TIMEOUT = 10
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, started REAL NOT NULL, finished REAL, host TEXT, "
+    "bios_serial TEXT, suite_version TEXT, algorithm_version TEXT, timings TEXT)",
+    "CREATE TABLE IF NOT EXISTS grades (id INTEGER PRIMARY KEY, run_id TEXT NOT NULL REFERENCES runs (run_id), "
+    "graded_at REAL NOT NULL, host TEXT, config TEXT NOT NULL, golden TEXT, comparison TEXT, score REAL, "
+    "threshold REAL, passed INTEGER NOT NULL, error TEXT, graded_by TEXT, timings TEXT)",
+    # Trend queries filter on config and host over a time range, run reports on the run
+    "CREATE INDEX IF NOT EXISTS grades_config_host_time ON grades (config, host, graded_at)",
+    "CREATE INDEX IF NOT EXISTS grades_host_time ON grades (host, graded_at)",
+    "CREATE INDEX IF NOT EXISTS grades_run ON grades (run_id)",
+    "CREATE INDEX IF NOT EXISTS runs_host_started ON runs (host, started)",
+]
+
+def _bios_serial(timeout=BIOS_SERIAL_TIMEOUT):
+    """
+    Returns the BIOS serial number, or None where it cannot be read.
+
+    Unlike FunctionLibrary.get_bios_serial_number, which retries until wmic reports a
+    serial, wmic is asked once with a timeout, so a VM without a serial cannot hang a run.
+    """
+    try:
+        result = subprocess.run(["wmic", "bios", "get", "serialnumber"], capture_output=True, text=True,
+                                check=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    output_lines = result.stdout.strip().split("\n")
+    serial = output_lines[1].strip() if len(output_lines) > 1 else ""
+    return serial or None
+
+class ResultStore:
+    def __init__(self, db_file, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Initializes the history of every grade of every run, kept in a SQLite database.
+
+        Args:
+            db_file (str): The SQLite file, created with its tables and indexes if needed.
+            batch_size (int): The number of grades buffered by add_results before they are written.
+        """
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self._pending = []
+        self.connection = sqlite3.connect(db_file, timeout=30)
+        # Readers, e.g. a dashboard, do not block a run that is writing
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def start_run(self, host=None, bios_serial=None, suite_version=None, run_id=None, started=None):
+        """
+        Records the start of a run.
+
+        Args:
+            host (str): The host name, defaults to FunctionLibrary.get_hostname().
+            bios_serial (str): The BIOS serial number, defaults to one bounded wmic query, None if it fails.
+            suite_version (str): The test suite version, defaults to FunctionLibrary.get_test_suite_version().
+            run_id (str): A unique ID, defaults to a random one.
+            started (float): The start time as a Unix timestamp, defaults to now.
+
+        Returns:
+            str: The run ID.
+        """
+        from Library.FunctionLibrary import get_hostname, get_test_suite_version
+        run_id = run_id or uuid.uuid4().hex
+        self.connection.execute("INSERT INTO runs (run_id, started, host, bios_serial, suite_version, algorithm_version) "
+                                "VALUES (?, ?, ?, ?, ?, ?)",
+                                (run_id, started if started is not None else time.time(), host or get_hostname(),
+                                 bios_serial if bios_serial is not None else _bios_serial(),
+                                 suite_version or get_test_suite_version(), ALGORITHM_VERSION))
+        self.connection.commit()
+        return run_id
+
+    def add_results(self, run_id, results, graded_at=None):
+        """
+        Buffers grading results of a run; they are written in batches of batch_size.
+
+        Args:
+            run_id (str): The run the results belong to.
+            results (iterable): Result dicts as returned by ImageCompare.grade_batch. An
+                                optional timings dict is stored with each result.
+            graded_at (float): The grading time as a Unix timestamp, defaults to now.
+        """
+        host = self.connection.execute("SELECT host FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if host is None:
+            raise KeyError(f"Unknown run: {run_id}")
+        graded_at = graded_at if graded_at is not None else time.time()
+        for result in results:
+            timings = result.get("timings")
+            self._pending.append((run_id, graded_at, host[0], result["config"], result.get("golden"), result.get("comparison"),
+                                  None if result.get("score") is None else float(result["score"]),
+                                  result.get("threshold"), int(bool(result.get("passed"))), result.get("error"),
+                                  result.get("graded_by") or result.get("metric"), json.dumps(timings) if timings else None))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered grades in one transaction.
+        """
+        if self._pending:
+            self.connection.executemany("INSERT INTO grades (run_id, graded_at, host, config, golden, comparison, score, "
+                                        "threshold, passed, error, graded_by, timings) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+            self._pending = []
+        self.connection.commit()
+
+    def finish_run(self, run_id, timings=None):
+        """
+        Writes the buffered grades and records the end of a run.
+
+        Args:
+            run_id (str): The run ID.
+            timings (dict): Optional stage timings of the run, e.g. Instrumentation.summary().
+        """
+        self.flush()
+        self.connection.execute("UPDATE runs SET finished = ?, timings = ? WHERE run_id = ?",
+                                (time.time(), json.dumps(timings, default=float) if timings else None, run_id))
+        self.connection.commit()
+
+    def run_grades(self, run_id):
+        """
+        Returns the grades of a run as dicts, in the order they were added.
+        """
+        self.flush()
+        cursor = self.connection.execute("SELECT * FROM grades WHERE run_id = ? ORDER BY id", (run_id,))
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def trend(self, config, host=None, days=DEFAULT_HISTORY_DAYS, now=None):
+        """
+        Returns the daily score statistics of a config, e.g. how HEVC 60FPS drifted on one host.
+
+        Scores of different metrics are not comparable, so every day has one entry per
+        graded_by, e.g. when the config switched from the percentage difference to SSIM.
+
+        Args:
+            config (str): The config, e.g. "MKV_HEVC_60FPS".
+            host (str): Optional host name, None covers every host.
+            days (float): The number of days looked back.
+            now (float): The end of the range as a Unix timestamp, defaults to now.
+
+        Returns:
+            list: One dict per day and graded_by with grades, in date order, with the keys day
+                  (YYYY-MM-DD), graded_by (a metric name or "model"), count, mean, min, max
+                  and failures.
+        """
+        self.flush()
+        since = (now if now is not None else time.time()) - days * 86400
+        query = ("SELECT date(graded_at, 'unixepoch') AS day, COALESCE(graded_by, ?) AS scale, COUNT(*), AVG(score), "
+                 "MIN(score), MAX(score), SUM(1 - passed) FROM grades WHERE config = ? AND graded_at >= ?")
+        parameters = [DEFAULT_GRADED_BY, config, since]
+        if host is not None:
+            query += " AND host = ?"
+            parameters.append(host)
+        query += " GROUP BY day, scale ORDER BY day, scale"
+        return [{"day": day, "graded_by": graded_by, "count": count, "mean": mean, "min": low, "max": high,
+                 "failures": failures}
+                for day, graded_by, count, mean, low, high, failures in self.connection.execute(query, parameters)]
+
+    def regressions(self, run_id, days=DEFAULT_HISTORY_DAYS, tolerance=None):
+        """
+        Compares a run with the history of its host and returns the configs that got worse.
+
+        A config regressed when it failed in the run but passed on average before, or when
+        its score is more than tolerance worse than its mean over the previous days on the
+        same host. Only grades with the same graded_by make up the history, and a score is
+        worse below the mean for metrics where higher is better, e.g. SSIM.
+
+        Args:
+            run_id (str): The run to check.
+            days (float): The number of days of history before the run.
+            tolerance (float): The allowed score change in the units of every metric, None
+                               uses DEFAULT_TOLERANCES.
+
+        Returns:
+            list: One dict per regressed config with the keys config, graded_by, score,
+                  baseline_mean, baseline_count, passed and baseline_pass_rate.
+        """
+        self.flush()
+        row = self.connection.execute("SELECT host, started FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown run: {run_id}")
+        host, started = row
+        query = ("SELECT current.config, COALESCE(current.graded_by, ?), current.score, current.passed, AVG(history.score), "
+                 "COUNT(history.id), AVG(history.passed) FROM grades AS current "
+                 "JOIN grades AS history ON history.config = current.config AND history.host = ? "
+                 "AND COALESCE(history.graded_by, ?) = COALESCE(current.graded_by, ?) "
+                 "AND history.graded_at >= ? AND history.graded_at < ? AND history.run_id != current.run_id "
+                 "WHERE current.run_id = ? GROUP BY current.id ORDER BY current.id")
+        parameters = (DEFAULT_GRADED_BY, host, DEFAULT_GRADED_BY, DEFAULT_GRADED_BY, started - days * 86400, started, run_id)
+        regressions = []
+        for config, graded_by, score, passed, baseline_mean, baseline_count, baseline_pass_rate in self.connection.execute(
+                query, parameters):
+            allowed = tolerance if tolerance is not None else DEFAULT_TOLERANCES.get(graded_by, DEFAULT_TOLERANCE)
+            worse_score = False
+            if score is not None and baseline_mean is not None:
+                # Model scores are outlier percentages, lower is better as for the difference
+                if graded_by in METRICS and METRICS[graded_by]["higher_is_better"]:
+                    worse_score = score < baseline_mean - allowed
+                else:
+                    worse_score = score > baseline_mean + allowed
+            newly_failing = not passed and baseline_pass_rate >= 0.5
+            if worse_score or newly_failing:
+                regressions.append({"config": config, "graded_by": graded_by, "score": score, "baseline_mean": baseline_mean,
+                                    "baseline_count": baseline_count, "passed": bool(passed),
+                                    "baseline_pass_rate": baseline_pass_rate})
+        return regressions
+
+    def close(self):
+        """
+        Writes the buffered grades and closes the database.
+        """
+        self.flush()
+        self.connection.close()
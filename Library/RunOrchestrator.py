@@ -0,0 +1,189 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds each stage may take before it is abandoned. The capture and grade callables run in
+# threads, which cannot be killed, so give them their own timeouts as well; these are a backstop.
+DEFAULT_TIMEOUTS = {
+    "launch": 10,     # Starting the player process
+    "capture": 15,    # From launch until the capture callable returns
+    "terminate": 5,   # From terminate() until the player exited, it is killed afterwards
+    "grade": 120,     # Grading one capture
+}
+
+class RunOrchestrator:
+    def __init__(self, build_command, capture=None, grade=None, play_time=6, stop_after_capture=True, timeouts=None,
+                 logger=None):
+        """
+        Initializes an asyncio run of playback, capture and grading, one player at a time.
+
+        Every file is played in its own player process. Its capture runs in a thread while the
+        player is awaited, and the capture is always awaited before the next file starts, so a
+        capture never outlives its player. Grading runs on one background thread, so the
+        grading of file N overlaps the playback of file N+1.
+
+        Args:
+            build_command (callable): build_command(file_path) returns (command, window_title).
+            capture (callable): Optional blocking capture(window_title, file_path), started right
+                                after the player. Its return value is stored in the result.
+            grade (callable): Optional blocking grade(file_path, capture) called with the return
+                              value of capture. Its return value is stored in the result.
+            play_time (float): Seconds each file is played at most.
+            stop_after_capture (bool): Whether the player is stopped as soon as the capture returned.
+            timeouts (dict): Per-stage timeouts in seconds, overriding DEFAULT_TIMEOUTS.
+            logger (logging.Logger): Optional logger for run events.
+        """
+        self.build_command = build_command
+        self.capture = capture
+        self.grade = grade
+        self.play_time = play_time
+        self.stop_after_capture = stop_after_capture
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.logger = logger
+        # Players that are running, so a cancelled run can still stop them
+        self.processes = set()
+
+    def _log(self, message):
+        """
+        Writes a message to the logger if one was given.
+        """
+        if self.logger is not None:
+            self.logger.debug(message)
+
+    async def _stop(self, process):
+        """
+        Terminates a player and waits for it, killing it if it does not exit in time.
+
+        Returns:
+            int: The exit code of the player.
+        """
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), self.timeouts["terminate"])
+            except asyncio.TimeoutError:
+                self._log(f"Player {process.pid} ignored terminate, killing it")
+                process.kill()
+        returncode = await process.wait()
+        self.processes.discard(process)
+        return returncode
+
+    async def _play(self, file_path, result):
+        """
+        Plays one file and captures it, filling in result.
+
+        Returns:
+            bool: Whether a capture was made that can be graded.
+        """
+        timings = result["timings"]
+        command, window_title = self.build_command(file_path)
+        result["window_title"] = window_title
+
+        self._log(f"Launching {' '.join(command)}")
+        started = time.monotonic()
+        try:
+            process = await asyncio.wait_for(asyncio.create_subprocess_exec(*command), self.timeouts["launch"])
+        except asyncio.TimeoutError:
+            result["error"] = f"The player did not start within {self.timeouts['launch']} seconds."
+            return False
+        self.processes.add(process)
+        timings["launch"] = time.monotonic() - started
+
+        captured = False
+        try:
+            if self.capture is not None:
+                capture_started = time.monotonic()
+                capture_task = asyncio.ensure_future(asyncio.to_thread(self.capture, window_title, file_path))
+                exit_task = asyncio.ensure_future(process.wait())
+                try:
+                    done, _ = await asyncio.wait({capture_task, exit_task}, timeout=self.timeouts["capture"],
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if capture_task in done:
+                        result["capture"] = capture_task.result()
+                        captured = True
+                    elif exit_task in done:
+                        result["error"] = f"Player exited before the capture with code {process.returncode}."
+                    else:
+                        result["error"] = f"The capture did not finish within {self.timeouts['capture']} seconds."
+                finally:
+                    exit_task.cancel()
+                    if not capture_task.done():
+                        # The capture thread cannot be interrupted; stop its player so it gives up, then wait for it
+                        await self._stop(process)
+                        try:
+                            await asyncio.shield(capture_task)
+                        except Exception:
+                            pass
+                timings["capture"] = time.monotonic() - capture_started
+
+            # Let the player run for the rest of its play time
+            if process.returncode is None and not (captured and self.stop_after_capture):
+                try:
+                    await asyncio.wait_for(process.wait(), max(0, self.play_time - (time.monotonic() - started)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            result["returncode"] = await asyncio.shield(self._stop(process))
+            timings["play"] = time.monotonic() - started
+            self._log(f"Finished playing file: {file_path}")
+        return captured
+
+    def _grade(self, file_path, capture, result):
+        """
+        Grades a capture on the grading thread, filling in result.
+        """
+        started = time.monotonic()
+        try:
+            result["grade"] = self.grade(file_path, capture)
+        except Exception as e:
+            result["error"] = f"An error occurred while grading: {e}"
+        result["timings"]["grade"] = time.monotonic() - started
+        return result
+
+    async def run_async(self, file_paths):
+        """
+        Plays, captures and grades every file.
+
+        Cancelling the task stops the running player and cancels the grading that has not
+        started yet.
+
+        Args:
+            file_paths (iterable): The media files to play.
+
+        Returns:
+            list: One dict per file, in input order, with the keys file, window_title, capture,
+                  grade, returncode, error and timings (seconds per stage).
+        """
+        loop = asyncio.get_running_loop()
+        results = []
+        grading = []
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            for file_path in file_paths:
+                result = {"file": file_path, "window_title": None, "capture": None, "grade": None, "returncode": None,
+                          "error": None, "timings": {}}
+                results.append(result)
+                try:
+                    captured = await self._play(file_path, result)
+                except Exception as e:
+                    result["error"] = f"An unexpected error occurred: {e}"
+                    captured = False
+                if captured and self.grade is not None:
+                    grading.append((result, asyncio.wrap_future(executor.submit(self._grade, file_path, result["capture"], result))))
+
+            for result, grade_future in grading:
+                try:
+                    await asyncio.wait_for(asyncio.shield(grade_future), self.timeouts["grade"])
+                except asyncio.TimeoutError:
+                    result["error"] = f"Grading did not finish within {self.timeouts['grade']} seconds."
+            return results
+        finally:
+            for process in list(self.processes):
+                await asyncio.shield(self._stop(process))
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, file_paths):
+        """
+        Runs run_async in a new event loop and returns its results.
+        """
+        return asyncio.run(self.run_async(file_paths))
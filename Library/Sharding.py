@@ -0,0 +1,325 @@
+import json
+import os
+import socket
+import threading
+import time
+
+# Number of media files per shard
+DEFAULT_SHARD_SIZE = 8
+
+# Seconds between heartbeats of a worker, and seconds without one after which its claim is stale
+DEFAULT_HEARTBEAT_INTERVAL = 10
+DEFAULT_STALE_AFTER = 120
+
+# Files and folders in the shared work directory
+MANIFEST_NAME = "manifest.json"
+CLAIMS_FOLDER = "claims"
+RESULTS_FOLDER = "results"
+
+def _write_json(path, data):
+    """
+    Writes a JSON file atomically, so readers on other hosts never see a partial file.
+    """
+    temp_file = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temp_file, "w") as file:
+        # Grading results may hold numpy scalars
+        json.dump(data, file, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+    os.replace(temp_file, path)
+
+def _read_json(path):
+    """
+    Reads a JSON file, returning None if it is missing or unreadable.
+    """
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(work_dir, media_folder, video_files, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Splits the media files of a run into shards and writes the manifest to the work directory.
+
+    The files are stored relative to the media folder, so hosts may mount the library at
+    different paths. Claims and results of an earlier run in the work directory are removed.
+
+    Args:
+        work_dir (str): The shared work directory.
+        media_folder (str): The folder the media files are below.
+        video_files (list): The media files to run, e.g. from FunctionLibrary.scan_for_video_files.
+        shard_size (int): The number of files per shard.
+
+    Returns:
+        dict: The manifest, with the key shards holding {"id", "files"} dicts.
+    """
+    for folder in (CLAIMS_FOLDER, RESULTS_FOLDER):
+        path = os.path.join(work_dir, folder)
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+
+    files = [os.path.relpath(video_file, media_folder) for video_file in video_files]
+    shards = [{"id": f"shard-{number:04d}", "files": files[start:start + shard_size]}
+              for number, start in enumerate(range(0, len(files), shard_size))]
+    manifest = {"version": 1, "created": time.time(), "shards": shards}
+    _write_json(os.path.join(work_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+def read_manifest(work_dir):
+    """
+    Reads the manifest of a work directory.
+
+    Raises:
+        FileNotFoundError: If no manifest has been written.
+    """
+    manifest = _read_json(os.path.join(work_dir, MANIFEST_NAME))
+    if manifest is None:
+        raise FileNotFoundError(f"No shard manifest in {work_dir}")
+    return manifest
+
+def _claim_path(work_dir, shard_id):
+    return os.path.join(work_dir, CLAIMS_FOLDER, f"{shard_id}.lock")
+
+def _result_path(work_dir, shard_id):
+    return os.path.join(work_dir, RESULTS_FOLDER, f"{shard_id}.json")
+
+def _error_path(work_dir, shard_id):
+    return os.path.join(work_dir, RESULTS_FOLDER, f"{shard_id}.error.json")
+
+def _is_stale(claim_file, stale_after):
+    """
+    Returns whether a claim has not had a heartbeat for stale_after seconds.
+    """
+    try:
+        return time.time() - os.stat(claim_file).st_mtime > stale_after
+    except FileNotFoundError:
+        return False
+
+def _break_claim(claim_file, breaker):
+    """
+    Removes a stale claim. Of several hosts breaking the same claim, only one succeeds.
+
+    Returns:
+        bool: Whether this call removed the claim.
+    """
+    try:
+        with open(claim_file, "r") as file:
+            stale_owner = file.read()
+    except FileNotFoundError:
+        return False
+    moved = f"{claim_file}.{breaker}.stale"
+    try:
+        os.rename(claim_file, moved)
+    except FileNotFoundError:
+        return False  # Another host broke it first
+    with open(moved, "r") as file:
+        moved_owner = file.read()
+    if moved_owner != stale_owner:
+        # The claim was broken and taken again between the read and the rename, put it back
+        try:
+            os.link(moved, claim_file)
+        except OSError:
+            pass
+        os.remove(moved)
+        return False
+    os.remove(moved)
+    return True
+
+class ShardWorker:
+    def __init__(self, work_dir, media_folder, process_shard, worker_id=None, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL,
+                 stale_after=DEFAULT_STALE_AFTER, logger=None):
+        """
+        Initializes a worker that claims and runs shards of a manifest until none are left.
+
+        A shard is claimed by creating its lock file with O_EXCL, which succeeds on exactly
+        one host. While the shard runs, a heartbeat thread touches the lock file; a claim
+        without a heartbeat for stale_after seconds belongs to a crashed worker and may be
+        claimed again. The results of a shard are written to its own file in one step. When
+        process_shard raises, only the error is written, beside the results, and the claim is
+        released, so another worker or the next run retries the shard; this worker does not.
+
+        Args:
+            work_dir (str): The shared work directory holding the manifest.
+            media_folder (str): This host's path of the media folder the manifest is relative to.
+            process_shard (callable): process_shard(video_files) runs playback, capture and
+                                      grading and returns one JSON serializable result per file.
+            worker_id (str): A name unique across hosts, defaults to host name and process ID.
+            heartbeat_interval (float): Seconds between heartbeats.
+            stale_after (float): Seconds without a heartbeat after which a claim is stale.
+            logger (logging.Logger): Optional logger for shard events.
+        """
+        self.work_dir = work_dir
+        self.media_folder = media_folder
+        self.process_shard = process_shard
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.logger = logger
+        # IDs of the shards whose process_shard raised in this worker, mapped to the error
+        self.failed = {}
+
+    def _log(self, message):
+        """
+        Writes a message to the logger if one was given.
+        """
+        if self.logger is not None:
+            self.logger.debug(message)
+
+    def _try_claim(self, shard_id):
+        """
+        Creates the lock file of a shard, breaking a stale claim first.
+
+        Returns:
+            bool: Whether this worker now owns the shard.
+        """
+        claim_file = _claim_path(self.work_dir, shard_id)
+        for attempt in range(2):
+            try:
+                fd = os.open(claim_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if attempt or not _is_stale(claim_file, self.stale_after) or not _break_claim(claim_file, self.worker_id):
+                    return False
+                self._log(f"Worker {self.worker_id}: reclaiming stale {shard_id}")
+                continue
+            with os.fdopen(fd, "w") as file:
+                json.dump({"worker": self.worker_id, "claimed": time.time()}, file)
+            # Another worker may have finished the shard between the result check and the claim
+            if os.path.exists(_result_path(self.work_dir, shard_id)):
+                os.remove(claim_file)
+                return False
+            return True
+        return False
+
+    def claim(self):
+        """
+        Claims the first shard that has no result, no live claim and did not fail in this worker.
+
+        Returns:
+            dict: The shard, or None if every shard is done or claimed.
+        """
+        for shard in read_manifest(self.work_dir)["shards"]:
+            if shard["id"] in self.failed or os.path.exists(_result_path(self.work_dir, shard["id"])):
+                continue
+            if self._try_claim(shard["id"]):
+                return shard
+        return None
+
+    def _heartbeat(self, claim_file, stop_event):
+        """
+        Touches the claim file every heartbeat_interval seconds until stop_event is set.
+        """
+        while not stop_event.wait(self.heartbeat_interval):
+            try:
+                os.utime(claim_file)
+            except FileNotFoundError:
+                return
+
+    def run_shard(self, shard):
+        """
+        Runs a claimed shard and writes its results, or only its error if process_shard raises.
+
+        Returns:
+            bool: Whether the shard has results.
+        """
+        claim_file = _claim_path(self.work_dir, shard["id"])
+        stop_event = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(claim_file, stop_event), daemon=True)
+        heartbeat.start()
+        started = time.time()
+        try:
+            video_files = [os.path.join(self.media_folder, path) for path in shard["files"]]
+            entry = {"shard": shard["id"], "worker": self.worker_id, "files": shard["files"], "error": None}
+            try:
+                entry["results"] = self.process_shard(video_files)
+            except Exception as e:
+                # No result file, so the shard is not done and its files are not silently dropped
+                entry["error"] = f"{type(e).__name__}: {e}"
+                entry["seconds"] = time.time() - started
+                _write_json(_error_path(self.work_dir, shard["id"]), entry)
+                self.failed[shard["id"]] = entry["error"]
+            else:
+                entry["seconds"] = time.time() - started
+                _write_json(_result_path(self.work_dir, shard["id"]), entry)
+                try:
+                    os.remove(_error_path(self.work_dir, shard["id"]))  # Left by an earlier failed attempt
+                except FileNotFoundError:
+                    pass
+        finally:
+            stop_event.set()
+            heartbeat.join()
+            try:
+                os.remove(claim_file)
+            except FileNotFoundError:
+                pass
+        if shard["id"] in self.failed:
+            self._log(f"Worker {self.worker_id}: {shard['id']} failed: {self.failed[shard['id']]}")
+            return False
+        self._log(f"Worker {self.worker_id}: finished {shard['id']} in {time.time() - started:.1f}s")
+        return True
+
+    def run(self):
+        """
+        Claims and runs shards until every shard is done or claimed by a live worker.
+
+        Returns:
+            list: The IDs of the shards this worker ran successfully, see failed for the others.
+        """
+        done = []
+        while True:
+            shard = self.claim()
+            if shard is None:
+                return done
+            self._log(f"Worker {self.worker_id}: claimed {shard['id']}")
+            if self.run_shard(shard):
+                done.append(shard["id"])
+
+def merge_results(work_dir, report_file=None, stale_after=DEFAULT_STALE_AFTER, format_result=None):
+    """
+    Combines the partial results of a work directory in manifest order.
+
+    Shards without results whose claim is stale belong to crashed workers; their claims are
+    removed so the next ShardWorker.run picks them up again. Shards whose last run raised have
+    no results either; the report has a "Shard <id> failed: <error>" line for each.
+
+    Args:
+        work_dir (str): The shared work directory.
+        report_file (str): Optional path of a report with one line per result.
+        stale_after (float): Seconds without a heartbeat after which a claim is stale.
+        format_result (callable): Formats a result for the report, defaults to ImageCompare.format_result.
+
+    Returns:
+        dict: results (every result in manifest order), missing (IDs of shards without results),
+              reclaimed (the missing shards no live worker holds, free to be claimed again),
+              failed (IDs of the missing shards whose last process_shard raised) and errors
+              (failed shard ID -> error).
+    """
+    merged = {"results": [], "missing": [], "reclaimed": [], "failed": [], "errors": {}}
+    for shard in read_manifest(work_dir)["shards"]:
+        entry = _read_json(_result_path(work_dir, shard["id"]))
+        if entry is None:
+            merged["missing"].append(shard["id"])
+            failure = _read_json(_error_path(work_dir, shard["id"]))
+            if failure is not None:
+                merged["failed"].append(shard["id"])
+                merged["errors"][shard["id"]] = failure["error"]
+            claim_file = _claim_path(work_dir, shard["id"])
+            if not os.path.exists(claim_file) or (_is_stale(claim_file, stale_after) and _break_claim(claim_file, "merge")):
+                merged["reclaimed"].append(shard["id"])
+            continue
+        merged["results"].extend(entry["results"])
+
+    if report_file:
+        if format_result is None:
+            from Library.ImageCompare import format_result
+        report_dir = os.path.dirname(report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        with open(report_file, "w") as file:
+            for result in merged["results"]:
+                file.write(format_result(result) + "\n")
+            for shard_id in merged["missing"]:
+                if shard_id in merged["errors"]:
+                    file.write(f"Shard {shard_id} failed: {merged['errors'][shard_id]}\n")
+                else:
+                    file.write(f"Missing results of {shard_id}.\n")
+    return merged
@@ -0,0 +1,218 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import numpy as np
+
+if __name__ == "__main__":
+    # Allow running as "python Library/SimilarityMatrix.py", where the Library package is not on the path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.ImageCompare import DEFAULT_SIZE, load_grayscale
+
+# Extensions of the frame images picked up from a folder
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+# Frames named like "MKV_H.264_60FPS_screenshot_12.jpg" belong to the config "MKV_H.264_60FPS"
+FRAME_NAME_PATTERN = re.compile(r"^(?P<config>.+)_screenshot_(?P<number>\d+)$")
+
+# Number of frames on each side of a block of the matrix
+DEFAULT_BLOCK_SIZE = 32
+
+# Upper bound in bytes for the temporary difference array of one block
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+def _natural_key(name):
+    """
+    Sorts "screenshot_2" before "screenshot_10".
+    """
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+def group_frames_by_config(frames_folder):
+    """
+    Groups the frame images of a folder by config.
+
+    Every subfolder is treated as one config. Loose files are grouped by the part of their
+    name before "_screenshot_N".
+
+    Args:
+        frames_folder (str): The folder holding the frames.
+
+    Returns:
+        dict: config -> list of frame paths in natural order.
+    """
+    groups = {}
+    for entry in sorted(os.scandir(frames_folder), key=lambda entry: _natural_key(entry.name)):
+        if entry.is_dir():
+            frames = [os.path.join(entry.path, name) for name in sorted(os.listdir(entry.path), key=_natural_key)
+                      if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+            if frames:
+                groups[entry.name] = frames
+        elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+            match = FRAME_NAME_PATTERN.match(os.path.splitext(entry.name)[0])
+            config = match.group("config") if match else os.path.basename(os.path.normpath(frames_folder))
+            groups.setdefault(config, []).append(entry.path)
+    return groups
+
+def load_frame_stack(frame_paths, stack_file=None, size=DEFAULT_SIZE):
+    """
+    Loads frames into one N x H x W uint8 stack, one frame at a time.
+
+    Args:
+        frame_paths (list): The paths of the frames.
+        stack_file (str): Optional .npy file backing the stack, which keeps memory bounded
+                          for thousands of frames.
+        size (tuple): The (width, height) every frame is resized to.
+
+    Returns:
+        tuple: (stack, loaded_paths). Frames that could not be loaded are left out.
+    """
+    width, height = size
+    shape = (len(frame_paths), height, width)
+    if stack_file:
+        stack = np.lib.format.open_memmap(stack_file, mode="w+", dtype=np.uint8, shape=shape)
+    else:
+        stack = np.empty(shape, dtype=np.uint8)
+
+    loaded_paths = []
+    for path in frame_paths:
+        frame = load_grayscale(path, size)
+        if frame is not None:
+            stack[len(loaded_paths)] = frame
+            loaded_paths.append(path)
+    return stack[:len(loaded_paths)], loaded_paths
+
+def similarity_matrix(stack, block_size=DEFAULT_BLOCK_SIZE, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Computes the percentage difference between every pair of frames in a stack.
+
+    The matrix is filled block by block. Within a block the pixels are processed in tiles
+    sized so the temporary difference array stays below memory_budget, and only blocks on or
+    above the diagonal are computed because the matrix is symmetric.
+
+    Args:
+        stack (numpy.ndarray): N x H x W uint8 frames, may be a memory-mapped array.
+        block_size (int): The number of frames on each side of a block.
+        memory_budget (int): Upper bound in bytes for the temporary difference array.
+
+    Returns:
+        numpy.ndarray: N x N float64 percentage differences (0-100), zero on the diagonal.
+    """
+    count = stack.shape[0]
+    flat = stack.reshape(count, -1)
+    pixels = flat.shape[1]
+    matrix = np.zeros((count, count), dtype=np.float64)
+    # int16 differences, block_size x block_size x tile of them at a time
+    tile = max(1, min(pixels, memory_budget // (2 * block_size * block_size)))
+
+    for row_start in range(0, count, block_size):
+        rows = slice(row_start, min(row_start + block_size, count))
+        for column_start in range(row_start, count, block_size):
+            columns = slice(column_start, min(column_start + block_size, count))
+            sums = np.zeros((rows.stop - rows.start, columns.stop - columns.start), dtype=np.uint64)
+            for pixel_start in range(0, pixels, tile):
+                first = flat[rows, pixel_start:pixel_start + tile].astype(np.int16)
+                second = flat[columns, pixel_start:pixel_start + tile].astype(np.int16)
+                sums += np.abs(first[:, np.newaxis, :] - second[np.newaxis, :, :]).sum(axis=2, dtype=np.uint64)
+            block = sums / (pixels * 255) * 100
+            matrix[rows, columns] = block
+            matrix[columns, rows] = block.T
+    return matrix
+
+def summarize_matrix(matrix, frame_names):
+    """
+    Summarizes a similarity matrix for reports.
+
+    Returns:
+        dict: Frame count, min, mean and max off-diagonal difference, the most different pair
+              and the mean difference of every frame to all the others.
+    """
+    count = len(frame_names)
+    summary = {"frames": count, "min": None, "mean": None, "max": None, "max_pair": None, "per_frame_mean": {}}
+    if count < 2:
+        return summary
+    off_diagonal = matrix[~np.eye(count, dtype=bool)]
+    first, second = np.unravel_index(np.argmax(matrix), matrix.shape)
+    summary.update({
+        "min": float(off_diagonal.min()),
+        "mean": float(off_diagonal.mean()),
+        "max": float(off_diagonal.max()),
+        "max_pair": [frame_names[first], frame_names[second]],
+        "per_frame_mean": {name: float(value) for name, value in zip(frame_names, matrix.sum(axis=1) / (count - 1))},
+    })
+    return summary
+
+def save_matrix(matrix, frame_names, output_prefix):
+    """
+    Saves a similarity matrix as .npy, a labelled .csv and a .json summary.
+
+    Args:
+        matrix (numpy.ndarray): The N x N matrix.
+        frame_names (list): The N frame names labelling the rows and columns.
+        output_prefix (str): The path the three files are written to, without extension.
+
+    Returns:
+        dict: The summary written to the .json file.
+    """
+    output_dir = os.path.dirname(output_prefix)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    np.save(output_prefix + ".npy", matrix)
+
+    with open(output_prefix + ".csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([""] + frame_names)
+        for name, row in zip(frame_names, matrix):
+            writer.writerow([name] + [f"{value:.4f}" for value in row])
+
+    summary = summarize_matrix(matrix, frame_names)
+    with open(output_prefix + ".json", "w") as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+def run_study(frames_folder, output_folder, size=DEFAULT_SIZE, block_size=DEFAULT_BLOCK_SIZE, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Computes and saves the similarity matrix of every config found in a frames folder.
+
+    The frames of each config are staged in a memory-mapped stack in the output folder,
+    which is removed once its matrix is saved.
+
+    Args:
+        frames_folder (str): The folder holding the frames, see group_frames_by_config.
+        output_folder (str): The folder the <config>.npy/.csv/.json files are written to.
+        size (tuple): The (width, height) every frame is resized to.
+        block_size (int): The number of frames on each side of a block.
+        memory_budget (int): Upper bound in bytes for the temporary difference array.
+
+    Returns:
+        dict: config -> summary as returned by save_matrix.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    summaries = {}
+    for config, frame_paths in group_frames_by_config(frames_folder).items():
+        stack_file = os.path.join(output_folder, f"{config}.frames.npy")
+        stack, loaded_paths = load_frame_stack(frame_paths, stack_file, size)
+        try:
+            matrix = similarity_matrix(stack, block_size, memory_budget)
+        finally:
+            del stack
+            os.remove(stack_file)
+        frame_names = [os.path.basename(path) for path in loaded_paths]
+        summaries[config] = save_matrix(matrix, frame_names, os.path.join(output_folder, config))
+    return summaries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Computes all-pairs frame difference matrices per config.")
+    parser.add_argument("frames_folder", help="Folder of frames, one subfolder or _screenshot_N name prefix per config.")
+    parser.add_argument("output_folder", help="Folder the matrices and summaries are written to.")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    for config, summary in run_study(args.frames_folder, args.output_folder, block_size=args.block_size).items():
+        if summary["mean"] is None:
+            print(f"{config}: {summary['frames']} frame(s), nothing to compare.")
+        else:
+            print(f"{config}: {summary['frames']} frames, mean {summary['mean']:.2f}%, max {summary['max']:.2f}% "
+                  f"between '{summary['max_pair'][0]}' and '{summary['max_pair'][1]}'")
@@ -2,12 +2,21 @@ import subprocess
 import os
 import threading
 from Library.FrameworkLogging import CustomLogger
-from Library.FunctionLibrary import scan_for_video_files
-from Library.Capture import capture_window_still  # Import the capture function
+from Library.MediaIndex import stream_video_files
+from Library.MediaProbe import playback_window
+from Library.Capture import capture_when_ready, capture_frame_when_ready  # Import the capture functions
+from Library.GoldenArchive import DEFAULT_ARCHIVE_NAME, GoldenArchiveWriter
+from Library.GoldenModel import DEFAULT_MODEL_FOLDER, build_golden_model, model_path
+from Library.Player import VLC_PATH, build_vlc_command, vlc_window_title
+from Library.FrameSource import probe_video, read_frame_at, save_frames_parallel
+from Library import Instrumentation
+from Library.Instrumentation import span
 import time
+from PIL import Image
 
 def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overlay=False, start_time=None, stop_time=None,
-                           server_port=None, iface=None, iface_addr=None, mtu=None, ipv6=False, ipv4=False, max_screen=None):
+                           server_port=None, iface=None, iface_addr=None, mtu=None, ipv6=False, ipv4=False, max_screen=None,
+                           stop_event=None):
     """
     Launches VLC Media Player with the specified options and plays the given file.
 
@@ -19,48 +28,39 @@ def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overla
             logger.debug(f"File '{file_path}' does not exist.")
             return f"Error: The file '{file_path}' does not exist."
 
-        # Path to VLC executable (update this path if VLC is installed elsewhere)
-        vlc_path = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
-
         # Check if VLC is installed
-        if not os.path.exists(vlc_path):
-            logger.debug(f"VLC Media Player not found at '{vlc_path}'.")
+        if not os.path.exists(VLC_PATH):
+            logger.debug(f"VLC Media Player not found at '{VLC_PATH}'.")
             return "Error: VLC Media Player is not installed or the path is incorrect."
 
         # Build the VLC command
-        command = [vlc_path, file_path]
-
-        # Add optional parameters
-        if no_video:
-            command.append("--no-video")
-        if grayscale:
-            command.append("--grayscale")
-        if no_overlay:
-            command.append("--nooverlay")
-        if start_time is not None:
-            command.extend(["--start-time", str(start_time)])
-        if stop_time is not None:
-            command.extend(["--stop-time", str(stop_time)])
-        if max_screen is not None:
-            command.append("--fullscreen")
+        command = build_vlc_command(file_path, no_video=no_video, grayscale=grayscale, no_overlay=no_overlay,
+                                    start_time=start_time, stop_time=stop_time, server_port=server_port, iface=iface,
+                                    iface_addr=iface_addr, mtu=mtu, ipv6=ipv6, ipv4=ipv4, max_screen=max_screen)
 
         # Launch VLC with the specified options
         logger.debug(f"Launching VLC with command: {' '.join(command)}")
-        process = subprocess.Popen(command)
+        with span("vlc.launch", file=file_path):
+            process = subprocess.Popen(command)
 
         # Wait for the video to finish playing
-        if stop_time is not None:
-            time_to_play = stop_time - (start_time or 0)
-            print(f"Playing video '{file_path}' for {time_to_play} seconds...")
-            logger.debug(f"Playing video '{file_path}' for {time_to_play} seconds...")
-            time.sleep(time_to_play)  # Wait for the specified duration
-        else:
-            logger.debug(f"No stop time specified, waiting for the video to finish playing...")
-            process.wait()
+        with span("vlc.play", file=file_path):
+            if stop_time is not None:
+                time_to_play = stop_time - (start_time or 0)
+                print(f"Playing video '{file_path}' for {time_to_play} seconds...")
+                logger.debug(f"Playing video '{file_path}' for {time_to_play} seconds...")
+                if stop_event is not None:
+                    stop_event.wait(time_to_play)  # Wait for the specified duration or until the capture is done
+                else:
+                    time.sleep(time_to_play)  # Wait for the specified duration
+            else:
+                logger.debug(f"No stop time specified, waiting for the video to finish playing...")
+                process.wait()
 
         # Terminate the VLC process
-        process.terminate()
-        process.wait()  # Ensure the process is fully terminated
+        with span("vlc.terminate"):
+            process.terminate()
+            process.wait()  # Ensure the process is fully terminated
         logger.debug(f"VLC Media Player finished playing file: {file_path}")
         return f"VLC Media Player finished playing file: {file_path}"
     except subprocess.CalledProcessError as e:
@@ -70,18 +70,41 @@ def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overla
         logger.debug(f"An unexpected error occurred: {e}")
         return f"An unexpected error occurred: {e}"
 
-def capture_screenshot_async(window_title, output_image):
+def capture_screenshot_async(window_title, output_image, stop_event=None, timeout=6, target_time=None, on_frame=None):
     """
-    Captures a screenshot asynchronously after 3 seconds.
+    Captures a screenshot asynchronously as soon as the VLC window shows a settled picture.
+
+    Args:
+        window_title (str): The title of the VLC window.
+        output_image (str): The path to save the screenshot to.
+        stop_event (threading.Event): Optional event set once the capture is done, to stop the player.
+        timeout (float): The maximum number of seconds to wait for the window to be ready.
+        target_time (float): Optional seconds of playback to wait for before capturing.
+        on_frame (callable): Optional on_frame(frame) called with the lossless BGR capture,
+                             e.g. to add it to the golden archive.
+
+    Returns:
+        threading.Thread: The capture thread, join it before moving on to the next video.
     """
     def capture():
-        time.sleep(5)  # Wait for 5 seconds
-        capture_result = capture_window_still(window_title, output_image)
+        if on_frame is not None:
+            frame, capture_result = capture_frame_when_ready(window_title, timeout=timeout, target_time=target_time)
+            if frame is not None:
+                # Keep the loose JPEG for tools that still read the golden folder
+                Image.fromarray(frame[:, :, ::-1]).save(output_image, "JPEG")
+                on_frame(frame)
+                capture_result = f"Screenshot saved successfully to {output_image}."
+        else:
+            capture_result = capture_when_ready(window_title, output_image, timeout=timeout, target_time=target_time)
         logger.debug(capture_result)
         print(capture_result)
+        if stop_event is not None:
+            stop_event.set()  # Stop the player whether or not the capture succeeded
 
     # Start the capture in a separate thread
-    threading.Thread(target=capture).start()
+    capture_thread = threading.Thread(target=capture)
+    capture_thread.start()
+    return capture_thread
 
 if __name__ == "__main__":
     LogFileName = "Logging_Training.log"  # Initialize logging (optional, if you have FrameworkLogging set up)
@@ -90,8 +113,10 @@ if __name__ == "__main__":
     if os.path.exists(LogFileName):
         os.remove(LogFileName)
 
-    # Initialize the logger with a specific log file name
-    logger = CustomLogger(LogFileName).get_logger()
+    # Initialize the logger with a specific log file name. The log is written by a background
+    # thread so debug calls in the playback and capture loops never wait on the disk.
+    custom_logger = CustomLogger(LogFileName, queued=True)
+    logger = custom_logger.get_logger()
     logger.debug("Old log file has been deleted.")
     logger.debug("Starting Training script...")
 
@@ -105,25 +130,76 @@ if __name__ == "__main__":
     os.makedirs(golden_folder, exist_ok=True)
     logger.debug(f"Golden Images folder set to: {golden_folder}")
 
-    # Get the list of video files
-    video_files = scan_for_video_files(media_folder)
+    # Where golden images come from: "vlc" plays and captures the window, "decode" reads frames straight from the files.
+    # Use the same source in VLCTester.py, window captures and decoded frames do not compare.
+    frame_source = "vlc"
 
-    # Print the log file names to the debug log for verification
-    if video_files:
-        logger.debug(f"Video files found: {video_files}")
-    else:
-        logger.debug("No video files found in the specified media folder.")
+    # Optional index file that lets later runs skip unchanged folders, None scans the whole media folder
+    media_index_file = None
 
-    # Check if any video files were found
-    if not video_files:
-        print(f"No video files found in the folder: {media_folder}")
-        logger.warning(f"No video files found in the folder: {media_folder}")
-    else:
-        print(f"Found {len(video_files)} video files in the folder: {media_folder}")
-        logger.debug(f"Found {len(video_files)} video files in the folder: {media_folder}")
+    # Packed archive of lossless golden frames indexed by config, None only writes the loose JPEGs
+    golden_archive_file = os.path.join(golden_folder, DEFAULT_ARCHIVE_NAME)
+    golden_archive = GoldenArchiveWriter(golden_archive_file) if golden_archive_file else None
+
+    def archive_golden(video_file, frame, capture, timestamp=None):
+        """
+        Adds a golden frame and its stream details to the golden archive.
+        """
+        if golden_archive is not None:
+            config = os.path.splitext(os.path.basename(video_file))[0]
+            golden_archive.add(config, frame, capture=capture, timestamp=timestamp, source=os.path.basename(video_file),
+                               **probe_video(video_file))
+
+    # Frames decoded per video around the capture time for its statistical golden model, 0 turns the models off.
+    # The models are built from decoded frames, so they are only built when frame_source is "decode".
+    golden_model_samples = 0
+    golden_model_folder = os.path.join(golden_folder, DEFAULT_MODEL_FOLDER)
+
+    # Optional Chrome trace file (open it in chrome://tracing) with the timing of every stage, None turns timing off
+    trace_file = None
+    if trace_file:
+        Instrumentation.enable()
+
+    # Optional filter on the container header details of every file, e.g. lambda details: details["codec"] == "HEVC"
+    media_filter = None
 
+    # Stream the video files, so the first one is processed while the scan is still running. Their codec, frame rate
+    # and duration are read from the container headers (cached in the media index), so short files get a shorter play
+    # time and an earlier capture time, see MediaProbe.playback_window.
+    video_files = []
+    media_info = {}
+    def scanned_video_files():
+        for video_file in stream_video_files(media_folder, media_index_file,
+                                             on_change=lambda status, path: logger.debug(f"Video file {status}: {path}"),
+                                             media_info=media_info, media_filter=media_filter):
+            video_files.append(video_file)
+            yield video_file
+
+    if frame_source == "decode" and golden_archive is not None:
+        # Decode the golden frame of every video straight into the archive, next to the loose JPEG
+        for video_file in scanned_video_files():
+            golden_image_path = os.path.join(golden_folder, f"{os.path.splitext(os.path.basename(video_file))[0]}_golden.jpg")
+            capture_time = playback_window(media_info[video_file])[0]
+            frame = read_frame_at(video_file, capture_time, grayscale=True)
+            if frame is None:
+                result = f"Error: Could not decode a frame at {capture_time}s from '{video_file}'."
+            else:
+                archive_golden(video_file, frame, "decode", capture_time)
+                Image.fromarray(frame).save(golden_image_path, "JPEG")
+                result = f"Frame saved successfully to {golden_image_path}."
+            print(result)
+            logger.debug(result)
+    elif frame_source == "decode":
+        # Decode the golden frame of every video without a player or display
+        jobs = ((video_file, playback_window(media_info[video_file])[0],
+                 os.path.join(golden_folder, f"{os.path.splitext(os.path.basename(video_file))[0]}_golden.jpg"))
+                for video_file in scanned_video_files())
+        for result in save_frames_parallel(jobs):
+            print(result)
+            logger.debug(result)
+    else:
         # Process each video file
-        for video_file in video_files:
+        for video_file in scanned_video_files():
             print(f"Processing video: {video_file}")
             logger.debug(f"Processing video: {video_file}")
 
@@ -135,15 +211,21 @@ if __name__ == "__main__":
             logger.debug(f"Playing video {video_name} to capture golden image")
 
             # Construct the VLC window title dynamically
-            window_title = f"{os.path.basename(video_file)} - VLC media player"
+            window_title = vlc_window_title(video_file)
             logger.debug(f"Looking for VLC title: {window_title}")  
 
             # Construct the golden image path
             golden_image_path = os.path.join(golden_folder, f"{video_name}_golden.jpg")
             logger.debug(f"Golden image path: {golden_image_path}")
-         
+
             # Capture the VLC window screenshot asynchronously
-            capture_screenshot_async(window_title, golden_image_path)
+            stop_event = threading.Event()
+            on_frame = None
+            if golden_archive is not None:
+                on_frame = lambda frame, video_file=video_file: archive_golden(video_file, frame, "vlc")
+            stop_time = playback_window(media_info[video_file])[1]
+            capture_thread = capture_screenshot_async(window_title, golden_image_path, stop_event, timeout=stop_time,
+                                                      on_frame=on_frame)
 
             # Start VLC and play the video
             result = start_vlc_with_options(
@@ -151,8 +233,45 @@ if __name__ == "__main__":
                 no_video=False,
                 grayscale=True,
                 start_time=0,
-                stop_time=6,  # Play for 6 seconds
-                max_screen=True
+                stop_time=stop_time,  # Play for 6 seconds, or to the end of a shorter video
+                max_screen=True,
+                stop_event=stop_event  # Stop as soon as the screenshot has been captured
             )
 
-            print(result)
\ No newline at end of file
+            capture_thread.join()  # Never let a capture outlive its player
+            print(result)
+
+    if golden_model_samples and frame_source == "decode":
+        # Learn the frame-to-frame jitter of every video, so VLCTester.py grades by normalized deviation
+        for video_file in video_files:
+            config = os.path.splitext(os.path.basename(video_file))[0]
+            model = build_golden_model(video_file, golden_model_samples, center_time=playback_window(media_info[video_file])[0])
+            if model.count:
+                model.save(model_path(golden_model_folder, config))
+                result = f"Golden model of {config} built from {model.count} frames."
+            else:
+                result = f"Error: Could not decode any frame for the golden model of '{video_file}'."
+            print(result)
+            logger.debug(result)
+
+    # Check if any video files were found
+    if not video_files:
+        print(f"No video files found in the folder: {media_folder}")
+        logger.warning(f"No video files found in the folder: {media_folder}")
+    else:
+        print(f"Processed {len(video_files)} video files in the folder: {media_folder}")
+        logger.debug(f"Processed {len(video_files)} video files in the folder: {media_folder}")
+
+    if golden_archive is not None:
+        golden_archive.close()
+        logger.debug(f"Golden archive written to {golden_archive_file}")
+
+    # Export where the time went, when timing instrumentation is on
+    if trace_file:
+        Instrumentation.export_chrome_trace(trace_file)
+        stage_summary = Instrumentation.format_summary()
+        print(stage_summary)
+        logger.info(f"Stage timings, trace written to {trace_file}:\n{stage_summary}")
+
+    # Flush the queued log records before exiting
+    custom_logger.stop()
@@ -0,0 +1,66 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+from Benchmark.RunBenchmarks import NO_BASELINE_STATUS, compare_to_baseline, main, make_media_tree
+from Library.FunctionLibrary import scan_for_video_files
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary directory for the benchmark files.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_compare_to_baseline(self):
+        """
+        Test that only benchmarks slower than the baseline plus tolerance are regressions.
+        """
+        baseline = {"fast": {"median_s": 1.0}, "slow": {"median_s": 1.0}, "removed": {"median_s": 1.0}}
+        results = {"fast": {"median_s": 1.2}, "slow": {"median_s": 1.3}, "new": {"median_s": 9.0}}
+        self.assertEqual(compare_to_baseline(results, baseline, 0.25), [("slow", 1.0, 1.3)])
+
+    def test_make_media_tree(self):
+        """
+        Test that the synthetic tree holds the reported number of video files.
+        """
+        videos = make_media_tree(self.test_dir.name, 12, 6)
+        self.assertEqual(len(scan_for_video_files(self.test_dir.name)), videos)
+
+    def test_main_fails_on_regression(self):
+        """
+        Test that a quick run fails without a baseline, passes against its own and fails against an impossibly fast one.
+        """
+        output = os.path.join(self.test_dir.name, "results.json")
+        baseline = os.path.join(self.test_dir.name, "baseline.json")
+        arguments = ["--quick", "--repeat", "1", "--output", output, "--baseline", baseline]
+
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            self.assertEqual(main(arguments), NO_BASELINE_STATUS)
+        self.assertIn("NO BASELINE", printed.getvalue())
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(arguments + ["--update-baseline"]), 0)
+            self.assertEqual(main(arguments + ["--tolerance", "100"]), 0)
+
+            with open(baseline) as file:
+                report = json.load(file)
+            for result in report["benchmarks"].values():
+                result["median_s"] = 1e-9
+            with open(baseline, "w") as file:
+                json.dump(report, file)
+            self.assertEqual(main(arguments), 1)
+
+        with open(output) as file:
+            self.assertIn("grade.640x480", json.load(file)["benchmarks"])
+
+if __name__ == "__main__":
+    unittest.main()
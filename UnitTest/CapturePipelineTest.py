@@ -0,0 +1,124 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.CapturePipeline import ArchiveWriter, CapturePipeline
+from Library.GoldenModel import GoldenModel, model_path
+from Library.ImageCompare import grade_batch, grade_frame
+
+class TestCapturePipeline(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a golden image and a matching and a failing in-memory capture.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.media_folder = self.test_dir.name
+        self.golden_folder = os.path.join(self.media_folder, "Golden_Images")
+        os.makedirs(self.golden_folder)
+
+        gradient = np.add.outer(np.linspace(0, 200, 240), np.linspace(0, 50, 320)).astype(np.uint8)
+        self.golden = np.dstack([gradient] * 3)
+        cv2.imwrite(os.path.join(self.golden_folder, "clip_golden.jpg"), self.golden)
+        self.failing = 255 - self.golden
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_grade_frame_matches_grade_batch(self):
+        """
+        Test that grading an array gives the same score as grading the same image from a lossless file.
+        """
+        cv2.imwrite(os.path.join(self.media_folder, "clip_screenshot.png"), self.failing)
+        measurement = ("clip_golden.jpg", "clip_screenshot.png", 5, "clip")
+
+        from_file = grade_batch([measurement], self.golden_folder, self.media_folder)[0]
+        from_memory = grade_frame(self.failing, self.golden_folder, self.media_folder, *measurement)
+        self.assertAlmostEqual(from_memory["score"], from_file["score"])
+        self.assertFalse(from_memory["passed"])
+
+    def test_grade_frame_errors(self):
+        """
+        Test that a missing golden image or a missing frame are reported as errors.
+        """
+        result = grade_frame(self.golden, self.golden_folder, self.media_folder, "missing_golden.png", "x.jpg", 5, "x")
+        self.assertIn("reference image", result["error"])
+        result = grade_frame(None, self.golden_folder, self.media_folder, "clip_golden.jpg", "x.jpg", 5, "x")
+        self.assertEqual(result["error"], "No frame was captured.")
+
+    def test_only_failures_are_archived(self):
+        """
+        Test that a passing capture is not written while a failing one is, under the screenshot name.
+        """
+        video_file = os.path.join(self.media_folder, "clip.mp4")
+        with CapturePipeline(self.golden_folder, self.media_folder, os.path.join(self.golden_folder, "Cache")) as pipeline:
+            passed = pipeline.grade_capture(video_file, self.golden)
+        self.assertTrue(passed["passed"])
+        self.assertNotIn("archived", passed)
+        self.assertFalse(os.path.exists(os.path.join(self.media_folder, "clip.mp4_screenshot.jpg")))
+
+        with CapturePipeline(self.golden_folder, self.media_folder) as pipeline:
+            failed = pipeline.grade_capture(video_file, self.failing)
+        self.assertTrue(failed["archived"])
+        self.assertEqual(pipeline.writer.written, [failed["comparison"]])
+        self.assertTrue(os.path.exists(os.path.join(self.media_folder, "clip.mp4_screenshot.jpg")))
+
+    def test_models_and_metrics_are_applied(self):
+        """
+        Test that captures are scored against a golden model where one exists, unless a metric was chosen.
+        """
+        model_folder = os.path.join(self.golden_folder, "Models")
+        model = GoldenModel()
+        model.update(self.golden)
+        model.save(model_path(model_folder, "clip"))
+        video_file = os.path.join(self.media_folder, "clip.mp4")
+
+        with CapturePipeline(self.golden_folder, self.media_folder, archive="none", golden_model_folder=model_folder) as pipeline:
+            modelled = pipeline.grade_capture(video_file, self.golden)
+            failed = pipeline.grade_capture(video_file, self.failing)
+            plain = pipeline.grade_capture(os.path.join(self.media_folder, "other.mp4"), self.golden)
+        self.assertEqual((modelled["graded_by"], modelled["passed"]), ("model", True))
+        self.assertEqual((failed["graded_by"], failed["passed"]), ("model", False))
+        self.assertNotIn("graded_by", plain)
+        self.assertIn("reference image", plain["error"])
+
+        with CapturePipeline(self.golden_folder, self.media_folder, archive="none", golden_model_folder=model_folder,
+                             percentage_threshold=30, metric="psnr") as pipeline:
+            chosen = pipeline.grade_capture(video_file, self.failing)
+        self.assertNotIn("graded_by", chosen)
+        self.assertEqual(chosen["metric_choice"], "psnr")
+        self.assertFalse(chosen["passed"])
+
+    def test_archive_modes(self):
+        """
+        Test that "all" archives every capture, "none" writes nothing, and unknown modes are rejected.
+        """
+        pipeline = CapturePipeline(self.golden_folder, self.media_folder, archive="all")
+        pipeline.grade_capture(os.path.join(self.media_folder, "clip.mp4"), self.golden)
+        self.assertEqual(len(pipeline.close()), 1)
+        self.assertEqual(len(pipeline.writer.written), 1)
+
+        pipeline = CapturePipeline(self.golden_folder, self.media_folder, archive="none")
+        self.assertIsNone(pipeline.writer)
+        self.assertTrue(pipeline.grade_capture(os.path.join(self.media_folder, "clip.mp4"), self.golden)["passed"])
+        pipeline.close()
+
+        with self.assertRaises(ValueError):
+            CapturePipeline(self.golden_folder, self.media_folder, archive="sometimes")
+
+    def test_archive_writer_reports_errors(self):
+        """
+        Test that a write that fails is reported instead of stopping the writer.
+        """
+        writer = ArchiveWriter()
+        writer.submit(os.path.join(self.media_folder, "missing", "frame.jpg"), self.golden)
+        writer.submit(os.path.join(self.media_folder, "frame.jpg"), self.golden)
+        writer.close()
+        self.assertEqual(len(writer.errors), 1)
+        self.assertEqual(writer.written, [os.path.join(self.media_folder, "frame.jpg")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 import os
 import tempfile
-from Library.FunctionLibrary import scan_for_video_files
+import types
+from Library.FunctionLibrary import iter_video_files, scan_for_video_files
 
 class TestScanForVideoFiles(unittest.TestCase):
     def setUp(self):
@@ -82,5 +83,16 @@ class TestScanForVideoFiles(unittest.TestCase):
         # Assert that the result is an empty list
         self.assertEqual(result, [])
 
+    def test_iter_video_files_streams(self):
+        """
+        Test that iter_video_files yields the same video files lazily, one at a time.
+        """
+        result = iter_video_files(self.test_dir.name)
+        self.assertIsInstance(result, types.GeneratorType)
+
+        first = next(result)
+        self.assertIn(os.path.splitext(first)[1], {".mkv", ".mp4", ".mpg"})
+        self.assertEqual(sorted([first] + list(result)), sorted(scan_for_video_files(self.test_dir.name)))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
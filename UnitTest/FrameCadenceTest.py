@@ -0,0 +1,96 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from PIL import Image
+from Library.FrameCadence import FrameCadenceAnalyzer, analyze_frames, analyze_video
+
+def panning_frame(picture, color=False):
+    """
+    Returns picture number picture of a sawtooth pattern panning 2 pixels per picture, so every step differs equally.
+    """
+    ramp = (np.arange(320) % 160 * 255 / 160).astype(np.uint8)
+    frame = np.roll(np.tile(ramp, (240, 1)), 2 * picture, axis=1)
+    return np.dstack([frame] * 3) if color else frame
+
+def event_types(events):
+    """
+    Returns (type, frame, frames) of every event.
+    """
+    return [(event["type"], event["frame"], event["frames"]) for event in events]
+
+class TestFrameCadence(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder for the video files.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_duplicate_and_dropped_frames(self):
+        """
+        Test that a repeated picture and a skipped one are found, also across buffer boundaries.
+        """
+        pictures = list(range(6)) + [5] + list(range(6, 10)) + list(range(11, 100))
+        events, summary = analyze_frames([panning_frame(picture) for picture in pictures], fps=240, buffer_frames=8)
+        self.assertEqual(event_types(events), [("duplicate", 6, 1), ("stutter", 7, 2), ("dropped", 11, 1)])
+        self.assertEqual((summary["frames"], summary["cadence"]), (len(pictures), 1))
+
+    def test_timestamp_gaps(self):
+        """
+        Test that frames missing from the timestamps count as dropped, even when the content shows no jump.
+        """
+        timestamps = [index / 120 for index in range(40) if index not in (20, 21, 22)]
+        events, summary = analyze_frames([(timestamp, panning_frame(index)) for index, timestamp in enumerate(timestamps)],
+                                         buffer_frames=16)
+        self.assertEqual(event_types(events), [("dropped", 20, 3)])
+        self.assertAlmostEqual(summary["fps"], 120)
+
+    def test_half_rate_cadence_and_stutter(self):
+        """
+        Test that 30 FPS content in a 60 FPS stream has cadence 2 and a picture held for 3 frames stutters.
+        """
+        pictures = [index // 2 for index in range(120)]
+        pictures[62] = pictures[61]  # Picture 30 is shown a third time, picture 31 only once
+        events, summary = analyze_frames([panning_frame(picture, color=True) for picture in pictures], fps=60)
+        self.assertEqual([event for event in event_types(events) if event[0] != "duplicate"], [("stutter", 63, 3)])
+        self.assertEqual((summary["cadence"], summary["effective_fps"], summary["duplicates"]), (2, 30, 60))
+
+    def test_still_content_and_screenshots(self):
+        """
+        Test that a still picture is not reported as duplicates and that PIL screenshots are accepted.
+        """
+        analyzer = FrameCadenceAnalyzer(buffer_frames=4)
+        screenshot = Image.fromarray(panning_frame(0, color=True))
+        for _ in range(10):
+            self.assertEqual(analyzer.push(screenshot), [])
+        self.assertEqual(analyzer.flush(), [])
+        self.assertEqual(analyzer.summary()["mean_diff"], 0)
+
+    def test_decoded_video(self):
+        """
+        Test the analysis of a decoded file with a duplicated and a skipped picture.
+        """
+        video_path = os.path.join(self.test_dir.name, "MP4_H.264_240FPS.avi")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 240, (320, 240))
+        if not writer.isOpened():
+            self.skipTest("OpenCV cannot write MJPEG")
+        for picture in list(range(30)) + [29] + list(range(30, 40)) + list(range(42, 60)):
+            writer.write(panning_frame(picture, color=True))
+        writer.release()
+
+        events, summary = analyze_video(video_path)
+        self.assertEqual([(event["type"], event["frame"]) for event in events if event["type"] != "stutter"],
+                         [("duplicate", 30), ("dropped", 41)])
+        self.assertEqual(event_types(events)[-1], ("dropped", 41, 2))
+        self.assertEqual(summary["frames"], 59)
+        self.assertAlmostEqual(summary["fps"], 240)
+
+if __name__ == "__main__":
+    unittest.main()
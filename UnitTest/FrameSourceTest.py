@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.FrameSource import iter_frames, iter_frames_at, read_frame_at, save_frame, save_frames_parallel
+
+def write_test_video(video_path, frame_count=40, fps=10):
+    """
+    Writes a small video whose frame N is a flat gray of brightness N * 5.
+    """
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for index in range(frame_count):
+        writer.write(np.full((48, 64, 3), index * 5, dtype=np.uint8))
+    writer.release()
+
+def frame_number(frame):
+    """
+    Recovers the frame number from a frame written by write_test_video.
+    """
+    return int(round(float(np.mean(frame)) / 5))
+
+class TestFrameSource(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary directory with a synthetic test video.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.test_dir.name, "clip.avi")
+        write_test_video(self.video_path)
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_read_frame_at(self):
+        """
+        Test that read_frame_at decodes the frame at the requested timestamp.
+        """
+        frame = read_frame_at(self.video_path, 2.5)
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertEqual(frame_number(frame), 25)
+
+        self.assertEqual(read_frame_at(self.video_path, 1.2, grayscale=True).ndim, 2)
+
+    def test_iter_frames_at_seeks_and_decodes_forward(self):
+        """
+        Test that a mix of nearby and distant timestamps all decode the right frames.
+        """
+        results = list(iter_frames_at(self.video_path, [3.5, 0.3, 0.5, 1.0]))
+
+        self.assertEqual([timestamp for timestamp, _ in results], [0.3, 0.5, 1.0, 3.5])
+        self.assertEqual([frame_number(frame) for _, frame in results], [3, 5, 10, 35])
+
+    def test_past_the_end_and_missing_file(self):
+        """
+        Test that timestamps past the end and missing files return None instead of raising.
+        """
+        self.assertIsNone(read_frame_at(self.video_path, 60))
+        self.assertIsNone(read_frame_at(os.path.join(self.test_dir.name, "missing.mp4"), 1))
+
+    def test_iter_frames_step(self):
+        """
+        Test that sequential decoding yields every step-th frame.
+        """
+        frames = [frame_number(frame) for _, frame in iter_frames(self.video_path, step=10)]
+        self.assertEqual(frames, [0, 10, 20, 30])
+
+    def test_save_frames_parallel(self):
+        """
+        Test that frames from several jobs are saved across worker processes.
+        """
+        jobs = [(self.video_path, timestamp, os.path.join(self.test_dir.name, f"frame{index}.png"))
+                for index, timestamp in enumerate([0.5, 1.5, 2.5])]
+        results = save_frames_parallel(jobs, workers=2)
+
+        for (_, timestamp, output_file), result in zip(jobs, results):
+            self.assertEqual(result, f"Frame saved successfully to {output_file}.")
+            self.assertEqual(frame_number(cv2.imread(output_file)), int(timestamp * 10))
+
+    def test_save_frame_missing_file(self):
+        """
+        Test that save_frame reports a missing media file.
+        """
+        result = save_frame("missing.mp4", 1, os.path.join(self.test_dir.name, "out.jpg"))
+        self.assertEqual(result, "Error: The file 'missing.mp4' does not exist.")
+
+if __name__ == "__main__":
+    unittest.main()
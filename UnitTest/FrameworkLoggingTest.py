@@ -0,0 +1,124 @@
+import unittest
+import json
+import logging
+import os
+import tempfile
+import threading
+from Library.FrameworkLogging import CustomLogger
+
+class TestCustomLogger(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary directory for the log files.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def read_lines(self, log_file):
+        """
+        Returns the lines of a log file.
+        """
+        with open(log_file) as file:
+            return file.read().splitlines()
+
+    def test_queued_logger_writes_after_stop(self):
+        """
+        Test that records logged through the queue are all written once the logger is stopped.
+        """
+        log_file = os.path.join(self.test_dir.name, "logs", "queued.log")
+        custom_logger = CustomLogger(log_file, queued=True)
+        logger = custom_logger.get_logger()
+        for index in range(100):
+            logger.debug(f"message {index}")
+        custom_logger.stop()
+
+        lines = self.read_lines(log_file)
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[-1].endswith("- message 99"))
+        self.assertIn("DEBUG", lines[0])
+
+    def test_queued_records_are_formatted_by_the_listener(self):
+        """
+        Test that tracebacks are formatted by the listener thread and that arguments are captured when logging.
+        """
+        custom_logger = CustomLogger(os.path.join(self.test_dir.name, "deferred.log"), queued=True)
+        formatting_threads = []
+        formatter = custom_logger.file_handler.formatter
+        def record_thread(record):
+            formatting_threads.append((threading.current_thread(), record.exc_info is not None))
+            return logging.Formatter.format(formatter, record)
+        formatter.format = record_thread
+
+        frames = [1, 2]
+        custom_logger.get_logger().info("frames %s", frames)
+        frames.append(3)
+        try:
+            raise ValueError("no frame")
+        except ValueError:
+            custom_logger.get_logger().exception("capture failed")
+        custom_logger.stop()
+
+        self.assertTrue(all(thread is not threading.current_thread() for thread, _ in formatting_threads))
+        self.assertEqual([has_traceback for _, has_traceback in formatting_threads], [False, True])
+        lines = self.read_lines(custom_logger.log_file)
+        self.assertTrue(lines[0].endswith("- frames [1, 2]"))
+        self.assertEqual(lines[-1], "ValueError: no frame")
+
+    def test_two_loggers_write_their_own_files(self):
+        """
+        Test that a second logger with another file name is not ignored.
+        """
+        first = CustomLogger(os.path.join(self.test_dir.name, "first.log"))
+        second = CustomLogger(os.path.join(self.test_dir.name, "second.log"))
+        first.get_logger().info("to first")
+        second.get_logger().info("to second")
+        first.stop()
+        second.stop()
+
+        self.assertEqual(len(self.read_lines(first.log_file)), 1)
+        self.assertTrue(self.read_lines(second.log_file)[0].endswith("- to second"))
+
+    def test_json_lines_and_debug_sampling(self):
+        """
+        Test that JSON output has one object per record and that debug calls in a loop are sampled.
+        """
+        custom_logger = CustomLogger(os.path.join(self.test_dir.name, "run.log"), queued=True, per_run=True,
+                                     json_lines=True, debug_sample_every=10)
+        logger = custom_logger.get_logger()
+        for index in range(25):
+            logger.debug(f"frame {index}")
+        logger.warning("done")
+        custom_logger.stop()
+
+        self.assertRegex(os.path.basename(custom_logger.log_file), r"^run_\d{8}-\d{6}_\d+\.log$")
+        entries = [json.loads(line) for line in self.read_lines(custom_logger.log_file)]
+        self.assertEqual([entry["message"] for entry in entries], ["frame 0", "frame 10", "frame 20", "done"])
+        self.assertEqual(entries[-1]["level"], "WARNING")
+
+    def test_size_rotation(self):
+        """
+        Test that size rotation rolls the log file over and keeps backup_count old files.
+        """
+        log_file = os.path.join(self.test_dir.name, "rotating.log")
+        custom_logger = CustomLogger(log_file, rotation="size", max_bytes=500, backup_count=2)
+        for index in range(50):
+            custom_logger.get_logger().info(f"line {index}")
+        custom_logger.stop()
+
+        self.assertEqual(sorted(os.listdir(self.test_dir.name)), ["rotating.log", "rotating.log.1", "rotating.log.2"])
+        self.assertLessEqual(os.path.getsize(log_file), 500)
+
+    def test_unknown_rotation(self):
+        """
+        Test that an unknown rotation mode is rejected.
+        """
+        with self.assertRaises(ValueError):
+            CustomLogger(os.path.join(self.test_dir.name, "bad.log"), rotation="weekly")
+
+if __name__ == "__main__":
+    unittest.main()
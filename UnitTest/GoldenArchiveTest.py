@@ -0,0 +1,110 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.GoldenArchive import ALIGNMENT, GoldenArchive, GoldenArchiveWriter
+from Library.ImageCompare import grade_batch, grade_folders
+
+class TestGoldenArchive(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder and two lossless golden frames.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.archive_file = os.path.join(self.test_dir.name, "Golden_Images", "golden_archive.otfa")
+        rng = np.random.default_rng(2)
+        self.gray = rng.integers(0, 256, size=(48, 64), dtype=np.uint8)
+        self.color = rng.integers(0, 256, size=(30, 40, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_round_trip(self):
+        """
+        Test that frames come back bit-exact as aligned memory maps, with their metadata.
+        """
+        with GoldenArchiveWriter(self.archive_file) as writer:
+            writer.add("MKV_H.264_60FPS", self.gray, codec="H264", container="mkv", fps=60.0, timestamp=5)
+            writer.add("MP4_HEVC_60FPS", self.color)
+
+        archive = GoldenArchive(self.archive_file)
+        self.assertEqual(archive.configs(), ["MKV_H.264_60FPS", "MP4_HEVC_60FPS"])
+        self.assertIn("MP4_HEVC_60FPS", archive)
+        self.assertNotIn("MKV_HEVc_29.97FPs", archive)
+
+        frame = archive.frame("MKV_H.264_60FPS")
+        self.assertIsInstance(frame, np.memmap)
+        np.testing.assert_array_equal(frame, self.gray)
+        np.testing.assert_array_equal(archive.frame("MP4_HEVC_60FPS"), self.color)
+        self.assertEqual(archive.index["frames"]["MP4_HEVC_60FPS"]["offset"] % ALIGNMENT, 0)
+        self.assertEqual(archive.metadata("MKV_H.264_60FPS"),
+                         {"codec": "H264", "container": "mkv", "fps": 60.0, "timestamp": 5, "resolution": [64, 48]})
+
+    def test_rewrite_keeps_existing_configs(self):
+        """
+        Test that writing some configs again replaces them and keeps the others.
+        """
+        with GoldenArchiveWriter(self.archive_file) as writer:
+            writer.add("first", self.gray)
+            writer.add("second", self.gray)
+        with GoldenArchiveWriter(self.archive_file) as writer:
+            writer.add("second", self.gray[::2, ::2])
+
+        archive = GoldenArchive(self.archive_file)
+        self.assertEqual(sorted(archive.configs()), ["first", "second"])
+        self.assertEqual(archive.frame("second").shape, (24, 32))
+        np.testing.assert_array_equal(archive.frame("first"), self.gray)
+
+    def test_failed_write_leaves_archive_untouched(self):
+        """
+        Test that an exception while writing discards the new archive.
+        """
+        with GoldenArchiveWriter(self.archive_file) as writer:
+            writer.add("first", self.gray)
+        with self.assertRaises(RuntimeError):
+            with GoldenArchiveWriter(self.archive_file, keep_existing=False) as writer:
+                writer.add("second", self.gray)
+                raise RuntimeError("capture failed")
+
+        self.assertEqual(GoldenArchive(self.archive_file).configs(), ["first"])
+        self.assertEqual(os.listdir(os.path.dirname(self.archive_file)), ["golden_archive.otfa"])
+
+    def test_not_an_archive(self):
+        """
+        Test that other files are rejected.
+        """
+        other_file = os.path.join(self.test_dir.name, "other.bin")
+        with open(other_file, "wb") as file:
+            file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            GoldenArchive(other_file)
+
+    def test_grading_reads_the_archive(self):
+        """
+        Test that the grader picks golden frames by config from the archive instead of loose files.
+        """
+        golden_folder = os.path.dirname(self.archive_file)
+        media_folder = self.test_dir.name
+        cv2.imwrite(os.path.join(media_folder, "clip.mp4_screenshot.png"), self.gray)
+        with GoldenArchiveWriter(self.archive_file) as writer:
+            writer.add("clip", self.gray)
+
+        measurements = [("clip_golden.jpg", "clip.mp4_screenshot.png", 5, "clip")]
+        result, = grade_batch(measurements, golden_folder, media_folder, golden_archive=GoldenArchive(self.archive_file))
+        self.assertEqual(result["score"], 0.0)
+        self.assertEqual(result["golden"], f"{self.archive_file}#clip")
+
+        # grade_folders opens the archive itself, the loose golden file is only needed without it
+        cv2.imwrite(os.path.join(media_folder, "clip.mp4_screenshot.jpg"), self.gray)
+        video_files = [os.path.join(media_folder, "clip.mp4")]
+        result, = grade_folders(media_folder, golden_folder, video_files, golden_archive_file=self.archive_file)
+        self.assertTrue(result["passed"])
+        result, = grade_folders(media_folder, golden_folder, video_files)
+        self.assertIn("reference image", result["error"])
+
+if __name__ == "__main__":
+    unittest.main()
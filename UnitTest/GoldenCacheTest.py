@@ -0,0 +1,81 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from unittest.mock import patch
+from Library.GoldenCache import GoldenCache
+from Library.ImageCompare import grade_batch, load_grayscale
+
+class TestGoldenCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary golden image and cache folder for each test case.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.cache_folder = os.path.join(self.test_dir.name, "cache")
+        self.golden_path = os.path.join(self.test_dir.name, "clip_golden.png")
+        rng = np.random.default_rng(1)
+        cv2.imwrite(self.golden_path, rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8))
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_get_returns_preprocessed_memmap(self):
+        """
+        Test that the cache returns a memory-mapped copy of the preprocessed golden image.
+        """
+        cache = GoldenCache(self.cache_folder)
+        cached = cache.get(self.golden_path)
+
+        self.assertIsInstance(cached, np.memmap)
+        np.testing.assert_array_equal(cached, load_grayscale(self.golden_path))
+
+    def test_get_skips_decoding_when_cached(self):
+        """
+        Test that a second lookup does not decode the golden image again.
+        """
+        GoldenCache(self.cache_folder).get(self.golden_path)
+
+        with patch("Library.GoldenCache.load_grayscale") as mock_load:
+            GoldenCache(self.cache_folder).get(self.golden_path)
+            mock_load.assert_not_called()
+
+    def test_entry_invalidated_when_golden_changes(self):
+        """
+        Test that a modified golden image replaces its stale cache entry.
+        """
+        cache = GoldenCache(self.cache_folder)
+        cache.get(self.golden_path)
+
+        cv2.imwrite(self.golden_path, np.zeros((300, 400, 3), dtype=np.uint8))
+        stat = os.stat(self.golden_path)
+        os.utime(self.golden_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        cached = cache.get(self.golden_path)
+        self.assertEqual(int(np.max(cached)), 0)
+        self.assertEqual(len(os.listdir(self.cache_folder)), 1)
+
+    def test_get_missing_image(self):
+        """
+        Test that a missing golden image returns None.
+        """
+        cache = GoldenCache(self.cache_folder)
+        self.assertIsNone(cache.get(os.path.join(self.test_dir.name, "missing.png")))
+
+    def test_grade_batch_with_cache(self):
+        """
+        Test that grade_batch gives the same scores with and without the golden cache.
+        """
+        cv2.imwrite(os.path.join(self.test_dir.name, "clip_screenshot.png"), np.full((300, 400, 3), 128, dtype=np.uint8))
+        measurements = [("clip_golden.png", "clip_screenshot.png", 5, "Clip")]
+
+        uncached = grade_batch(measurements, self.test_dir.name, self.test_dir.name)
+        cached = grade_batch(measurements, self.test_dir.name, self.test_dir.name, golden_cache=GoldenCache(self.cache_folder))
+        self.assertEqual(uncached[0]["score"], cached[0]["score"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.GoldenModel import GoldenModel, build_golden_model, grade_with_models, model_path
+from Library.ImageCompare import format_result, grade_folders, preprocess_image
+from UnitTest.FrameSourceTest import write_test_video
+
+SIZE = (80, 60)
+
+class TestGoldenModel(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder and jittered frames of the same gradient.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(4)
+        self.gradient = np.add.outer(np.linspace(40, 200, 60), np.linspace(0, 20, 80))
+        self.frames = [self.jittered() for _ in range(20)]
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def jittered(self, noise=6):
+        """
+        Returns the gradient with the given standard deviation of noise, as a uint8 frame.
+        """
+        return np.clip(self.gradient + self.rng.normal(0, noise, self.gradient.shape), 0, 255).astype(np.uint8)
+
+    def test_streaming_statistics_match_numpy(self):
+        """
+        Test that the streaming mean and standard deviation match the batch ones, also after a merge.
+        """
+        model = GoldenModel(SIZE)
+        for frame in self.frames:
+            model.update(frame)
+        stack = np.stack(self.frames).astype(np.float64)
+        np.testing.assert_allclose(model.mean, stack.mean(axis=0))
+        np.testing.assert_allclose(model.std, stack.std(axis=0, ddof=1))
+
+        first, second = GoldenModel(SIZE), GoldenModel(SIZE)
+        for frame in self.frames[:7]:
+            first.update(frame)
+        for frame in self.frames[7:]:
+            second.update(frame)
+        first.merge(second)
+        self.assertEqual(first.count, 20)
+        np.testing.assert_allclose(first.std, model.std)
+
+    def test_score_tolerates_learned_jitter(self):
+        """
+        Test that a jittered capture has few outlier pixels while different content has many.
+        """
+        model = GoldenModel(SIZE)
+        for frame in self.frames:
+            model.update(frame)
+        self.assertLess(model.score(self.jittered()), 1)
+        self.assertGreater(model.score(255 - self.frames[0]), 50)
+        gray = preprocess_image(self.frames[0], SIZE)
+        self.assertEqual(model.score_gray(gray), model.score(self.frames[0]))
+
+        # A single frame has no spread, the minimum standard deviation still absorbs small noise
+        single = GoldenModel(SIZE)
+        single.update(self.frames[0])
+        self.assertEqual(single.score(self.frames[0]), 0.0)
+        self.assertEqual(single.score(np.clip(self.frames[0].astype(int) + 3, 0, 255)), 0.0)
+
+    def test_save_and_load(self):
+        """
+        Test that a saved model scores the same after loading.
+        """
+        model = GoldenModel(SIZE)
+        for frame in self.frames:
+            model.update(frame)
+        model_file = model_path(os.path.join(self.test_dir.name, "Models"), "clip")
+        model.save(model_file)
+
+        loaded = GoldenModel.load(model_file)
+        self.assertEqual((loaded.count, loaded.size), (20, SIZE))
+        capture = self.jittered(noise=12)
+        self.assertAlmostEqual(loaded.score(capture), model.score(capture), places=3)
+
+    def test_build_from_video(self):
+        """
+        Test that the model of a video is built from frames decoded around the capture time.
+        """
+        video_path = os.path.join(self.test_dir.name, "clip.avi")
+        write_test_video(video_path)
+        model = build_golden_model(video_path, samples=5, center_time=2, window=1, size=SIZE)
+        self.assertEqual(model.count, 5)
+        # Frames 15 to 25 are the grays 75 to 125
+        self.assertAlmostEqual(float(model.mean.mean()), 100, delta=3)
+
+        missing = build_golden_model(os.path.join(self.test_dir.name, "missing.avi"), samples=3, size=SIZE)
+        self.assertEqual(missing.count, 0)
+
+    def test_grading_uses_models_where_they_exist(self):
+        """
+        Test that videos with a model are scored against it and the others against their golden image.
+        """
+        media_folder = self.test_dir.name
+        golden_folder = os.path.join(media_folder, "Golden_Images")
+        model_folder = os.path.join(golden_folder, "Models")
+        os.makedirs(golden_folder)
+        model = GoldenModel()
+        for frame in self.frames:
+            model.update(frame)
+        model.save(model_path(model_folder, "modelled"))
+        cv2.imwrite(os.path.join(golden_folder, "plain_golden.jpg"), self.frames[0])
+        for config in ("modelled", "plain"):
+            cv2.imwrite(os.path.join(media_folder, f"{config}.mp4_screenshot.jpg"), self.jittered())
+
+        measurements = [("modelled_golden.jpg", "modelled.mp4_screenshot.jpg", 5, "modelled"),
+                        ("plain_golden.jpg", "plain.mp4_screenshot.jpg", 5, "plain"),
+                        ("missing_golden.jpg", "missing.mp4_screenshot.jpg", 5, "missing")]
+        modelled, plain, missing = grade_with_models(measurements, model_folder, golden_folder, media_folder)
+        self.assertEqual(modelled["graded_by"], "model")
+        self.assertTrue(modelled["passed"])
+        self.assertIn("outside the golden model", format_result(modelled))
+        self.assertNotIn("graded_by", plain)
+        self.assertIsNotNone(plain["score"])
+        self.assertIsNotNone(missing["error"])
+
+        video_files = [os.path.join(media_folder, "modelled.mp4")]
+        result, = grade_folders(media_folder, golden_folder, video_files, workers=2, golden_model_folder=model_folder)
+        self.assertEqual(result["graded_by"], "model")
+
+        # A metric choice is honored against the golden image rather than dropped by the model
+        chosen, = grade_with_models([("modelled_golden.jpg", "modelled.mp4_screenshot.jpg", 5, "modelled", "psnr")],
+                                    model_folder, golden_folder, media_folder)
+        self.assertNotIn("graded_by", chosen)
+        self.assertEqual(chosen["metric_choice"], "psnr")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,285 @@
+import unittest
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.ImageCompare import build_measurements, coarse_to_fine_differences, format_result, grade_batch, grade_folders, grade_parallel, iter_grade_parallel, load_grayscale, percentage_differences, DEFAULT_SIZE
+from Library.ImageCompare import MAX_PSNR, SAMPLED_LEVEL, histogram_distances, metric_grades, metric_stages, psnr_values, ssim_values
+
+class TestGradeBatch(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary golden and media folder with lossless test images.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.golden_folder = os.path.join(self.test_dir.name, "Golden_Images")
+        self.media_folder = self.test_dir.name
+        os.makedirs(self.golden_folder)
+
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 256, size=(600, 800, 3), dtype=np.uint8)
+        changed = base.copy()
+        changed[:300] = 255 - changed[:300]  # Invert the top half of the image
+
+        cv2.imwrite(os.path.join(self.golden_folder, "same_golden.png"), base)
+        cv2.imwrite(os.path.join(self.media_folder, "same_screenshot.png"), base)
+        cv2.imwrite(os.path.join(self.golden_folder, "changed_golden.png"), base)
+        cv2.imwrite(os.path.join(self.media_folder, "changed_screenshot.png"), changed)
+
+        self.measurements = [
+            ("same_golden.png", "same_screenshot.png", 5, "Same"),
+            ("changed_golden.png", "changed_screenshot.png", 5, "Changed"),
+            ("missing_golden.png", "same_screenshot.png", 5, "Missing"),
+        ]
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def expected_percentage(self, golden_file, comparison_file):
+        """
+        Computes the percentage difference of a pair the way grade() always has.
+        """
+        reference = load_grayscale(os.path.join(self.golden_folder, golden_file))
+        comparison = load_grayscale(os.path.join(self.media_folder, comparison_file))
+        difference = cv2.absdiff(reference, comparison)
+        return np.sum(difference) / (reference.size * 255) * 100
+
+    def test_grade_batch_results(self):
+        """
+        Test that grade_batch returns one structured result per measurement, in order.
+        """
+        results = grade_batch(self.measurements, self.golden_folder, self.media_folder)
+
+        self.assertEqual([result["config"] for result in results], ["Same", "Changed", "Missing"])
+
+        self.assertEqual(results[0]["score"], 0.0)
+        self.assertTrue(results[0]["passed"])
+
+        self.assertAlmostEqual(results[1]["score"], self.expected_percentage("changed_golden.png", "changed_screenshot.png"))
+        self.assertFalse(results[1]["passed"])
+
+        self.assertIsNone(results[2]["score"])
+        self.assertFalse(results[2]["passed"])
+        self.assertIn("reference image", results[2]["error"])
+
+    def test_grade_batch_chunking(self):
+        """
+        Test that grading in small chunks gives the same scores as a single chunk.
+        """
+        single = grade_batch(self.measurements, self.golden_folder, self.media_folder)
+        chunked = grade_batch(self.measurements, self.golden_folder, self.media_folder, chunk_size=1)
+        self.assertEqual([r["score"] for r in single], [r["score"] for r in chunked])
+
+    def test_grade_parallel_matches_batch(self):
+        """
+        Test that grading across worker processes returns the batch results in measurement order.
+        """
+        report_file = os.path.join(self.test_dir.name, "report.txt")
+        serial = grade_batch(self.measurements, self.golden_folder, self.media_folder)
+        parallel = grade_parallel(self.measurements, self.golden_folder, self.media_folder, workers=2, chunk_size=1, report_file=report_file)
+
+        self.assertEqual([(r["config"], r["score"], r["passed"]) for r in serial],
+                         [(r["config"], r["score"], r["passed"]) for r in parallel])
+
+        # The report lists every measurement in measurement order
+        with open(report_file) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("same_golden.png", lines[0])
+        self.assertIn("Limit EXCEEDED 'changed_golden.png'", lines[1])
+        self.assertTrue(lines[2].startswith("Error grading 'missing_golden.png'"))
+
+    def test_iter_grade_parallel_yields_every_index(self):
+        """
+        Test that the streamed results cover every measurement exactly once.
+        """
+        indexes = [index for index, _ in iter_grade_parallel(self.measurements, self.golden_folder, self.media_folder, workers=2, chunk_size=1)]
+        self.assertEqual(sorted(indexes), [0, 1, 2])
+
+    def test_grade_folders_uses_capture_names(self):
+        """
+        Test that grade_folders pairs each video with the golden and screenshot names the scripts write.
+        """
+        base = cv2.imread(os.path.join(self.golden_folder, "same_golden.png"))
+        cv2.imwrite(os.path.join(self.golden_folder, "clip_golden.jpg"), base)
+        cv2.imwrite(os.path.join(self.media_folder, "clip.mp4_screenshot.jpg"), base)
+        video_file = os.path.join(self.media_folder, "clip.mp4")
+
+        self.assertEqual(build_measurements([video_file], 3), [("clip_golden.jpg", "clip.mp4_screenshot.jpg", 3, "clip")])
+
+        results = grade_folders(self.media_folder, self.golden_folder, [video_file])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["config"], "clip")
+        self.assertTrue(results[0]["passed"])
+
+    def test_percentage_differences_shape(self):
+        """
+        Test that percentage_differences returns one score per stacked pair.
+        """
+        width, height = DEFAULT_SIZE
+        reference = np.zeros((4, height, width), dtype=np.uint8)
+        comparison = np.full((4, height, width), 255, dtype=np.uint8)
+        comparison[0] = 0
+        scores = percentage_differences(reference, comparison)
+        self.assertEqual(list(scores), [0.0, 100.0, 100.0, 100.0])
+
+class TestCoarseToFine(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up stacks of pairs that pass clearly, fail clearly and sit on the threshold.
+        """
+        width, height = DEFAULT_SIZE
+        # Smooth gradients like real frames, noise would average out on the pyramid
+        gradient = np.add.outer(np.linspace(0, 120, height), np.linspace(0, 120, width)).astype(np.uint8)
+        self.reference = np.stack([gradient] * 3)
+        self.comparison = self.reference.copy()
+        self.comparison[1, :height // 2] = 255 - self.comparison[1, :height // 2]  # Clear failure
+        # About 5% off, brighter and darker by turns so the pyramid averages the difference away
+        shift = np.where(np.arange(width) % 2, -13, 13)
+        self.comparison[2] = np.clip(self.reference[2].astype(np.int16) + shift, 0, 255)
+
+    def test_clear_pairs_exit_early(self):
+        """
+        Test that clear passes and failures are decided without the full-resolution diff.
+        """
+        scores, levels, exact = coarse_to_fine_differences(self.reference[:2], self.comparison[:2], 5)
+        self.assertFalse(exact.any())
+        self.assertEqual(levels[0], SAMPLED_LEVEL)  # Passes are settled by the pixel sample
+        self.assertGreater(levels[1], 0)  # Failures are settled on the pyramid
+
+        full = percentage_differences(self.reference[:2], self.comparison[:2])
+        self.assertLess(scores[0], 5)
+        self.assertLessEqual(scores[1], full[1])  # A pyramid score is a lower bound
+        self.assertGreaterEqual(scores[1], 5)
+
+    def test_borderline_pair_gets_exact_score(self):
+        """
+        Test that a pair close to its threshold falls through to the exact full-resolution diff.
+        """
+        full = percentage_differences(self.reference[2:], self.comparison[2:])[0]
+        scores, levels, exact = coarse_to_fine_differences(self.reference[2:], self.comparison[2:], full)
+        self.assertTrue(exact[0])
+        self.assertEqual(levels[0], 0)
+        self.assertEqual(scores[0], full)
+
+    def test_pyramid_bounds_hold_for_odd_sizes(self):
+        """
+        Test that every pyramid level bounds the full score from below, and exactly for a uniform shift.
+        """
+        rng = np.random.default_rng(4)
+        reference = rng.integers(0, 256, size=(4, 75, 101), dtype=np.uint8)
+        comparison = rng.integers(0, 256, size=(4, 75, 101), dtype=np.uint8)
+        full = percentage_differences(reference, comparison)
+        for level in range(1, 6):
+            scores, levels, exact = coarse_to_fine_differences(reference, comparison, 0, levels=level, samples=0)
+            self.assertTrue((levels == level).all())
+            self.assertTrue((scores <= full).all())
+
+        shifted = np.clip(self.reference[:1].astype(np.int16) + 20, 0, 255).astype(np.uint8)
+        scores, levels, _ = coarse_to_fine_differences(self.reference[:1], shifted, 5)
+        self.assertEqual(levels[0], 3)
+        self.assertAlmostEqual(scores[0], percentage_differences(self.reference[:1], shifted)[0])
+
+    def test_grade_batch_early_exit(self):
+        """
+        Test that grade_batch reports how each pair was decided and agrees with the full diff.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            measurements = []
+            for index in range(2):
+                cv2.imwrite(os.path.join(folder, f"{index}_golden.png"), self.reference[index])
+                cv2.imwrite(os.path.join(folder, f"{index}_screenshot.png"), self.comparison[index])
+                measurements.append((f"{index}_golden.png", f"{index}_screenshot.png", 5, str(index)))
+            full = grade_batch(measurements, folder, folder)
+            early = grade_batch(measurements, folder, folder, early_exit=True)
+
+        self.assertEqual([r["passed"] for r in full], [r["passed"] for r in early])
+        self.assertEqual([r["exact"] for r in early], [False, False])
+        self.assertEqual(early[0]["decided_level"], SAMPLED_LEVEL)
+        self.assertIn("estimated from a pixel sample", format_result(early[0]))
+        self.assertIn("decided at pyramid level", format_result(early[1]))
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up pairs that are identical, mildly noisy, shuffled and brightened.
+        """
+        width, height = DEFAULT_SIZE
+        rng = np.random.default_rng(1)
+        frame = cv2.GaussianBlur(rng.integers(0, 256, size=(height, width), dtype=np.uint8), (0, 0), 4)
+        frame = cv2.normalize(frame, None, 0, 255, cv2.NORM_MINMAX)
+        noisy = np.clip(frame.astype(np.int16) + rng.integers(-4, 5, size=frame.shape), 0, 255).astype(np.uint8)
+        shuffled = rng.permutation(frame.ravel()).reshape(frame.shape)  # Same histogram, no structure
+        brightened = np.clip(frame.astype(np.int16) + 60, 0, 255).astype(np.uint8)
+        self.reference = np.stack([frame] * 4)
+        self.comparison = np.stack([frame, noisy, shuffled, brightened])
+
+    def test_metric_values(self):
+        """
+        Test every metric on identical, noisy, shuffled and brightened pairs.
+        """
+        histogram = histogram_distances(self.reference, self.comparison)
+        self.assertEqual(histogram[0], 0)
+        self.assertEqual(histogram[2], 0)
+        self.assertGreater(histogram[3], 50)
+
+        psnr = psnr_values(self.reference, self.comparison)
+        mean_squared = np.mean((self.reference[1].astype(np.float64) - self.comparison[1]) ** 2)
+        self.assertEqual(psnr[0], MAX_PSNR)
+        self.assertAlmostEqual(psnr[1], 10 * np.log10(255 ** 2 / mean_squared))
+
+        ssim = ssim_values(self.reference, self.comparison)
+        self.assertAlmostEqual(ssim[0], 1, places=5)
+        self.assertGreater(ssim[1], 0.7)
+        self.assertLess(ssim[2], 0.2)
+        np.testing.assert_allclose(ssim_values(self.reference, self.comparison, group_size=1), ssim, atol=1e-3)
+
+    def test_chain_runs_expensive_metric_only_when_inconclusive(self):
+        """
+        Test that the histogram settles clear pairs and only the inconclusive ones get SSIM.
+        """
+        chain = [("histogram", 0.5, 50), "ssim"]
+        scores, passed, decided_by, costs = metric_grades(self.reference, self.comparison, 0.9, chain)
+        self.assertEqual(list(decided_by), ["histogram", "ssim", "histogram", "histogram"])
+        self.assertEqual(list(passed), [True, True, True, False])
+        self.assertEqual(list(costs), [1, 36, 1, 1])  # SSIM costs 35 times the histogram
+        self.assertAlmostEqual(scores[1], ssim_values(self.reference[1:2], self.comparison[1:2])[0])
+
+    def test_metric_stages(self):
+        """
+        Test that stages keep the caller's order and malformed or costlier-first chains are rejected.
+        """
+        self.assertEqual(metric_stages([("histogram", 1, 30), ("psnr", 45, 20), "ssim"]),
+                         [("histogram", 1, 30), ("psnr", 45, 20), ("ssim", None, None)])
+        for choice in ("vmaf", ["histogram", "ssim"], [("histogram", 1, 30)], [("psnr", 45, 20), ("histogram", 1, 30), "ssim"],
+                       [("ssim", 0.99, 0.5), "psnr"]):
+            with self.assertRaises(ValueError):
+                metric_stages(choice)
+
+    def test_grade_batch_with_metric_choice(self):
+        """
+        Test that measurements may mix the default difference with a chosen metric.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            for index in range(2):
+                cv2.imwrite(os.path.join(folder, f"{index}_golden.png"), self.reference[index])
+                cv2.imwrite(os.path.join(folder, f"{index}_screenshot.png"), self.comparison[index])
+            measurements = [("0_golden.png", "0_screenshot.png", 5, "Default"),
+                            ("1_golden.png", "1_screenshot.png", 0.99, "SSIM", "ssim"),
+                            ("0_golden.png", "1_screenshot.png", 30, "PSNR", "psnr")]
+            results = grade_batch(measurements, folder, folder)
+
+        self.assertEqual((results[0]["score"], results[0]["passed"]), (0.0, True))
+        self.assertNotIn("metric", results[0])
+        self.assertEqual((results[1]["metric"], results[1]["passed"]), ("ssim", False))
+        self.assertIn("Limit EXCEEDED '1_golden.png' and '1_screenshot.png': ssim 0.", format_result(results[1]))
+        self.assertTrue(results[2]["passed"])
+        self.assertIn(" dB.", format_result(results[2]))
+        with self.assertRaises(ValueError):
+            build_measurements(["clip.mp4"], metric="vmaf")
+
+if __name__ == "__main__":
+    unittest.main()
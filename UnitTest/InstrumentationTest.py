@@ -0,0 +1,85 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from Library import Instrumentation
+from Library.Instrumentation import span, traced
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """
+        Start every test case with recording on and no spans.
+        """
+        Instrumentation.reset()
+        Instrumentation.enable()
+
+    def tearDown(self):
+        """
+        Turn recording off again so other tests run uninstrumented.
+        """
+        Instrumentation.disable()
+        Instrumentation.reset()
+
+    def test_disabled_spans_record_nothing(self):
+        """
+        Test that spans and traced functions are no-ops while instrumentation is disabled.
+        """
+        Instrumentation.disable()
+
+        @traced()
+        def work():
+            return 42
+
+        with span("stage"):
+            self.assertEqual(work(), 42)
+        self.assertEqual(Instrumentation.summary(), {})
+
+    def test_summary_per_stage(self):
+        """
+        Test that the summary counts every span of a stage, including those from other threads.
+        """
+        @traced("stage.traced")
+        def work():
+            with span("stage.inner"):
+                pass
+
+        for _ in range(3):
+            work()
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+        stages = Instrumentation.summary()
+        self.assertEqual(stages["stage.traced"]["count"], 4)
+        self.assertEqual(stages["stage.inner"]["count"], 4)
+        for stage in stages.values():
+            self.assertLessEqual(stage["p50"], stage["p95"])
+            self.assertLessEqual(stage["p95"], stage["max"])
+
+        table = Instrumentation.format_summary(stages)
+        self.assertTrue(table.splitlines()[0].startswith("Stage"))
+        self.assertEqual(len(table.splitlines()), 3)
+
+    def test_export_chrome_trace(self):
+        """
+        Test that the trace file holds one complete event per span with its arguments.
+        """
+        with span("capture.screenshot", file="clip.mp4"):
+            pass
+
+        with tempfile.TemporaryDirectory() as folder:
+            trace_file = os.path.join(folder, "trace", "run.json")
+            Instrumentation.export_chrome_trace(trace_file)
+            with open(trace_file) as file:
+                trace = json.load(file)
+
+        event, = trace["traceEvents"]
+        self.assertEqual(event["name"], "capture.screenshot")
+        self.assertEqual(event["cat"], "capture")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"file": "clip.mp4"})
+        self.assertGreaterEqual(event["ts"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from Library.MediaIndex import MediaIndex, stream_video_files
+
+class TestMediaIndex(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary media folder with videos in two directories and an index file.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.media_folder = os.path.join(self.test_dir.name, "Media")
+        self.subfolder = os.path.join(self.media_folder, "HEVC")
+        os.makedirs(self.subfolder)
+        self.index_file = os.path.join(self.test_dir.name, "media_index.json")
+        for path in [os.path.join(self.media_folder, "a.mp4"), os.path.join(self.media_folder, "notes.txt"),
+                     os.path.join(self.subfolder, "b.mkv")]:
+            self.write(path, "video")
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def write(self, path, content):
+        """
+        Writes a file and pushes the modification time of it and its directory forward.
+        """
+        with open(path, "w") as file:
+            file.write(content)
+        later = time.time_ns() + 2_000_000_000
+        os.utime(path, ns=(later, later))
+
+    def touch_directory(self, directory):
+        """
+        Moves the modification time of a directory forward, as adding or removing a file would.
+        """
+        later = time.time_ns() + 4_000_000_000
+        os.utime(directory, ns=(later, later))
+
+    def scan(self, check_files=False):
+        """
+        Runs a scan with a fresh index object loaded from disk and saves it.
+        """
+        index = MediaIndex(self.index_file)
+        changes = sorted((status, os.path.relpath(path, self.media_folder)) for status, path in index.scan(self.media_folder, check_files))
+        index.save()
+        return changes
+
+    def test_first_scan_adds_everything(self):
+        """
+        Test that the first scan reports every video as added and skips other files.
+        """
+        self.assertEqual(self.scan(), sorted([("added", "a.mp4"), ("added", os.path.join("HEVC", "b.mkv"))]))
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        """
+        Test that a second scan reuses the stored listing of unchanged directories.
+        """
+        self.scan()
+        with patch.object(MediaIndex, "_read_directory") as mock_read:
+            changes = self.scan()
+            mock_read.assert_not_called()
+        self.assertEqual(changes, sorted([("unchanged", "a.mp4"), ("unchanged", os.path.join("HEVC", "b.mkv"))]))
+
+    def test_added_removed_and_modified(self):
+        """
+        Test that added, removed and modified videos are reported.
+        """
+        self.scan()
+        self.write(os.path.join(self.subfolder, "c.mpg"), "new video")
+        os.remove(os.path.join(self.media_folder, "a.mp4"))
+        self.touch_directory(self.media_folder)
+        self.touch_directory(self.subfolder)
+        self.write(os.path.join(self.subfolder, "b.mkv"), "re-encoded video")
+
+        self.assertEqual(self.scan(), [("added", os.path.join("HEVC", "c.mpg")),
+                                       ("modified", os.path.join("HEVC", "b.mkv")),
+                                       ("removed", "a.mp4")])
+
+    def test_in_place_rewrite_needs_check_files(self):
+        """
+        Test that a file rewritten in place is only seen as modified with check_files.
+        """
+        self.scan()
+        self.write(os.path.join(self.media_folder, "a.mp4"), "rewritten in place")
+        os.utime(self.media_folder, ns=(os.stat(self.media_folder).st_atime_ns, MediaIndex(self.index_file).directories[os.path.abspath(self.media_folder)]["mtime_ns"]))
+
+        self.assertIn(("unchanged", "a.mp4"), self.scan())
+        self.assertIn(("modified", "a.mp4"), self.scan(check_files=True))
+
+    def test_removed_directory(self):
+        """
+        Test that the videos of a deleted directory are reported as removed.
+        """
+        self.scan()
+        os.remove(os.path.join(self.subfolder, "b.mkv"))
+        os.rmdir(self.subfolder)
+        self.touch_directory(self.media_folder)
+
+        self.assertEqual(self.scan(), [("removed", os.path.join("HEVC", "b.mkv")), ("unchanged", "a.mp4")])
+
+    def test_stream_video_files(self):
+        """
+        Test that stream_video_files yields present videos and reports every change.
+        """
+        changes = []
+        videos = list(stream_video_files(self.media_folder, self.index_file, on_change=lambda status, path: changes.append(status)))
+
+        self.assertEqual(len(videos), 2)
+        self.assertEqual(changes, ["added", "added"])
+        self.assertTrue(os.path.exists(self.index_file))
+        self.assertEqual(sorted(stream_video_files(self.media_folder)), sorted(videos))
+
+    def test_media_info_is_cached_until_the_file_changes(self):
+        """
+        Test that container header details are probed once and stored with the file's entry.
+        """
+        index = MediaIndex(self.index_file)
+        list(index.scan(self.media_folder))
+        video_path = os.path.join(self.media_folder, "a.mp4")
+        with patch("Library.MediaIndex.probe_media", return_value={"codec": "H.264", "duration": 3.0}) as probe:
+            self.assertEqual(index.media_info(video_path)["duration"], 3.0)
+            index.save()
+            self.assertEqual(MediaIndex(self.index_file).media_info(video_path)["codec"], "H.264")
+            self.assertEqual(probe.call_count, 1)
+
+            self.write(video_path, "another video")
+            MediaIndex(self.index_file).media_info(video_path)
+            self.assertEqual(probe.call_count, 2)
+
+    def test_stream_video_files_filters_by_media_info(self):
+        """
+        Test that stream_video_files collects the details of every file and skips the filtered ones.
+        """
+        details = {"a.mp4": {"codec": "H.264"}, "b.mkv": {"codec": "HEVC"}}
+        media_info = {}
+        with patch("Library.MediaIndex.probe_media", side_effect=lambda path: details[os.path.basename(path)]):
+            videos = list(stream_video_files(self.media_folder, self.index_file, media_info=media_info,
+                                             media_filter=lambda info: info["codec"] == "HEVC"))
+        self.assertEqual(videos, [os.path.join(self.subfolder, "b.mkv")])
+        self.assertEqual(media_info, {videos[0]: {"codec": "HEVC"}})
+
+if __name__ == "__main__":
+    unittest.main()
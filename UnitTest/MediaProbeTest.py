@@ -0,0 +1,127 @@
+import unittest
+import os
+import struct
+import tempfile
+import cv2
+import numpy as np
+from Library.MediaProbe import playback_window, probe_media
+
+def box(box_type, body):
+    """
+    Returns an ISO-BMFF box.
+    """
+    return struct.pack(">I4s", 8 + len(body), box_type.encode("latin-1")) + body
+
+def ebml(element_id, body):
+    """
+    Returns an EBML element with an 8-byte size.
+    """
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x01 << 56 | len(body)).to_bytes(8, "big") + body
+
+def write_video(video_path, fourcc, frame_count=50, fps=25):
+    """
+    Writes a small video with OpenCV, returning False if the backend cannot write the format.
+    """
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*fourcc), fps, (64, 48))
+    if not writer.isOpened():
+        return False
+    for index in range(frame_count):
+        writer.write(np.full((48, 64, 3), index * 5, dtype=np.uint8))
+    writer.release()
+    return True
+
+class TestMediaProbe(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder for the media files.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def path(self, name, content=None):
+        """
+        Returns the path of a file in the temporary folder, writing content to it if given.
+        """
+        path = os.path.join(self.test_dir.name, name)
+        if content is not None:
+            with open(path, "wb") as file:
+                file.write(content)
+        return path
+
+    def test_written_files(self):
+        """
+        Test the probe against MP4, Matroska and MPEG program stream files written by OpenCV.
+        """
+        for name, fourcc, container, codec in [("clip.mp4", "mp4v", "mp4", "MPEG-4"), ("clip.mkv", "MJPG", "matroska", "MJPEG"),
+                                                ("clip.mpg", "PIM1", "mpeg-ps", "MPEG-1")]:
+            with self.subTest(name=name):
+                video_path = self.path(name)
+                if not write_video(video_path, fourcc):
+                    self.skipTest(f"OpenCV cannot write {name}")
+                info = probe_media(video_path)
+                self.assertEqual((info["container"], info["codec"], info["resolution"]), (container, codec, [64, 48]))
+                self.assertAlmostEqual(info["fps"], 25)
+                self.assertAlmostEqual(info["duration"], 2, delta=0.1)
+
+    def test_mp4_with_moov_after_large_mdat(self):
+        """
+        Test that the 'moov' box is found after a 64-bit sized 'mdat' and a version 1 'mvhd' is read.
+        """
+        mvhd = box("mvhd", bytes([1, 0, 0, 0]) + bytes(16) + struct.pack(">IQ", 1000, 12500) + bytes(80))
+        hdlr = box("hdlr", bytes(8) + b"vide" + bytes(12))
+        mdhd = box("mdhd", bytes(12) + struct.pack(">II", 60000, 750000) + bytes(4))
+        sample_entry = box("hvc1", bytes(24) + struct.pack(">HH", 3840, 2160) + bytes(50))
+        stsd = box("stsd", struct.pack(">II", 0, 1) + sample_entry)
+        stts = box("stts", struct.pack(">IIII", 0, 1, 750, 1000))
+        trak = box("trak", box("mdia", mdhd + hdlr + box("minf", box("stbl", stsd + stts))))
+        mdat = struct.pack(">I4sQ", 1, b"mdat", 16 + 100) + bytes(100)
+        video_path = self.path("clip.mov", box("ftyp", b"qt  " + bytes(4)) + mdat + box("moov", mvhd + trak))
+
+        self.assertEqual(probe_media(video_path), {"container": "mp4", "codec": "HEVC", "resolution": [3840, 2160],
+                                                   "fps": 60.0, "duration": 12.5})
+
+    def test_matroska_headers(self):
+        """
+        Test that WebM headers are read from a segment of unknown size up to the first cluster.
+        """
+        header = ebml(0x1A45DFA3, ebml(0x4282, b"webm"))
+        info = ebml(0x1549A966, ebml(0x2AD7B1, (1000000).to_bytes(3, "big")) + ebml(0x4489, struct.pack(">d", 7500.0)))
+        video = ebml(0xE0, ebml(0xB0, (1280).to_bytes(2, "big")) + ebml(0xBA, (720).to_bytes(2, "big")))
+        audio_track = ebml(0xAE, ebml(0x83, b"\x02") + ebml(0x86, b"A_OPUS"))
+        video_track = ebml(0xAE, ebml(0x83, b"\x01") + ebml(0x86, b"V_VP9") + ebml(0x23E383, (33366667).to_bytes(4, "big")) + video)
+        tracks = ebml(0x1654AE6B, audio_track + video_track)
+        cluster = ebml(0x1F43B675, bytes(64))
+        segment = bytes.fromhex("18538067") + b"\x01\xff\xff\xff\xff\xff\xff\xff" + info + tracks + cluster
+        video_path = self.path("clip.webm", header + segment)
+
+        result = probe_media(video_path)
+        self.assertEqual((result["container"], result["codec"], result["resolution"]), ("webm", "VP9", [1280, 720]))
+        self.assertAlmostEqual(result["fps"], 29.97, places=2)
+        self.assertAlmostEqual(result["duration"], 7.5)
+
+    def test_unknown_and_damaged_files(self):
+        """
+        Test that other formats, truncated headers and missing files leave every field unknown.
+        """
+        unknown = {"container": None, "codec": None, "resolution": None, "fps": None, "duration": None}
+        self.assertEqual(probe_media(self.path("notes.txt", b"not a video")), unknown)
+        self.assertEqual(probe_media(self.path("missing.mp4")), unknown)
+        truncated = probe_media(self.path("truncated.mkv", bytes.fromhex("1a45dfa3") + b"\x88"))
+        self.assertEqual(truncated["codec"], None)
+
+    def test_playback_window(self):
+        """
+        Test that short files are played to their end and captured at the same fraction of it.
+        """
+        self.assertEqual(playback_window(None), (5, 6))
+        self.assertEqual(playback_window({"duration": 30.0}), (5, 6))
+        self.assertEqual(playback_window({"duration": 3.0}), (2.5, 3.0))
+
+if __name__ == "__main__":
+    unittest.main()
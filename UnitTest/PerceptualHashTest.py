@@ -0,0 +1,140 @@
+import unittest
+import os
+import random
+import tempfile
+import cv2
+import numpy as np
+from Library.PerceptualHash import (BKTree, GoldenHashIndex, dhash, grade_with_prefilter, hamming_distance, phash,
+                                    prefilter_decision)
+
+class TestPerceptualHash(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary golden and media folder with test images.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.golden_folder = os.path.join(self.test_dir.name, "Golden_Images")
+        os.makedirs(self.golden_folder)
+
+        rng = np.random.default_rng(2)
+        # Smooth random pictures, so small amounts of noise do not flip the hash bits
+        self.pictures = [cv2.resize(rng.integers(0, 256, size=(6, 8, 3), dtype=np.uint8), (800, 600)) for _ in range(3)]
+        for index, picture in enumerate(self.pictures):
+            cv2.imwrite(os.path.join(self.golden_folder, f"clip{index}_golden.png"), picture)
+
+        # A slightly noisy copy of clip0, an unrelated picture for clip1 and a mid-way blend for clip2
+        noisy = np.clip(self.pictures[0].astype(np.int16) + rng.integers(-3, 4, size=self.pictures[0].shape), 0, 255).astype(np.uint8)
+        cv2.imwrite(os.path.join(self.test_dir.name, "clip0_screenshot.png"), noisy)
+        cv2.imwrite(os.path.join(self.test_dir.name, "clip1_screenshot.png"), 255 - self.pictures[1])
+        blended = cv2.addWeighted(self.pictures[2], 0.5, self.pictures[0], 0.5, 0)
+        cv2.imwrite(os.path.join(self.test_dir.name, "clip2_screenshot.png"), blended)
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_hashes_are_stable(self):
+        """
+        Test that near-identical images hash close together and different images far apart.
+        """
+        gray = [cv2.cvtColor(picture, cv2.COLOR_BGR2GRAY) for picture in self.pictures]
+        for method in (dhash, phash):
+            self.assertEqual(method(gray[0]), method(gray[0].copy()))
+            self.assertLessEqual(hamming_distance(method(gray[0]), method(cv2.GaussianBlur(gray[0], (3, 3), 0))), 4)
+            self.assertGreater(hamming_distance(method(gray[0]), method(255 - gray[0])), 32)
+
+    def test_bktree_matches_brute_force(self):
+        """
+        Test that BK-tree searches return exactly the brute-force matches.
+        """
+        rng = random.Random(3)
+        hashes = [rng.getrandbits(64) for _ in range(500)]
+        tree = BKTree()
+        for index, hash_value in enumerate(hashes):
+            tree.add(hash_value, index)
+        tree = BKTree.from_dict(tree.to_dict())  # Round trip through the persisted form
+
+        for query in hashes[:20] + [rng.getrandbits(64) for _ in range(20)]:
+            expected = sorted(index for index, hash_value in enumerate(hashes) if hamming_distance(query, hash_value) <= 24)
+            self.assertEqual(sorted(item for _, item in tree.search(query, 24)), expected)
+
+            best = min(hamming_distance(query, hash_value) for hash_value in hashes)
+            self.assertEqual(tree.nearest(query)[0], best)
+
+    def test_index_persists_and_finds_closest_golden(self):
+        """
+        Test that the golden index is persisted, reused and matches captures to their golden.
+        """
+        index = GoldenHashIndex(self.golden_folder)
+        self.assertEqual(index.refresh(), 3)
+        self.assertTrue(os.path.exists(index.index_file))
+
+        reloaded = GoldenHashIndex(self.golden_folder)
+        self.assertEqual(reloaded.refresh(), 0)  # Nothing changed, nothing re-hashed
+        golden_file, _ = reloaded.find_closest_golden(os.path.join(self.test_dir.name, "clip0_screenshot.png"))
+        self.assertEqual(golden_file, "clip0_golden.png")
+
+    def test_grade_with_prefilter(self):
+        """
+        Test that obviously different pairs fail on a coarse level once hashed apart and every other pair is diffed.
+        """
+        index = GoldenHashIndex(self.golden_folder)
+        index.refresh()
+        measurements = [(f"clip{i}_golden.png", f"clip{i}_screenshot.png", 5, f"clip{i}") for i in range(3)]
+
+        results = grade_with_prefilter(measurements, index, self.test_dir.name, fail_distance=40)
+
+        self.assertEqual([result["config"] for result in results], ["clip0", "clip1", "clip2"])
+        self.assertEqual(results[0]["decided_by"], "diff")
+        self.assertTrue(results[0]["passed"])
+        self.assertEqual(results[1]["decided_by"], "hash")
+        self.assertFalse(results[1]["passed"])
+        self.assertGreaterEqual(results[1]["score"], 5)  # The pyramid bound confirms the hash
+        self.assertFalse(results[1]["exact"])
+        self.assertEqual(results[2]["decided_by"], "diff")
+        self.assertIsNotNone(results[2]["score"])
+
+    def test_brightness_shift_is_not_passed_by_hash(self):
+        """
+        Test that a darkened capture with its golden image's hash is still failed by the pixel diff.
+        """
+        darkened = (self.pictures[0] * 0.6).astype(np.uint8)
+        cv2.imwrite(os.path.join(self.test_dir.name, "dark_screenshot.png"), darkened)
+        index = GoldenHashIndex(self.golden_folder)
+        index.refresh()
+        self.assertEqual(index.find_closest_golden(os.path.join(self.test_dir.name, "dark_screenshot.png")),
+                         ("clip0_golden.png", 0))
+
+        result = grade_with_prefilter([("clip0_golden.png", "dark_screenshot.png", 5, "clip0")], index, self.test_dir.name)[0]
+        self.assertEqual(result["decided_by"], "diff")
+        self.assertGreater(result["score"], 5)
+        self.assertFalse(result["passed"])
+
+    def test_low_contrast_pair_is_not_failed_by_hash(self):
+        """
+        Test that a faint pattern whose gradients flip is graded on its pixels, not failed on its hash distance.
+        """
+        ramp = np.tile(np.linspace(0, 6, 800), (600, 1)).astype(np.uint8)
+        cv2.imwrite(os.path.join(self.golden_folder, "faint_golden.png"), 100 + ramp)
+        cv2.imwrite(os.path.join(self.test_dir.name, "faint_screenshot.png"), 106 - ramp)
+        index = GoldenHashIndex(self.golden_folder)
+        index.refresh()
+
+        result = grade_with_prefilter([("faint_golden.png", "faint_screenshot.png", 5, "faint")], index, self.test_dir.name)[0]
+        self.assertGreaterEqual(result["hash_distance"], 24)
+        self.assertEqual(result["decided_by"], "diff")
+        self.assertLess(result["score"], 5)
+        self.assertTrue(result["passed"])
+
+    def test_prefilter_decision(self):
+        """
+        Test that the prefilter only ever fails a pair, never passes it.
+        """
+        self.assertIsNone(prefilter_decision(0, 20))
+        self.assertIsNone(prefilter_decision(10, 20))
+        self.assertEqual(prefilter_decision(25, 20), "fail")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from Library.PlaybackScheduler import PlaybackScheduler, vlc_command_builder
+
+# Stand-in for VLC: records the display it was given, then plays "forever"
+FAKE_PLAYER = "import os, sys, time; open(sys.argv[1], 'w').write(os.environ.get('DISPLAY', '')); time.sleep(30)"
+
+class TestPlaybackScheduler(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary directory for the fake player output.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.files = [os.path.join(self.test_dir.name, f"video{index}.mp4") for index in range(6)]
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def build_fake_command(self, file_path, slot):
+        """
+        Builds the fake player command and a per-slot window title.
+        """
+        return [sys.executable, "-c", FAKE_PLAYER, file_path + ".display"], f"slot {slot} - {os.path.basename(file_path)}"
+
+    def test_concurrency_limit(self):
+        """
+        Test that no more than max_instances players run at once and that they overlap.
+        """
+        scheduler = PlaybackScheduler(3, self.build_fake_command, play_time=0.5)
+
+        start_time = time.monotonic()
+        results = scheduler.run(self.files)
+        elapsed = time.monotonic() - start_time
+
+        self.assertEqual(scheduler.peak_active, 3)
+        self.assertEqual(scheduler.active, 0)
+        self.assertLess(elapsed, 0.5 * len(self.files))
+        self.assertEqual([result["file"] for result in results], self.files)
+        self.assertTrue(all(result["error"] is None for result in results))
+
+    def test_captures_target_instance_window(self):
+        """
+        Test that every capture is handed the window title of the instance playing its file.
+        """
+        captured = []
+        lock = threading.Lock()
+
+        def capture(window_title, file_path):
+            with lock:
+                captured.append((window_title, file_path))
+            return f"Captured {window_title}"
+
+        scheduler = PlaybackScheduler(2, self.build_fake_command, capture=capture, play_time=0.4, capture_delay=0.2,
+                                      displays=[":91", ":92"])
+        results = scheduler.run(self.files)
+
+        self.assertEqual(len(captured), len(self.files))
+        for window_title, file_path in captured:
+            self.assertTrue(window_title.endswith(os.path.basename(file_path)))
+        for result in results:
+            self.assertEqual(result["capture"], f"Captured {result['window_title']}")
+            with open(result["file"] + ".display") as file:
+                self.assertEqual(file.read(), [":91", ":92"][result["slot"]])
+
+    def test_player_exits_before_capture(self):
+        """
+        Test that a player that exits early is reported instead of captured.
+        """
+        def build_command(file_path, slot):
+            return [sys.executable, "-c", "pass"], "unused"
+
+        scheduler = PlaybackScheduler(2, build_command, capture=lambda title, path: "captured", capture_delay=5)
+        results = scheduler.run(self.files[:2])
+
+        for result in results:
+            self.assertIsNone(result["capture"])
+            self.assertIn("exited before the capture", result["error"])
+
+    def test_vlc_command_builder_titles_and_tiles(self):
+        """
+        Test that each slot gets its own VLC window title and position.
+        """
+        build_command = vlc_command_builder(vlc_path="vlc", screen_size=(1920, 1080), grayscale=True)
+        command, window_title = build_command("clip.mp4", 3)
+
+        self.assertEqual(window_title, "OTF slot 3 - clip.mp4")
+        self.assertIn("--grayscale", command)
+        self.assertEqual(command[command.index("--video-title") + 1], window_title)
+        self.assertEqual(command[command.index("--video-x") + 1], "960")
+        self.assertEqual(command[command.index("--video-y") + 1], "540")
+
+if __name__ == "__main__":
+    unittest.main()
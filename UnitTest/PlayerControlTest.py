@@ -0,0 +1,156 @@
+import unittest
+import socket
+import socketserver
+import sys
+import threading
+import time
+from Library.Player import build_vlc_command
+from Library.PlayerControl import PersistentPlayer, RCClient
+
+GREETING = b"VLC media player 3.0.20 Vetinari\r\nCommand Line Interface initialized. Type `help' for help.\r\n> "
+
+class FakeRCServer(socketserver.ThreadingTCPServer):
+    """
+    Stand-in for the remote control interface of VLC, emulating the commands PersistentPlayer uses.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), FakeRCHandler)
+        self.commands = []
+        self.file = None
+        self.playing_since = None
+        self.offset = 0
+        self.drop_next = False
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+class FakeRCHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        self.wfile.write(GREETING)
+        for line in self.rfile:
+            command, _, argument = line.decode("utf-8").strip().partition(" ")
+            server.commands.append(command)
+            if server.drop_next:
+                # Emulate a crashed player
+                server.drop_next = False
+                return
+            reply = ""
+            if command == "add":
+                server.file, server.playing_since, server.offset = argument, time.monotonic(), 0
+                reply = f"status change: ( new input: file:///{argument} )\r\nstatus change: ( play state: 3 )\r\n"
+            elif command in ("stop", "clear"):
+                server.file = server.playing_since = None
+            elif command == "is_playing":
+                reply = "1\r\n" if server.file else "0\r\n"
+            elif command == "get_time":
+                if server.file:
+                    reply = f"{int(time.monotonic() - server.playing_since + server.offset)}\r\n"
+                else:
+                    reply = "\r\n"
+            elif command == "seek":
+                server.playing_since, server.offset = time.monotonic(), int(argument)
+            elif command == "shutdown":
+                self.wfile.write(b"Shutting down.\r\n")
+                threading.Thread(target=server.shutdown).start()
+                return
+            self.wfile.write(reply.encode("utf-8") + b"> ")
+
+class TestPlayerControl(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a fake RC server on a free port.
+        """
+        self.server = FakeRCServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """
+        Stop the fake RC server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_rc_client_filters_status_changes(self):
+        """
+        Test that replies are read up to the prompt without the status change lines.
+        """
+        client = RCClient(port=self.server.port)
+        self.assertEqual(client.command("add clip.mp4"), [])
+        self.assertEqual(client.command("is_playing"), ["1"])
+        client.close()
+
+    def test_play_seek_and_query(self):
+        """
+        Test that files are loaded, sought and queried over one connection.
+        """
+        with PersistentPlayer(port=self.server.port) as player:
+            self.assertTrue(player.play("first.mp4", start_time=4))
+            self.assertEqual(player.get_time(), 4)
+            self.assertTrue(player.play("second.mp4"))
+            self.assertEqual(self.server.file, "second.mp4")
+            player.stop()
+            self.assertFalse(player.is_playing())
+            self.assertIsNone(player.get_time())
+            self.assertEqual(player.starts, 1)
+        self.assertEqual(self.server.commands[:4], ["clear", "add", "is_playing", "seek"])
+
+    def test_reconnects_after_failure(self):
+        """
+        Test that a command the player dropped is sent again after restarting the connection.
+        """
+        player = PersistentPlayer(port=self.server.port)
+        player.play("first.mp4")
+        self.server.drop_next = True
+        self.assertTrue(player.is_playing())
+        self.assertEqual(player.starts, 2)
+        player.close()
+
+    def test_no_player(self):
+        """
+        Test that a missing player is reported once the connect timeout passed.
+        """
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        player = PersistentPlayer(port=port, connect_timeout=0.3)
+        with self.assertRaises(RuntimeError):
+            player.get_time()
+
+class TestPersistentPlayerProcess(unittest.TestCase):
+    def test_starts_and_restarts_the_player(self):
+        """
+        Test that the player process is started once, started again after it died and shut down on close.
+        """
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        # The fake server plays the player process; build_vlc_command only contributes the RC options here
+        rc_options = build_vlc_command(None, vlc_path="vlc", rc_host=f"127.0.0.1:{port}")[1:]
+        self.assertEqual(rc_options, ["--extraintf", "rc", "--rc-host", f"127.0.0.1:{port}"])
+        command = [sys.executable, "-m", "UnitTest.PlayerControlTest", "serve", str(port)]
+
+        player = PersistentPlayer(command, port=port)
+        self.assertTrue(player.play("clip.mp4"))
+        first_process = player.process
+        first_process.kill()
+        first_process.wait()
+        self.assertTrue(player.play("clip.mp4"))
+        self.assertIsNot(player.process, first_process)
+        self.assertEqual(player.starts, 2)
+
+        process = player.process
+        player.close()
+        self.assertIsNotNone(process.returncode)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        # Run as the stand-in player process of TestPersistentPlayerProcess
+        FakeRCServer(int(sys.argv[2])).serve_forever()
+    else:
+        unittest.main()
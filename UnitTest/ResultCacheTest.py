@@ -0,0 +1,131 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import cv2
+import numpy as np
+from unittest.mock import patch
+from Library.ImageCompare import grade_batch
+from Library.ResultCache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder with a golden image, a screenshot and a cache file.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = self.test_dir.name
+        self.cache_file = os.path.join(self.folder, "cache", "results.sqlite")
+        rng = np.random.default_rng(3)
+        cv2.imwrite(os.path.join(self.folder, "clip_golden.png"), rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8))
+        cv2.imwrite(os.path.join(self.folder, "clip_screenshot.png"), np.full((60, 80, 3), 128, dtype=np.uint8))
+        self.measurements = [("clip_golden.png", "clip_screenshot.png", 5, "Clip")]
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_unchanged_pair_is_served_from_cache(self):
+        """
+        Test that a second run returns the stored score without decoding any image.
+        """
+        cache = ResultCache(self.cache_file)
+        first = grade_batch(self.measurements, self.folder, self.folder, result_cache=cache)
+        self.assertNotIn("cached", first[0])
+
+        with patch("Library.ImageCompare.load_grayscale") as mock_load:
+            second = grade_batch(self.measurements, self.folder, self.folder, result_cache=cache)
+            mock_load.assert_not_called()
+        self.assertTrue(second[0]["cached"])
+        self.assertEqual(second[0]["score"], first[0]["score"])
+        self.assertEqual(second[0]["passed"], first[0]["passed"])
+        cache.close()
+
+    def test_changed_image_or_parameters_miss(self):
+        """
+        Test that new screenshot content, a new threshold or a new size produce new keys.
+        """
+        cache = ResultCache(self.cache_file)
+        golden = os.path.join(self.folder, "clip_golden.png")
+        screenshot = os.path.join(self.folder, "clip_screenshot.png")
+        key = cache.key(golden, screenshot, 5)
+
+        self.assertNotEqual(key, cache.key(golden, screenshot, 6))
+        self.assertNotEqual(key, cache.key(golden, screenshot, 5, size=(640, 480)))
+        self.assertNotEqual(key, cache.key(golden, screenshot, 5, color_mode="bgr"))
+
+        cv2.imwrite(screenshot, np.full((60, 80, 3), 10, dtype=np.uint8))
+        stat = os.stat(screenshot)
+        os.utime(screenshot, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(key, cache.key(golden, screenshot, 5))
+        self.assertIsNone(cache.key(golden, os.path.join(self.folder, "missing.png"), 5))
+        cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """
+        Test that the cache keeps at most max_entries scores, dropping the least recently used.
+        """
+        cache = ResultCache(self.cache_file, max_entries=2)
+        with patch("Library.ResultCache.time.time", side_effect=[1, 2, 3, 4]):
+            cache.put_many([("a", 1.0)])
+            cache.put_many([("b", 2.0)])
+            self.assertEqual(cache.get("a"), 1.0)  # "a" is now more recent than "b"
+            cache.put_many([("c", 3.0)])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1.0)
+        cache.close()
+
+    def test_hit_does_not_block_other_writers(self):
+        """
+        Test that a cache hit leaves the database unlocked for another worker sharing the file.
+        """
+        cache = ResultCache(self.cache_file)
+        cache.put_many([("a", 1.0)])
+        self.assertEqual(cache.get("a"), 1.0)
+        self.assertFalse(cache.connection.in_transaction)
+
+        other = sqlite3.connect(self.cache_file, timeout=0.1)
+        try:
+            other.execute("INSERT INTO results VALUES ('b', 2.0, 0)")
+            other.commit()  # Raises "database is locked" if the hit holds the write lock
+        finally:
+            other.close()
+
+        cache.put_many([])
+        last_used = cache.connection.execute("SELECT last_used FROM results WHERE key = 'a'").fetchone()[0]
+        self.assertGreater(last_used, 0)
+        self.assertEqual(len(cache), 2)
+        cache.close()
+
+    def test_algorithm_version_change_invalidates(self):
+        """
+        Test that reopening the cache with another algorithm version discards every score.
+        """
+        cache = ResultCache(self.cache_file, algorithm_version="v1")
+        cache.put_many([("a", 1.0)])
+        cache.close()
+
+        cache = ResultCache(self.cache_file, algorithm_version="v1")
+        self.assertEqual(cache.get("a"), 1.0)
+        cache.close()
+
+        cache = ResultCache(self.cache_file, algorithm_version="v2")
+        self.assertIsNone(cache.get("a"))
+        cache.close()
+
+    def test_clear(self):
+        """
+        Test that clear removes every stored score.
+        """
+        cache = ResultCache(self.cache_file)
+        cache.put_many([("a", 1.0), ("b", 2.0)])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
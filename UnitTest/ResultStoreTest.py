@@ -0,0 +1,154 @@
+import unittest
+import os
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+from Library.ResultStore import ResultStore, _bios_serial
+
+DAY = 86400
+
+def grade(config, score, threshold=5, error=None):
+    """
+    Returns a result dict shaped like those of ImageCompare.grade_batch.
+    """
+    return {"config": config, "golden": f"{config}_golden.jpg", "comparison": f"{config}.mp4_screenshot.jpg",
+            "threshold": threshold, "score": score, "passed": score is not None and score < threshold, "error": error}
+
+def ssim_grade(config, score, threshold=0.9):
+    """
+    Returns a result dict shaped like those of a measurement that chose SSIM.
+    """
+    return dict(grade(config, score), threshold=threshold, passed=score >= threshold, metric="ssim", metric_choice="ssim")
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary result database.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.test_dir.name, "Results", "grade_history.sqlite"), batch_size=3)
+        self.now = time.time()
+
+    def tearDown(self):
+        """
+        Close the database and clean up the temporary directory.
+        """
+        self.store.close()
+        self.test_dir.cleanup()
+
+    def add_run(self, host, days_ago, results):
+        """
+        Records a finished run on a host some days ago.
+        """
+        started = self.now - days_ago * DAY
+        run_id = self.store.start_run(host=host, bios_serial="SN123", suite_version="1.2", started=started)
+        self.store.add_results(run_id, results, graded_at=started)
+        self.store.finish_run(run_id)
+        return run_id
+
+    def test_run_and_grades_are_stored(self):
+        """
+        Test that a run keeps its host, serial and version and its grades in order, including timings.
+        """
+        results = [grade("MKV_HEVC_60FPS", 1.5), grade("MP4_H.264_30FPS", None, error="Missing screenshot")]
+        results[0]["timings"] = {"capture": 0.8}
+        run_id = self.add_run("lab-01", 0, results)
+
+        grades = self.store.run_grades(run_id)
+        self.assertEqual([row["config"] for row in grades], ["MKV_HEVC_60FPS", "MP4_H.264_30FPS"])
+        self.assertEqual((grades[0]["host"], grades[0]["passed"], grades[0]["timings"]), ("lab-01", 1, '{"capture": 0.8}'))
+        self.assertEqual((grades[1]["score"], grades[1]["error"]), (None, "Missing screenshot"))
+        run = self.store.connection.execute("SELECT bios_serial, suite_version, finished FROM runs").fetchone()
+        self.assertEqual(run[:2], ("SN123", "1.2"))
+        self.assertIsNotNone(run[2])
+
+        with self.assertRaises(KeyError):
+            self.store.add_results("unknown", results)
+
+    def test_trend_per_day_and_host(self):
+        """
+        Test that the trend groups the grades of one config by day and can be limited to a host.
+        """
+        for days_ago, score in ((120, 9.0), (10, 1.0), (10, 3.0), (2, 4.0)):
+            self.add_run("lab-01", days_ago, [grade("MKV_HEVC_60FPS", score), grade("MP4_H.264_30FPS", 0.5)])
+        self.add_run("lab-02", 2, [grade("MKV_HEVC_60FPS", 6.0)])
+
+        trend = self.store.trend("MKV_HEVC_60FPS", host="lab-01", now=self.now)
+        self.assertEqual([(day["count"], day["mean"], day["failures"]) for day in trend], [(2, 2.0, 0), (1, 4.0, 0)])
+        everywhere = self.store.trend("MKV_HEVC_60FPS", now=self.now)
+        self.assertEqual(everywhere[-1]["max"], 6.0)
+        self.assertEqual(everywhere[-1]["failures"], 1)
+
+    def test_regressions(self):
+        """
+        Test that configs whose score rose or that started failing are reported against the host's history.
+        """
+        for days_ago in (30, 20, 10):
+            self.add_run("lab-01", days_ago, [grade("MKV_HEVC_60FPS", 1.0), grade("MP4_H.264_30FPS", 2.0),
+                                              grade("AVI_MJPEG_25FPS", 4.0)])
+        self.add_run("lab-02", 5, [grade("MKV_HEVC_60FPS", 9.0)])
+        run_id = self.add_run("lab-01", 0, [grade("MKV_HEVC_60FPS", 3.5), grade("MP4_H.264_30FPS", 2.5),
+                                           grade("AVI_MJPEG_25FPS", 5.0)])
+
+        regressions = self.store.regressions(run_id, tolerance=1.0)
+        self.assertEqual([entry["config"] for entry in regressions], ["MKV_HEVC_60FPS", "AVI_MJPEG_25FPS"])
+        self.assertEqual((regressions[0]["baseline_mean"], regressions[0]["baseline_count"]), (1.0, 3))
+        self.assertFalse(regressions[1]["passed"])
+
+    def test_regressions_compare_the_same_metric(self):
+        """
+        Test that a drop in SSIM is a regression and a switch back to the difference is not compared with SSIM scores.
+        """
+        for days_ago in (30, 20, 10):
+            self.add_run("lab-01", days_ago, [ssim_grade("MKV_HEVC_60FPS", 0.99)])
+        run_id = self.add_run("lab-01", 2, [ssim_grade("MKV_HEVC_60FPS", 0.91)])
+        regression, = self.store.regressions(run_id)
+        self.assertEqual((regression["graded_by"], regression["score"], regression["passed"]), ("ssim", 0.91, True))
+        self.assertAlmostEqual(regression["baseline_mean"], 0.99)
+
+        steady = self.add_run("lab-01", 1, [ssim_grade("MKV_HEVC_60FPS", 0.995)])
+        self.assertEqual(self.store.regressions(steady), [])
+        switched = self.add_run("lab-01", 0, [grade("MKV_HEVC_60FPS", 2.5)])
+        self.assertEqual(self.store.regressions(switched), [])
+
+    def test_trend_separates_metrics(self):
+        """
+        Test that the trend does not average scores of different metrics into one mean.
+        """
+        self.add_run("lab-01", 1, [grade("MKV_HEVC_60FPS", 2.0), ssim_grade("MKV_HEVC_60FPS", 0.98)])
+        trend = self.store.trend("MKV_HEVC_60FPS", now=self.now)
+        self.assertEqual([(day["graded_by"], day["mean"]) for day in trend], [("absdiff", 2.0), ("ssim", 0.98)])
+
+    def test_unreadable_bios_serial_is_recorded_as_none(self):
+        """
+        Test that a failing, empty or hanging wmic query is asked once and recorded as None.
+        """
+        empty = subprocess.CompletedProcess([], 0, stdout="SerialNumber\n\n")
+        for outcome in (subprocess.CalledProcessError(1, "wmic"), FileNotFoundError("wmic"),
+                        subprocess.TimeoutExpired("wmic", 10), empty):
+            with self.subTest(outcome=outcome):
+                with patch("Library.ResultStore.subprocess.run", side_effect=[outcome]) as mock_run:
+                    self.assertIsNone(_bios_serial())
+                self.assertEqual(mock_run.call_count, 1)
+
+        with patch("Library.ResultStore.subprocess.run", side_effect=FileNotFoundError("wmic")):
+            run_id = self.store.start_run(host="vm-01", suite_version="1.2")
+        row = self.store.connection.execute("SELECT bios_serial FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        self.assertEqual(row, (None,))
+
+        served = subprocess.CompletedProcess([], 0, stdout="SerialNumber  \nSN456  \n")
+        with patch("Library.ResultStore.subprocess.run", return_value=served):
+            self.assertEqual(_bios_serial(), "SN456")
+
+    def test_trend_query_uses_index(self):
+        """
+        Test that the trend query is answered from the config/host/time index instead of a table scan.
+        """
+        plan = self.store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT date(graded_at, 'unixepoch') AS day, AVG(score) FROM grades "
+            "WHERE config = ? AND graded_at >= ? AND host = ? GROUP BY day", ("MKV_HEVC_60FPS", 0, "lab-01")).fetchall()
+        self.assertIn("grades_config_host_time", " ".join(row[-1] for row in plan))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+import time
+from Library.RunOrchestrator import RunOrchestrator
+
+# Stand-in for VLC that plays "forever", and one that fails straight away
+FAKE_PLAYER = "import time; time.sleep(30)"
+FAILING_PLAYER = "import sys; sys.exit(3)"
+
+def build_fake_command(file_path):
+    """
+    Builds the fake player command and a window title.
+    """
+    script = FAILING_PLAYER if file_path.startswith("broken") else FAKE_PLAYER
+    return [sys.executable, "-c", script], f"{os.path.basename(file_path)} - fake player"
+
+class TestRunOrchestrator(unittest.TestCase):
+    def test_grading_overlaps_playback(self):
+        """
+        Test that every file is captured and graded in order while grading overlaps the next playback.
+        """
+        events = []
+        lock = threading.Lock()
+
+        def capture(window_title, file_path):
+            time.sleep(0.2)
+            return f"Captured {window_title}"
+
+        def grade(file_path, capture_result):
+            with lock:
+                events.append(("grade start", file_path, time.monotonic()))
+            time.sleep(0.4)
+            return f"Graded {capture_result}"
+
+        files = [f"video{index}.mp4" for index in range(3)]
+        started = time.monotonic()
+        results = RunOrchestrator(build_fake_command, capture=capture, grade=grade).run(files)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([result["file"] for result in results], files)
+        self.assertEqual(results[1]["grade"], "Graded Captured video1.mp4 - fake player")
+        self.assertTrue(all(result["error"] is None for result in results))
+        self.assertTrue(all(result["returncode"] is not None for result in results))
+        self.assertEqual([event[1] for event in events], files)
+        # Grading alone takes 1.2s, the three captures would add at least 0.6s if nothing overlapped
+        self.assertLess(elapsed, 0.6 + 1.2 + 0.5)
+        self.assertIn("capture", results[0]["timings"])
+
+    def test_player_exiting_early(self):
+        """
+        Test that a player that exits before the capture is reported and not graded.
+        """
+        graded = []
+        orchestrator = RunOrchestrator(build_fake_command, capture=lambda title, path: time.sleep(1),
+                                       grade=lambda path, capture: graded.append(path))
+        result, = orchestrator.run(["broken.mp4"])
+        self.assertEqual(result["error"], "Player exited before the capture with code 3.")
+        self.assertEqual(result["returncode"], 3)
+        self.assertEqual(graded, [])
+
+    def test_capture_timeout_stops_player(self):
+        """
+        Test that a capture running past its timeout stops the player and is awaited.
+        """
+        finished = threading.Event()
+
+        def slow_capture(window_title, file_path):
+            time.sleep(0.5)
+            finished.set()
+
+        orchestrator = RunOrchestrator(build_fake_command, capture=slow_capture, timeouts={"capture": 0.1})
+        result, = orchestrator.run(["video.mp4"])
+        self.assertIn("did not finish within 0.1 seconds", result["error"])
+        self.assertIsNotNone(result["returncode"])
+        self.assertTrue(finished.is_set())
+        self.assertEqual(orchestrator.processes, set())
+
+    def test_grading_error_is_reported(self):
+        """
+        Test that an exception while grading ends up in the result.
+        """
+        def grade(file_path, capture_result):
+            raise RuntimeError("golden image missing")
+
+        result, = RunOrchestrator(build_fake_command, capture=lambda title, path: "ok", grade=grade).run(["video.mp4"])
+        self.assertEqual(result["error"], "An error occurred while grading: golden image missing")
+
+    def test_cancel_stops_player(self):
+        """
+        Test that cancelling a run stops the player that is running.
+        """
+        orchestrator = RunOrchestrator(build_fake_command, play_time=30)
+
+        async def cancel_while_playing():
+            task = asyncio.ensure_future(orchestrator.run_async(["video.mp4"]))
+            while not orchestrator.processes:
+                await asyncio.sleep(0.05)
+            process = next(iter(orchestrator.processes))
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return process
+
+        started = time.monotonic()
+        process = asyncio.run(cancel_while_playing())
+        self.assertIsNotNone(process.returncode)
+        self.assertEqual(orchestrator.processes, set())
+        self.assertLess(time.monotonic() - started, 10)
+
+if __name__ == "__main__":
+    unittest.main()
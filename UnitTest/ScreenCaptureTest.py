@@ -1,7 +1,12 @@
 import unittest
+import os
+import tempfile
 from unittest.mock import patch, MagicMock
-from Library.Capture import capture_window_still
+from PIL import Image
+import numpy as np
+from Library.Capture import capture_window_still, capture_when_ready, capture_frame_when_ready, gw, save_screenshot
 
+@unittest.skipIf(gw is None, "Window capture is not available on this host.")
 class TestCaptureWindowStill(unittest.TestCase):
     @patch("Library.Capture.gw.getWindowsWithTitle")
     @patch("Library.Capture.pyautogui.screenshot")  # Mock pyautogui.screenshot instead of ImageGrab.grab
@@ -33,5 +38,95 @@ class TestCaptureWindowStill(unittest.TestCase):
         mock_image.convert.assert_called_once_with("RGB")
         mock_image.save.assert_called_once_with("output.jpg", "JPEG")
 
+@unittest.skipIf(gw is None, "Window capture is not available on this host.")
+class TestCaptureWhenReady(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary output folder and a mock VLC window.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.test_dir.name, "output.jpg")
+        self.window = MagicMock()
+        self.window.title = "clip.mp4 - VLC media player"
+        self.window.left, self.window.top, self.window.right, self.window.bottom = 0, 0, 320, 240
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    @patch("Library.Capture.gw.getWindowsWithTitle")
+    @patch("Library.Capture.pyautogui.screenshot")
+    def test_captures_once_window_settles(self, mock_screenshot, mock_get_windows):
+        """
+        Test that the capture waits for the window, then saves as soon as the frames are stable.
+        """
+        # The window shows up on the third poll
+        mock_get_windows.side_effect = [[], [], [self.window]]
+        # A black startup frame, then the same picture over and over
+        mock_screenshot.side_effect = [Image.new("RGB", (320, 240), "black")] + [Image.new("RGB", (320, 240), "gray")] * 10
+        on_captured = MagicMock()
+
+        result = capture_when_ready(self.window.title, self.output_file, timeout=5, poll_interval=0.01, on_captured=on_captured)
+
+        self.assertEqual(result, f"Screenshot saved successfully to {self.output_file}.")
+        self.assertEqual(mock_screenshot.call_count, 4)
+        self.assertTrue(os.path.exists(self.output_file))
+        on_captured.assert_called_once_with()
+
+    @patch("Library.Capture.gw.getWindowsWithTitle")
+    @patch("Library.Capture.pyautogui.screenshot")
+    def test_capture_frame_returns_bgr_array(self, mock_screenshot, mock_get_windows):
+        """
+        Test that the in-memory capture returns the settled frame as a BGR array without saving it.
+        """
+        mock_get_windows.return_value = [self.window]
+        mock_screenshot.return_value = Image.new("RGB", (320, 240), (255, 0, 0))
+
+        frame, message = capture_frame_when_ready(self.window.title, timeout=5, poll_interval=0.01)
+
+        self.assertEqual(message, f"Frame captured from window '{self.window.title}'.")
+        self.assertEqual(frame.shape, (240, 320, 3))
+        np.testing.assert_array_equal(frame[0, 0], [0, 0, 255])
+        self.assertEqual(os.listdir(self.test_dir.name), [])
+
+    @patch("Library.Capture.gw.getWindowsWithTitle")
+    def test_window_not_found(self, mock_get_windows):
+        """
+        Test that a window that never appears returns an error once the timeout expires.
+        """
+        mock_get_windows.return_value = []
+
+        result = capture_when_ready("missing - VLC media player", self.output_file, timeout=0.05, poll_interval=0.01)
+
+        self.assertEqual(result, "Error: Window with title 'missing - VLC media player' not found.")
+        self.assertFalse(os.path.exists(self.output_file))
+
+    @patch("Library.Capture.gw.getWindowsWithTitle")
+    @patch("Library.Capture.pyautogui.screenshot")
+    def test_window_never_settles(self, mock_screenshot, mock_get_windows):
+        """
+        Test that frames which keep changing return an error instead of a capture.
+        """
+        mock_get_windows.return_value = [self.window]
+        frames = [Image.new("RGB", (320, 240), color) for color in ("black", "white")]
+        mock_screenshot.side_effect = lambda region: frames.reverse() or frames[0]
+
+        result = capture_when_ready(self.window.title, self.output_file, timeout=0.1, poll_interval=0.01)
+
+        self.assertIn("did not settle", result)
+
+class TestSaveScreenshot(unittest.TestCase):
+    def test_rgba_screenshot_is_saved_as_jpeg(self):
+        """
+        Test that an RGBA screenshot, as pyautogui returns on some hosts, is written as an RGB JPEG.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            output_file = os.path.join(folder, "clip.mp4_screenshot.jpg")
+            save_screenshot(Image.new("RGBA", (64, 48), (200, 100, 50, 255)), output_file)
+            with Image.open(output_file) as saved:
+                self.assertEqual((saved.format, saved.mode, saved.size), ("JPEG", "RGB", (64, 48)))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
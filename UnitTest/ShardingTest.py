@@ -0,0 +1,167 @@
+import unittest
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from Library.Sharding import ShardWorker, merge_results, read_manifest, write_manifest
+
+def fake_process_shard(video_files):
+    """
+    Stands in for playback, capture and grading: one result per file.
+    """
+    time.sleep(0.05)
+    return [{"file": os.path.basename(video_file), "pid": os.getpid()} for video_file in video_files]
+
+def run_worker(work_dir, media_folder):
+    """
+    Runs one worker process against the work directory.
+    """
+    ShardWorker(work_dir, media_folder, fake_process_shard).run()
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary work directory and a manifest of 20 files in 2-file shards.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.work_dir = os.path.join(self.test_dir.name, "work")
+        self.media_folder = os.path.join(self.test_dir.name, "Media")
+        self.files = [os.path.join(self.media_folder, f"video{index:02d}.mp4") for index in range(20)]
+        write_manifest(self.work_dir, self.media_folder, self.files, shard_size=2)
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def result_names(self, merged):
+        """
+        Returns the file names of merged results.
+        """
+        return [result["file"] for result in merged["results"]]
+
+    def test_manifest(self):
+        """
+        Test that files are split into shards relative to the media folder.
+        """
+        shards = read_manifest(self.work_dir)["shards"]
+        self.assertEqual(len(shards), 10)
+        self.assertEqual(shards[1], {"id": "shard-0001", "files": ["video02.mp4", "video03.mp4"]})
+
+    def test_worker_processes_share_the_shards(self):
+        """
+        Test that several worker processes run every shard exactly once and the merge keeps manifest order.
+        """
+        workers = [multiprocessing.Process(target=run_worker, args=(self.work_dir, self.media_folder)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+
+        report_file = os.path.join(self.test_dir.name, "report.txt")
+        merged = merge_results(self.work_dir, report_file, format_result=lambda result: result["file"])
+        self.assertEqual(self.result_names(merged), [os.path.basename(path) for path in self.files])
+        self.assertEqual((merged["missing"], merged["failed"]), ([], []))
+        self.assertGreater(len({result["pid"] for result in merged["results"]}), 1)
+        self.assertEqual(os.listdir(os.path.join(self.work_dir, "claims")), [])
+        with open(report_file) as file:
+            self.assertEqual(len(file.readlines()), 20)
+
+    def test_stale_claims_are_reclaimed(self):
+        """
+        Test that a crashed worker's claim is taken over while a live claim is left alone.
+        """
+        claims = os.path.join(self.work_dir, "claims")
+        for shard_id, age in (("shard-0000", 600), ("shard-0001", 0)):
+            claim_file = os.path.join(claims, f"{shard_id}.lock")
+            with open(claim_file, "w") as file:
+                json.dump({"worker": "crashed"}, file)
+            os.utime(claim_file, (time.time() - age, time.time() - age))
+
+        done = ShardWorker(self.work_dir, self.media_folder, fake_process_shard, stale_after=60).run()
+        self.assertIn("shard-0000", done)
+        self.assertNotIn("shard-0001", done)
+
+        merged = merge_results(self.work_dir, stale_after=60)
+        self.assertEqual(merged["missing"], ["shard-0001"])
+        self.assertEqual(merged["reclaimed"], [])
+        self.assertEqual(len(merged["results"]), 18)
+
+    def test_merge_requeues_crashed_shards(self):
+        """
+        Test that the merge frees the shards of crashed workers for the next run.
+        """
+        worker = ShardWorker(self.work_dir, self.media_folder, fake_process_shard, worker_id="crashing")
+        shard = worker.claim()
+        claim_file = os.path.join(self.work_dir, "claims", f"{shard['id']}.lock")
+        os.utime(claim_file, (time.time() - 600, time.time() - 600))
+
+        merged = merge_results(self.work_dir, stale_after=60)
+        self.assertEqual(merged["reclaimed"], [entry["id"] for entry in read_manifest(self.work_dir)["shards"]])
+        self.assertFalse(os.path.exists(claim_file))
+
+        ShardWorker(self.work_dir, self.media_folder, fake_process_shard).run()
+        self.assertEqual(len(merge_results(self.work_dir)["results"]), 20)
+
+    def test_heartbeat_keeps_claim_alive(self):
+        """
+        Test that a shard running longer than stale_after is not taken over while its worker is alive.
+        """
+        stolen = []
+
+        def slow_shard(video_files):
+            time.sleep(0.6)
+            thief = ShardWorker(self.work_dir, self.media_folder, fake_process_shard, worker_id="thief", stale_after=0.3)
+            if thief._try_claim("shard-0000"):
+                stolen.append("shard-0000")
+            return []
+
+        worker = ShardWorker(self.work_dir, self.media_folder, slow_shard, heartbeat_interval=0.1, stale_after=0.3)
+        worker.run_shard(worker.claim())
+        self.assertEqual(stolen, [])
+
+    def test_failed_shard_is_reported(self):
+        """
+        Test that an exception in process_shard is reported per shard and leaves the shard free to be retried.
+        """
+        def failing_shard(video_files):
+            raise RuntimeError("VLC is not installed")
+
+        worker = ShardWorker(self.work_dir, self.media_folder, failing_shard)
+        self.assertEqual(worker.run(), [])
+        self.assertEqual(len(worker.failed), 10)
+
+        report_file = os.path.join(self.test_dir.name, "Sharded_Report.txt")
+        merged = merge_results(self.work_dir, report_file)
+        self.assertEqual(len(merged["failed"]), 10)
+        self.assertEqual(merged["reclaimed"], merged["failed"])
+        self.assertEqual(merged["errors"]["shard-0000"], "RuntimeError: VLC is not installed")
+        with open(report_file) as file:
+            self.assertEqual(file.readline(), "Shard shard-0000 failed: RuntimeError: VLC is not installed\n")
+
+    def test_failed_shard_is_retried(self):
+        """
+        Test that a shard that failed in one worker is run by the next one and then merged like any other.
+        """
+        calls = []
+
+        def flaky_shard(video_files):
+            calls.append(video_files)
+            if len(calls) == 1:
+                raise OSError("The capture window disappeared")
+            return fake_process_shard(video_files)
+
+        first = ShardWorker(self.work_dir, self.media_folder, flaky_shard, worker_id="first")
+        self.assertEqual(len(first.run()), 9)
+        self.assertEqual(merge_results(self.work_dir)["failed"], ["shard-0000"])
+
+        self.assertEqual(ShardWorker(self.work_dir, self.media_folder, flaky_shard, worker_id="second").run(), ["shard-0000"])
+        merged = merge_results(self.work_dir)
+        self.assertEqual((merged["failed"], merged["missing"]), ([], []))
+        self.assertEqual(sorted(self.result_names(merged)), [os.path.basename(video_file) for video_file in self.files])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import tempfile
+import cv2
+import numpy as np
+from Library.ImageCompare import percentage_differences
+from Library.SimilarityMatrix import group_frames_by_config, load_frame_stack, run_study, similarity_matrix
+
+class TestSimilarityMatrix(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder of frames for two configs.
+        """
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.frames_folder = os.path.join(self.test_dir.name, "frames")
+        os.makedirs(os.path.join(self.frames_folder, "MP4_HEVC_60FPS"))
+
+        rng = np.random.default_rng(4)
+        for number in range(1, 8):
+            frame = rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+            cv2.imwrite(os.path.join(self.frames_folder, f"MKV_H.264_60FPS_screenshot_{number}.png"), frame)
+        for number in range(1, 4):
+            frame = rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+            cv2.imwrite(os.path.join(self.frames_folder, "MP4_HEVC_60FPS", f"frame_{number}.png"), frame)
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory after each test case.
+        """
+        self.test_dir.cleanup()
+
+    def test_group_frames_by_config(self):
+        """
+        Test that frames are grouped by subfolder and by screenshot name prefix, in natural order.
+        """
+        groups = group_frames_by_config(self.frames_folder)
+
+        self.assertEqual(sorted(groups), ["MKV_H.264_60FPS", "MP4_HEVC_60FPS"])
+        names = [os.path.basename(path) for path in groups["MKV_H.264_60FPS"]]
+        self.assertEqual(names[:2], ["MKV_H.264_60FPS_screenshot_1.png", "MKV_H.264_60FPS_screenshot_2.png"])
+        self.assertEqual(len(groups["MP4_HEVC_60FPS"]), 3)
+
+    def test_blocked_matrix_matches_pairwise(self):
+        """
+        Test that the blocked matrix equals the pairwise percentage differences.
+        """
+        paths = group_frames_by_config(self.frames_folder)["MKV_H.264_60FPS"]
+        stack, _ = load_frame_stack(paths, size=(80, 60))
+
+        # Tiny blocks and memory budget force several blocks and pixel tiles
+        matrix = similarity_matrix(stack, block_size=3, memory_budget=3 * 3 * 2 * 1000)
+
+        for first in range(len(paths)):
+            expected = percentage_differences(np.repeat(stack[first:first + 1], len(paths), axis=0), stack)
+            np.testing.assert_allclose(matrix[first], expected)
+        np.testing.assert_array_equal(matrix, matrix.T)
+
+    def test_run_study_outputs(self):
+        """
+        Test that a study writes the matrix, CSV and JSON summary per config and cleans up its stack.
+        """
+        output_folder = os.path.join(self.test_dir.name, "study")
+        summaries = run_study(self.frames_folder, output_folder, size=(80, 60))
+
+        self.assertEqual(summaries["MKV_H.264_60FPS"]["frames"], 7)
+        self.assertEqual(np.load(os.path.join(output_folder, "MKV_H.264_60FPS.npy")).shape, (7, 7))
+        with open(os.path.join(output_folder, "MP4_HEVC_60FPS.json")) as file:
+            self.assertEqual(json.load(file)["frames"], 3)
+        self.assertTrue(os.path.exists(os.path.join(output_folder, "MP4_HEVC_60FPS.csv")))
+        self.assertFalse(any(name.endswith(".frames.npy") for name in os.listdir(output_folder)))
+
+if __name__ == "__main__":
+    unittest.main()
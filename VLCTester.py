@@ -2,33 +2,81 @@ import subprocess
 import os
 import threading
 from Library.FrameworkLogging import CustomLogger
-from Library.FunctionLibrary import scan_for_video_files
-from Library.Capture import capture_window_still  # Import the capture function
+from Library.MediaIndex import stream_video_files
+from Library.MediaProbe import playback_window, probe_media
+from Library.Capture import capture_window_still, capture_when_ready, capture_frame_when_ready  # Import the capture functions
+from Library.CapturePipeline import CapturePipeline
+from Library.GoldenArchive import DEFAULT_ARCHIVE_NAME
+from Library.GoldenModel import DEFAULT_MODEL_FOLDER
+from Library.Player import VLC_PATH, build_vlc_command, vlc_window_title
+from Library.PlaybackScheduler import PlaybackScheduler, vlc_command_builder
+from Library.PlayerControl import DEFAULT_RC_HOST, DEFAULT_RC_PORT, PersistentPlayer
+from Library.ResultStore import ResultStore
+from Library.RunOrchestrator import RunOrchestrator
+from Library.Sharding import ShardWorker, merge_results, read_manifest, write_manifest
+from Library.FrameSource import save_frames_parallel
+from Library.FrameCadence import analyze_video
+from Library import Instrumentation
+from Library.Instrumentation import span
+from Library.ImageCompare import grade_folders, format_result
 import time
 
-def call_image_compare():
+def golden_archive_path(golden_folder):
     """
-    Calls the ImageCompare.py script after all videos have been processed.
+    Returns the golden archive Training.py wrote into the golden folder, or None if there is none.
     """
-    try:
-        # Path to the ImageCompare.py script
-        image_compare_script = os.path.join(os.getcwd(), "Library", "ImageCompare.py")
+    archive_file = os.path.join(golden_folder, DEFAULT_ARCHIVE_NAME)
+    return archive_file if os.path.exists(archive_file) else None
 
-        # Run the script using subprocess
-        result = subprocess.run(["python", image_compare_script], capture_output=True, text=True)
+def golden_model_path(golden_folder):
+    """
+    Returns the folder of statistical golden models Training.py wrote, or None if there is none.
+    """
+    model_folder = os.path.join(golden_folder, DEFAULT_MODEL_FOLDER)
+    return model_folder if os.path.isdir(model_folder) else None
 
-        # Log the output and errors
-        if result.returncode == 0:
-            print("ImageCompare.py executed successfully.")
-            print(result.stdout)
-        else:
-            print("Error occurred while executing ImageCompare.py.")
-            print(result.stderr)
+def grading_options(golden_folder):
+    """
+    Returns the grade_folders options every grading of this script uses.
+    """
+    # Pairs whose golden image and screenshot are unchanged since the last run reuse their score
+    return {
+        "golden_cache_folder": os.path.join(golden_folder, "Cache"),
+        "result_cache_file": os.path.join(golden_folder, "Cache", "grade_results.sqlite"),
+        "golden_archive_file": golden_archive_path(golden_folder),
+        "golden_model_folder": golden_model_path(golden_folder),
+    }
+
+def call_image_compare(media_folder, golden_folder, video_files):
+    """
+    Grades the captured screenshots against their golden images after all videos have been processed.
+
+    Args:
+        media_folder (str): The folder the screenshots were saved to.
+        golden_folder (str): The folder holding the golden images.
+        video_files (list): The video files that were played.
+
+    Returns:
+        list: One result dict per video as returned by ImageCompare.grade_folders.
+    """
+    try:
+        with span("grade.total", videos=len(video_files)):
+            results = grade_folders(media_folder, golden_folder, video_files, **grading_options(golden_folder))
+
+        # Log the results
+        for result in results:
+            message = format_result(result)
+            print(message)
+            logger.debug(message)
+        return results
     except Exception as e:
-        print(f"An error occurred while calling ImageCompare.py: {e}")
+        print(f"An error occurred while grading the screenshots: {e}")
+        logger.debug(f"An error occurred while grading the screenshots: {e}")
+        return []
 
 def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overlay=False, start_time=None, stop_time=None,
-                           server_port=None, iface=None, iface_addr=None, mtu=None, ipv6=False, ipv4=False, max_screen=None):
+                           server_port=None, iface=None, iface_addr=None, mtu=None, ipv6=False, ipv4=False, max_screen=None,
+                           stop_event=None):
     """
     Launches VLC Media Player with the specified options and plays the given file.
     """
@@ -38,60 +86,39 @@ def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overla
             logger.debug(f"File '{file_path}' does not exist.")
             return f"Error: The file '{file_path}' does not exist."
 
-        # Path to VLC executable (update this path if VLC is installed elsewhere)
-        vlc_path = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
-
         # Check if VLC is installed
-        if not os.path.exists(vlc_path):
-            logger.debug(f"VLC Media Player not found at '{vlc_path}'.")
+        if not os.path.exists(VLC_PATH):
+            logger.debug(f"VLC Media Player not found at '{VLC_PATH}'.")
             return "Error: VLC Media Player is not installed or the path is incorrect."
 
         # Build the VLC command
-        command = [vlc_path, file_path]
-
-        # Add optional parameters
-        if no_video:
-            command.append("--no-video")
-        if grayscale is not None:
-            command.append("--grayscale")
-        if no_overlay:
-            command.append("--nooverlay")
-        if start_time is not None:
-            command.extend(["--start-time", str(start_time)])
-        if stop_time is not None:
-            command.extend(["--stop-time", str(stop_time)])
-        if server_port is not None:
-            command.extend(["--server-port", str(server_port)])
-        if iface is not None:
-            command.extend(["--iface", iface])
-        if iface_addr is not None:
-            command.extend(["--iface-addr", iface_addr])
-        if mtu is not None:
-            command.extend(["--mtu", str(mtu)])
-        if ipv6:
-            command.append("--ipv6")
-        if ipv4:
-            command.append("--ipv4")
-        if max_screen is not None:
-            command.append("--fullscreen")
+        command = build_vlc_command(file_path, no_video=no_video, grayscale=grayscale, no_overlay=no_overlay,
+                                    start_time=start_time, stop_time=stop_time, server_port=server_port, iface=iface,
+                                    iface_addr=iface_addr, mtu=mtu, ipv6=ipv6, ipv4=ipv4, max_screen=max_screen)
 
         # Launch VLC with the specified options
         logger.debug(f"Launching VLC with command: {' '.join(command)}")
-        process = subprocess.Popen(command)
+        with span("vlc.launch", file=file_path):
+            process = subprocess.Popen(command)
 
         # Wait for the video to finish playing
-        if stop_time is not None:
-            time_to_play = stop_time - (start_time or 0)
-            print(f"Playing video '{file_path}' for {time_to_play} seconds...")
-            logger.debug(f"Playing video '{file_path}' for {time_to_play} seconds...")
-            time.sleep(time_to_play)  # Wait for the specified duration
-        else:
-            logger.debug(f"No stop time specified, waiting for the video to finish playing...")
-            process.wait()
+        with span("vlc.play", file=file_path):
+            if stop_time is not None:
+                time_to_play = stop_time - (start_time or 0)
+                print(f"Playing video '{file_path}' for {time_to_play} seconds...")
+                logger.debug(f"Playing video '{file_path}' for {time_to_play} seconds...")
+                if stop_event is not None:
+                    stop_event.wait(time_to_play)  # Wait for the specified duration or until the capture is done
+                else:
+                    time.sleep(time_to_play)  # Wait for the specified duration
+            else:
+                logger.debug(f"No stop time specified, waiting for the video to finish playing...")
+                process.wait()
 
         # Terminate the VLC process
-        process.terminate()
-        process.wait()  # Ensure the process is fully terminated
+        with span("vlc.terminate"):
+            process.terminate()
+            process.wait()  # Ensure the process is fully terminated
         logger.debug(f"VLC Media Player finished playing file: {file_path}")
         return f"VLC Media Player finished playing file: {file_path}"
     except subprocess.CalledProcessError as e:
@@ -101,18 +128,103 @@ def start_vlc_with_options(file_path, no_video=False, grayscale=False, no_overla
         logger.debug(f"An unexpected error occurred: {e}")  # Log any other unexpected errors
         return f"An unexpected error occurred: {e}"
 
-def capture_screenshot_async(window_title, output_image):
+def play_with_persistent_player(player, file_path, play_time, stop_event=None):
+    """
+    Plays a file in the persistent player for play_time seconds or until stop_event is set.
+
+    Args:
+        player (PersistentPlayer): The running player.
+        file_path (str): The path of the media file.
+        play_time (float): The maximum number of seconds to play.
+        stop_event (threading.Event): Optional event set once the capture is done.
+
+    Returns:
+        str: A message describing the outcome.
+    """
+    try:
+        if not os.path.exists(file_path):
+            logger.debug(f"File '{file_path}' does not exist.")
+            return f"Error: The file '{file_path}' does not exist."
+
+        with span("vlc.load", file=file_path):
+            if not player.play(file_path):
+                return f"Error: The player did not start playing '{file_path}'."
+
+        with span("vlc.play", file=file_path):
+            logger.debug(f"Playing video '{file_path}' for {play_time} seconds...")
+            if stop_event is not None:
+                stop_event.wait(play_time)  # Wait for the specified duration or until the capture is done
+            else:
+                time.sleep(play_time)
+
+        with span("vlc.stop"):
+            position = player.get_time()
+            player.stop()
+        logger.debug(f"Persistent player stopped '{file_path}' at {position}s")
+        return f"VLC Media Player finished playing file: {file_path}"
+    except Exception as e:
+        logger.debug(f"An unexpected error occurred: {e}")
+        return f"An unexpected error occurred: {e}"
+
+def capture_screenshot_async(window_title, output_image, stop_event=None, timeout=6, target_time=None,
+                             pipeline=None, video_file=None):
     """
-    Captures a screenshot asynchronously after 3 seconds.
+    Captures a screenshot asynchronously as soon as the VLC window shows a settled picture.
+
+    Args:
+        window_title (str): The title of the VLC window.
+        output_image (str): The path to save the screenshot to.
+        stop_event (threading.Event): Optional event set once the capture is done, to stop the player.
+        timeout (float): The maximum number of seconds to wait for the window to be ready.
+        target_time (float): Optional seconds of playback to wait for before capturing.
+        pipeline (CapturePipeline): Optional pipeline that grades the capture in memory instead
+                                    of saving it to output_image.
+        video_file (str): The video being played, needed with pipeline.
+
+    Returns:
+        threading.Thread: The capture thread, join it before moving on to the next video.
     """
     def capture():
-        time.sleep(5)  # Wait for 5 seconds
-        capture_result = capture_window_still(window_title, output_image)
+        if pipeline is not None:
+            frame, capture_result = capture_frame_when_ready(window_title, timeout=timeout, target_time=target_time)
+            if stop_event is not None:
+                stop_event.set()  # The player is no longer needed while the frame is graded
+            logger.debug(capture_result)
+            capture_result = format_result(pipeline.grade_capture(video_file, frame))
+        else:
+            capture_result = capture_when_ready(window_title, output_image, timeout=timeout, target_time=target_time)
         logger.debug(capture_result)
         print(capture_result)
+        if stop_event is not None:
+            stop_event.set()  # Stop the player whether or not the capture succeeded
 
     # Start the capture in a separate thread
-    threading.Thread(target=capture).start()
+    capture_thread = threading.Thread(target=capture)
+    capture_thread.start()
+    return capture_thread
+
+def run_shard_videos(video_files, media_folder, golden_folder):
+    """
+    Plays and captures the videos of one shard, then grades them.
+
+    Args:
+        video_files (list): The video files of the shard.
+        media_folder (str): The folder the screenshots are saved to.
+        golden_folder (str): The folder holding the golden images.
+
+    Returns:
+        list: One result dict per video as returned by ImageCompare.grade_folders.
+    """
+    for video_file in video_files:
+        stop_time = playback_window(probe_media(video_file))[1]
+        output_image = os.path.join(media_folder, f"{os.path.basename(video_file)}_screenshot.jpg")
+        stop_event = threading.Event()
+        capture_thread = capture_screenshot_async(vlc_window_title(video_file), output_image, stop_event, timeout=stop_time)
+        result = start_vlc_with_options(file_path=video_file, grayscale=True, start_time=0, stop_time=stop_time,
+                                        max_screen=True, stop_event=stop_event)
+        capture_thread.join()  # Never let a capture outlive its player
+        print(result)
+    return grade_folders(media_folder, golden_folder, video_files, **grading_options(golden_folder))
 
 if __name__ == "__main__":
     LogFileName = "Logging_VLCTester.log"  # Initialize logging (optional, if you have FrameworkLogging set up)
@@ -121,8 +233,10 @@ if __name__ == "__main__":
     if os.path.exists(LogFileName):
         os.remove(LogFileName)
 
-    # Initialize the logger with a specific log file name
-    logger = CustomLogger(LogFileName).get_logger()
+    # Initialize the logger with a specific log file name. The log is written by a background
+    # thread so debug calls in the playback and capture loops never wait on the disk.
+    custom_logger = CustomLogger(LogFileName, queued=True)
+    logger = custom_logger.get_logger()
     logger.debug("Old log file has been deleted.")
     logger.debug("Starting VLCTester script...")
 
@@ -131,38 +245,205 @@ if __name__ == "__main__":
     media_folder = os.path.join(current_path, "Media")  # Use os.path.join to construct the path
     logger.debug(f"Media folder set to: {media_folder}")
 
-    # Get the list of video files
-    video_files = scan_for_video_files(media_folder)
+    # Path to the Golden Images folder under the Media folder
+    golden_folder = os.path.join(media_folder, "Golden_Images")
+    logger.debug(f"Golden Images folder set to: {golden_folder}")
 
-    # Print the log file names to the debug log for verification
-    if video_files:
-        logger.debug(f"Video files found: {video_files}")
-    else:
-        logger.debug("No video files found in the specified media folder.")
+    # Where screenshots come from: "vlc" plays and captures the window, "decode" reads frames straight from the files
+    frame_source = "vlc"
 
-    # Check if any video files were found
-    if not video_files:
-        print(f"No video files found in the folder: {media_folder}")
-        logger.warning(f"No video files found in the folder: {media_folder}")
-    else:
-        print(f"Found {len(video_files)} video files in the folder: {media_folder}")
-        logger.debug(f"Found {len(video_files)} video files in the folder: {media_folder}")
+    # Also decode every file in full and report duplicated, dropped and stuttering frames ("decode" source only)
+    cadence_check = False
+
+    # Number of VLC instances playing at the same time, 1 plays the videos one after another
+    concurrent_players = 1
+
+    # Optional index file that lets later runs skip unchanged folders, None scans the whole media folder
+    media_index_file = None
+
+    # Grade the captures in memory as they arrive instead of saving and re-reading JPEGs ("vlc" source, one player only)
+    in_memory_grading = False
+    # Captures written to the Media folder when grading in memory: "none", "failures" or "all"
+    archive_captures = "failures"
+
+    # Keep one VLC instance running and load every video over its remote control interface (one player only)
+    persistent_player = False
+
+    # Shared work directory of a run sharded across hosts, None runs the whole library on this host
+    shard_work_dir = None
+    # What this host does in a sharded run: "coordinator" writes the manifest of shards, "worker" claims and runs
+    # shards until none are left, "merge" writes one report from the partial results and frees crashed workers' shards
+    shard_role = "worker"
+
+    # Play, capture and grade with the asyncio orchestrator, grading each video while the next one plays (one player only)
+    orchestrated_run = False
+
+    # Optional Chrome trace file (open it in chrome://tracing) with the timing of every stage, None turns timing off
+    trace_file = None
+
+    # History of every grade of every run for trend and regression queries, None keeps no history
+    result_store_file = os.path.join(current_path, "Results", "grade_history.sqlite")
+    if trace_file:
+        Instrumentation.enable()
+
+    # Optional filter on the container header details of every file, e.g. lambda details: details["codec"] == "HEVC"
+    media_filter = None
+
+    # Stream the video files, so the first one is processed while the scan is still running. Their codec, frame rate
+    # and duration are read from the container headers (cached in the media index), so short files get a shorter play
+    # time and an earlier capture time, see MediaProbe.playback_window.
+    video_files = []
+    media_info = {}
+    def scanned_video_files():
+        for video_file in stream_video_files(media_folder, media_index_file,
+                                             on_change=lambda status, path: logger.debug(f"Video file {status}: {path}"),
+                                             media_info=media_info, media_filter=media_filter):
+            video_files.append(video_file)
+            yield video_file
+
+    # Grades the captures as they arrive when in_memory_grading is on
+    pipeline = None
+    # Set once every video has been graded during the run
+    graded_during_run = False
+    # Grades of this run, recorded in the result store at the end
+    run_results = []
+
+    if shard_work_dir:
+        # The shards are graded by the workers, the merge writes the report
+        graded_during_run = True
+        if shard_role == "coordinator":
+            manifest = write_manifest(shard_work_dir, media_folder, list(scanned_video_files()))
+            logger.debug(f"Wrote {len(manifest['shards'])} shards to {shard_work_dir}")
+        elif shard_role == "worker":
+            def process_shard(shard_files):
+                video_files.extend(shard_files)
+                return run_shard_videos(shard_files, media_folder, golden_folder)
+
+            shard_worker = ShardWorker(shard_work_dir, media_folder, process_shard, logger=logger)
+            logger.debug(f"Worker {shard_worker.worker_id} ran shards: {shard_worker.run()}")
+            for shard_id, error in shard_worker.failed.items():
+                message = f"Shard {shard_id} failed: {error}"
+                print(message)
+                logger.warning(message)
+        elif shard_role == "merge":
+            video_files.extend(os.path.join(media_folder, path) for shard in read_manifest(shard_work_dir)["shards"]
+                               for path in shard["files"])
+            merged = merge_results(shard_work_dir, os.path.join(media_folder, "Sharded_Report.txt"))
+            run_results = merged["results"]
+            for result in merged["results"]:
+                print(format_result(result))
+            for shard_id in merged["missing"]:
+                if shard_id in merged["errors"]:
+                    message = f"Shard {shard_id} failed: {merged['errors'][shard_id]}"
+                else:
+                    message = f"No results yet for {shard_id}"
+                message += ", it is free to be claimed again." if shard_id in merged["reclaimed"] else "."
+                print(message)
+                logger.warning(message)
+        else:
+            raise ValueError(f"Unknown shard role: {shard_role}")
+    elif frame_source == "decode":
+        # Decode the screenshot frame of every video without a player or display
+        jobs = ((video_file, playback_window(media_info[video_file])[0],
+                 os.path.join(media_folder, f"{os.path.basename(video_file)}_screenshot.jpg"))
+                for video_file in scanned_video_files())
+        for result in save_frames_parallel(jobs):
+            print(result)
+            logger.debug(result)
+        if cadence_check:
+            for video_file in video_files:
+                events, cadence = analyze_video(video_file)
+                message = (f"Frame cadence of {os.path.basename(video_file)}: {cadence['duplicates']} duplicated, "
+                           f"{cadence['dropped']} dropped and {cadence['stutters']} stuttering frames, "
+                           f"every picture shown {cadence['cadence']} times.")
+                print(message)
+                logger.debug(f"{message} Events: {events}")
+    elif concurrent_players > 1:
+        # Play several videos at once, each in its own titled and tiled window
+        def capture_screenshot(window_title, video_file):
+            output_image = os.path.join(media_folder, f"{os.path.basename(video_file)}_screenshot.jpg")
+            return capture_window_still(window_title, output_image)
+
+        scheduler = PlaybackScheduler(
+            concurrent_players,
+            vlc_command_builder(grayscale=True, start_time=0, stop_time=6),
+            capture=capture_screenshot,
+            play_time=6,  # Play for 6 seconds
+            capture_delay=5,
+            logger=logger
+        )
+        for result in scheduler.run(scanned_video_files()):
+            print(result["error"] or result["capture"])
+        logger.debug(f"Played {len(video_files)} videos with at most {scheduler.peak_active} players at once.")
+    elif orchestrated_run:
+        if in_memory_grading:
+            pipeline = CapturePipeline(golden_folder, media_folder, golden_cache_folder=os.path.join(golden_folder, "Cache"),
+                                       archive=archive_captures, golden_archive_file=golden_archive_path(golden_folder),
+                                       golden_model_folder=golden_model_path(golden_folder))
+
+        def build_command(video_file):
+            stop_time = playback_window(media_info[video_file])[1]
+            command = build_vlc_command(video_file, grayscale=True, start_time=0, stop_time=stop_time, max_screen=True)
+            return command, vlc_window_title(video_file)
 
+        def capture(window_title, video_file):
+            stop_time = playback_window(media_info[video_file])[1]
+            if pipeline is not None:
+                return capture_frame_when_ready(window_title, timeout=stop_time)
+            output_image = os.path.join(media_folder, f"{os.path.basename(video_file)}_screenshot.jpg")
+            return capture_when_ready(window_title, output_image, timeout=stop_time)
+
+        def grade(video_file, capture_result):
+            if pipeline is not None:
+                frame, capture_message = capture_result
+                logger.debug(capture_message)
+                return pipeline.grade_capture(video_file, frame)
+            logger.debug(capture_result)
+            return grade_folders(media_folder, golden_folder, [video_file], **grading_options(golden_folder))[0]
+
+        orchestrator = RunOrchestrator(build_command, capture=capture, grade=grade, play_time=6, logger=logger)
+        for result in orchestrator.run(scanned_video_files()):
+            message = result["error"] or format_result(result["grade"])
+            print(message)
+            logger.debug(f"{message} Stage timings: {result['timings']}")
+            if result["grade"] is not None:
+                run_results.append(dict(result["grade"], timings=result["timings"]))
+        graded_during_run = True
+    else:
+        if in_memory_grading:
+            pipeline = CapturePipeline(golden_folder, media_folder, golden_cache_folder=os.path.join(golden_folder, "Cache"),
+                                       archive=archive_captures, golden_archive_file=golden_archive_path(golden_folder),
+                                       golden_model_folder=golden_model_path(golden_folder))
+        player = None
+        if persistent_player:
+            player = PersistentPlayer(build_vlc_command(None, grayscale=True, max_screen=True,
+                                                        rc_host=f"{DEFAULT_RC_HOST}:{DEFAULT_RC_PORT}"),
+                                      logger=logger)
         videoNumber = 1
-        # Play each video for 6 seconds
-        for video_file in video_files:
+        # Play each video for 6 seconds, or to its end if it is shorter
+        for video_file in scanned_video_files():
             print(f"Playing video: {video_file}")
             logger.debug(f"Playing video {videoNumber}: {video_file}")
             videoNumber += 1
+            stop_time = playback_window(media_info[video_file])[1]
 
             # Construct the VLC window title dynamically
-            window_title = f"{os.path.basename(video_file)} - VLC media player"
+            window_title = vlc_window_title(video_file)
 
             # Construct the output image path
             output_image = os.path.join(media_folder, f"{os.path.basename(video_file)}_screenshot.jpg")
 
             # Capture the VLC window screenshot asynchronously
-            capture_screenshot_async(window_title, output_image)
+            stop_event = threading.Event()
+            capture_thread = capture_screenshot_async(window_title, output_image, stop_event, timeout=stop_time,
+                                                      pipeline=pipeline, video_file=video_file)
+
+            if player is not None:
+                # Load the video into the running player, it is only restarted if it failed
+                result = play_with_persistent_player(player, video_file, stop_time, stop_event)
+                capture_thread.join()  # Never let a capture outlive its playback
+                print(result)
+                continue
 
             # Start VLC and play the video
             result = start_vlc_with_options(
@@ -170,14 +451,59 @@ if __name__ == "__main__":
                 no_video=False,
                 grayscale=True,
                 start_time=0,
-                stop_time=6,  # Play for 6 seconds
-                max_screen=True
+                stop_time=stop_time,
+                max_screen=True,
+                stop_event=stop_event  # Stop as soon as the screenshot has been captured
                # Set to True if you want to test grayscale
             )
 
+            capture_thread.join()  # Never let a capture outlive its player
             print(result)
 
-    #     # Call image ImageComare.py not that the screen shots have been captured.
-    logger.debug("All videos have been processed, now calling ImageCompare.py...")
-    call_image_compare()
+        if player is not None:
+            logger.debug(f"Persistent player was started {player.starts} times.")
+            player.close()
+
+    # Check if any video files were found
+    if not video_files:
+        print(f"No video files found in the folder: {media_folder}")
+        logger.warning(f"No video files found in the folder: {media_folder}")
+    else:
+        print(f"Processed {len(video_files)} video files in the folder: {media_folder}")
+        logger.debug(f"Processed {len(video_files)} video files in the folder: {media_folder}")
+
+    if pipeline is not None:
+        # Every capture has been graded already, wait for the archived captures to be written
+        results = run_results = pipeline.close()
+        if pipeline.writer is not None:
+            for error in pipeline.writer.errors:
+                print(error)
+                logger.debug(error)
+        logger.debug(f"Graded {len(results)} captures in memory.")
+    elif not graded_during_run:
+        # Grade the screenshots now that they have been captured.
+        logger.debug("All videos have been processed, now grading the screenshots...")
+        run_results = call_image_compare(media_folder, golden_folder, video_files)
+
+    if result_store_file and run_results:
+        # Keep the grades for trend queries and check them against this host's history
+        result_store = ResultStore(result_store_file)
+        run_id = result_store.start_run()
+        result_store.add_results(run_id, run_results)
+        result_store.finish_run(run_id, Instrumentation.summary() if trace_file else None)
+        for regression in result_store.regressions(run_id):
+            message = (f"Regression in {regression['config']}: {regression['graded_by']} score {regression['score']} against an average of "
+                       f"{regression['baseline_mean']} over {regression['baseline_count']} earlier grades on this host.")
+            print(message)
+            logger.warning(message)
+        result_store.close()
+
+    # Export where the time went, when timing instrumentation is on
+    if trace_file:
+        Instrumentation.export_chrome_trace(trace_file)
+        stage_summary = Instrumentation.format_summary()
+        print(stage_summary)
+        logger.info(f"Stage timings, trace written to {trace_file}:\n{stage_summary}")
 
+    # Flush the queued log records before exiting
+    custom_logger.stop()